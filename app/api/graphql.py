@@ -1,17 +1,17 @@
 from __future__ import annotations
 import strawberry
+from fastapi import Depends
 from strawberry.fastapi import GraphQLRouter
-from sqlalchemy.orm import Session
 
-from app.db.session import get_session
+from app.db.session import Db, get_db
 
 from app.modules.tenants.gql import TenantsQuery, TenantsMutation
 from app.modules.invoices.gql import InvoicesQuery, InvoicesMutation
-from app.modules.transactions.gql import TransactionsMutation
+from app.modules.transactions.gql import TransactionsQuery, TransactionsMutation
 from app.modules.reconciliation.gql import ReconciliationQuery, ReconciliationMutation
 
 @strawberry.type
-class Query(TenantsQuery, InvoicesQuery, ReconciliationQuery):
+class Query(TenantsQuery, InvoicesQuery, TransactionsQuery, ReconciliationQuery):
     pass
 
 @strawberry.type
@@ -21,12 +21,8 @@ class Mutation(TenantsMutation, InvoicesMutation, TransactionsMutation, Reconcil
 schema = strawberry.Schema(query=Query, mutation=Mutation)
 
 def build_graphql_router() -> GraphQLRouter:
-    async def get_context() -> dict:
-        # Strawberry FastAPI context can be async. We'll open a session per request.
-        # Our session factory returns a sync Session, so we create it here and close in a response hook isn't trivial.
-        # For simplicity in this challenge, we pass a session generator and create/close within resolvers via context manager.
-        # But to keep changes minimal, we create one session and rely on FastAPI lifespan to dispose connections (SQLite).
-        session = next(get_session())  # get_session is a generator dependency
-        return {"session": session}
+    async def get_context(db: Db = Depends(get_db)) -> dict:
+        # resolved per request like any route dependency, so the session is closed afterwards
+        return {"db": db}
 
     return GraphQLRouter(schema, context_getter=get_context)
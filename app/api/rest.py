@@ -5,6 +5,7 @@ from app.modules.tenants.api import router as tenants_router
 from app.modules.invoices.api import router as invoices_router
 from app.modules.transactions.api import router as transactions_router
 from app.modules.reconciliation.api import router as reconciliation_router
+from app.modules.exports.api import router as exports_router
 
 router = APIRouter()
 
@@ -12,3 +13,4 @@ router.include_router(tenants_router)
 router.include_router(invoices_router)
 router.include_router(transactions_router)
 router.include_router(reconciliation_router)
+router.include_router(exports_router)
@@ -5,6 +5,44 @@ from dataclasses import dataclass
 @dataclass(frozen=True)
 class Settings:
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+    # route handlers reach the database through an AsyncSession (aiosqlite / asyncpg) instead of worker threads
+    db_async: bool = os.getenv("DB_ASYNC", "0") not in ("0", "false", "")
     ai_api_key: str | None = os.getenv("AI_API_KEY")
+    # explanation provider endpoint; unset uses the in-process stub client
+    ai_base_url: str | None = os.getenv("AI_BASE_URL")
+    # >1 scores reconcile shards in a process pool
+    reconcile_workers: int = int(os.getenv("RECONCILE_WORKERS", "1"))
+    # upper bound on `workers` a request may ask for; defaults to the CPU count
+    reconcile_max_workers: int = int(os.getenv("RECONCILE_MAX_WORKERS") or os.cpu_count() or 1)
+    reconcile_chunk_size: int = int(os.getenv("RECONCILE_CHUNK_SIZE", "1000"))
+    # incremental runs re-check rows updated this long before the previous run started (late commits, clock skew)
+    reconcile_watermark_margin_s: int = int(os.getenv("RECONCILE_WATERMARK_MARGIN_S", "300"))
+    # idempotency records are kept this long, then purged
+    idempotency_ttl_hours: int = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "72"))
+    # seconds between in-process purges; 0 leaves it to `python -m app.modules.transactions.purge`
+    idempotency_purge_interval_s: int = int(os.getenv("IDEMPOTENCY_PURGE_INTERVAL_S", "3600"))
+    idempotency_cache_size: int = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "1024"))
+    # rows per commit for statement file imports and bulk invoice creation
+    import_chunk_size: int = int(os.getenv("IMPORT_CHUNK_SIZE", "5000"))
+    # threads running reconcile jobs inside the API process; 0 leaves them to `python -m ...worker`
+    reconcile_job_threads: int = int(os.getenv("RECONCILE_JOB_THREADS", "2"))
+    # a running job whose worker has not reported progress for this long is presumed dead and requeued
+    reconcile_job_stale_s: float = float(os.getenv("RECONCILE_JOB_STALE_S", "900"))
+    # explanations: in-process LRU entries, retention, and whether they are also kept in `explanation_cache`
+    explain_cache_size: int = int(os.getenv("EXPLAIN_CACHE_SIZE", "4096"))
+    explain_cache_ttl_hours: int = int(os.getenv("EXPLAIN_CACHE_TTL_HOURS", "24"))
+    explain_cache_persist: bool = os.getenv("EXPLAIN_CACHE_PERSIST", "1") not in ("0", "false", "")
+    # seconds between in-process purges of expired persisted explanations; 0 leaves it to
+    # `python -m app.modules.reconciliation.purge`
+    explain_cache_purge_interval_s: int = int(os.getenv("EXPLAIN_CACHE_PURGE_INTERVAL_S", "3600"))
+    # batch explain: concurrent AI calls and the per-item deadline before falling back
+    explain_concurrency: int = int(os.getenv("EXPLAIN_CONCURRENCY", "8"))
+    explain_timeout_s: float = float(os.getenv("EXPLAIN_TIMEOUT_S", "10"))
+    # AI provider: pooled connections per process, retries within the deadline above,
+    # and consecutive failures before the circuit opens / seconds before a half-open probe
+    ai_pool_size: int = int(os.getenv("AI_POOL_SIZE", "20"))
+    ai_retries: int = int(os.getenv("AI_RETRIES", "2"))
+    ai_breaker_failures: int = int(os.getenv("AI_BREAKER_FAILURES", "5"))
+    ai_breaker_reset_s: float = float(os.getenv("AI_BREAKER_RESET_S", "30"))
 
 settings = Settings()
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import base64
+import datetime as dt
+import json
+from typing import Any, Generic, NamedTuple, TypeVar
+
+from app.core.errors import BadRequestError
+
+T = TypeVar("T")
+
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class Page(NamedTuple, Generic[T]):
+    items: list[T]
+    next_cursor: str | None
+
+
+def encode_cursor(*key: Any) -> str:
+    """Opaque cursor for a keyset position (the sort key of the last row served)."""
+    raw = json.dumps(key, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> list:
+    """Inverse of `encode_cursor`, checked against the expected key `types`
+    (`int` or `dt.datetime`, the latter sent as an ISO string); anything else
+    is a 400 rather than a value handed to the query."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise BadRequestError("Invalid cursor")
+    if not isinstance(key, list) or len(key) != len(types):
+        raise BadRequestError("Invalid cursor")
+    out = []
+    for value, kind in zip(key, types):
+        if kind is int and type(value) is int:
+            out.append(value)
+        elif kind is dt.datetime and isinstance(value, str):
+            try:
+                out.append(dt.datetime.fromisoformat(value))
+            except ValueError:
+                raise BadRequestError("Invalid cursor")
+        else:
+            raise BadRequestError("Invalid cursor")
+    return out
+
+
+def check_limit(limit: int) -> None:
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise BadRequestError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
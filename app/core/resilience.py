@@ -0,0 +1,101 @@
+"""Circuit breaker and latency histogram for calls to external services."""
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from typing import Callable
+
+# upper bounds in milliseconds; anything slower lands in "+Inf"
+DEFAULT_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and rejects calls
+    until `reset_after_s` has passed. Then a single half-open probe is let
+    through: success closes the circuit, failure opens it again."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_after_s: float, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_after_s = reset_after_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.opened = 0
+        self.short_circuited = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_after_s:
+                self._state = self.HALF_OPEN
+                self._probing = False
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.opened += 1
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._probing = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_after_s": self.reset_after_s,
+                "opened": self.opened,
+                "short_circuited": self.short_circuited,
+            }
+
+
+class LatencyHistogram:
+    """Cumulative bucket counts, Prometheus style."""
+
+    def __init__(self, buckets_ms: tuple[float, ...] = DEFAULT_BUCKETS_MS):
+        self.buckets_ms = tuple(sorted(buckets_ms))
+        self._counts = [0] * (len(self.buckets_ms) + 1)
+        self._sum_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        ms = seconds * 1000
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets_ms, ms)] += 1
+            self._sum_ms += ms
+
+    def stats(self) -> dict:
+        with self._lock:
+            buckets, running = {}, 0
+            for bound, n in zip((*(f"{b:g}" for b in self.buckets_ms), "+Inf"), self._counts):
+                running += n
+                buckets[bound] = running
+            return {"count": running, "sum_ms": round(self._sum_ms, 3), "buckets": buckets}
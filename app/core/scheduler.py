@@ -0,0 +1,24 @@
+"""Periodic background tasks of the API process."""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Callable
+
+log = logging.getLogger(__name__)
+
+
+def start_periodic(name: str, interval_s: float, task: Callable[[], None]) -> threading.Event:
+    """Run `task` every `interval_s` seconds on a daemon thread until the returned event is set.
+    A failing run is logged and the next one still happens."""
+    stop = threading.Event()
+
+    def loop() -> None:
+        while not stop.wait(interval_s):
+            try:
+                task()
+            except Exception:
+                log.exception("%s failed", name)
+
+    threading.Thread(target=loop, name=name, daemon=True).start()
+    return stop
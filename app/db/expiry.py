@@ -0,0 +1,96 @@
+"""Records that expire: a per-process LRU in front of their table, and batched purges of it."""
+from __future__ import annotations
+
+import datetime as dt
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import InstrumentedAttribute, Session
+
+from app.db.models import utcnow
+
+
+def aware(value: dt.datetime) -> dt.datetime:
+    # SQLite hands back naive datetimes; they were written as UTC
+    return value.replace(tzinfo=dt.UTC) if value.tzinfo is None else value
+
+
+def process_key(session: Session, *key: Any) -> tuple:
+    """Key for a per-process cache: the process may talk to more than one database (tests do)."""
+    return (str(session.get_bind().url), *key)
+
+
+class TTLCache:
+    """Size-bounded LRU whose entries carry their own expiry and are dropped
+    when read after it. Values must not change once put."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[tuple, tuple[Any, dt.datetime]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def get(self, key: tuple) -> Any | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] <= utcnow():
+                del self._data[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: tuple, value: Any, expires: dt.datetime) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "evictions": self.evictions,
+                "expired": self.expired,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.evictions = self.expired = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def purge_before(
+    session: Session, id_column: InstrumentedAttribute, created_column: InstrumentedAttribute,
+    cutoff: dt.datetime, batch_size: int = 1000,
+) -> int:
+    """Delete rows created before `cutoff` in batches of `batch_size`, committing each.
+
+    Small batches keep every write transaction (and SQLite's database lock)
+    short, so imports are not blocked behind a large purge.
+    """
+    purged = 0
+    while True:
+        ids = list(session.scalars(select(id_column).where(created_column < cutoff).limit(batch_size)))
+        if not ids:
+            session.commit()
+            return purged
+        session.execute(delete(id_column.class_).where(id_column.in_(ids)))
+        session.commit()
+        purged += len(ids)
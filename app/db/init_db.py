@@ -1,6 +1,73 @@
 from __future__ import annotations
+from sqlalchemy import Engine, Index, func, inspect, select, text
+from sqlalchemy.engine import Connection
+
 from app.db.models import Base
 from app.db.session import engine
 
+# Columns added to tables an existing database already has; create_all only creates
+# missing tables. (table, column, expression that backfills existing rows of a NOT NULL column)
+ADDED_COLUMNS = (
+    ("invoices", "updated_at", "created_at"),
+    ("bank_transactions", "updated_at", "created_at"),
+    ("matches", "job_id", None),
+    ("reconcile_jobs", "heartbeat_at", None),
+)
+
+def upgrade(bind: Engine) -> list[str]:
+    """Bring a database created by an older version up to `Base.metadata`: add any of
+    ADDED_COLUMNS it lacks, then every missing index. Returns what was added, as
+    `table.column` and index names."""
+    added = []
+    with bind.begin() as conn:
+        insp = inspect(conn)
+        tables = set(insp.get_table_names())
+        for table_name, column_name, backfill in ADDED_COLUMNS:
+            if table_name not in tables or column_name in {c["name"] for c in insp.get_columns(table_name)}:
+                continue
+            column = Base.metadata.tables[table_name].c[column_name]
+            ddl = f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column.type.compile(dialect=bind.dialect)}"
+            for fk in column.foreign_keys:
+                ddl += f" REFERENCES {fk.column.table.name} ({fk.column.name})"
+            if backfill:
+                # a constant default satisfies NOT NULL until the rows are backfilled
+                ddl += " NOT NULL DEFAULT '1970-01-01 00:00:00'"
+            conn.execute(text(ddl))
+            if backfill:
+                conn.execute(text(f"UPDATE {table_name} SET {column_name} = {backfill}"))
+            added.append(f"{table_name}.{column_name}")
+
+    # one transaction per index: a unique index that cannot be built leaves the others in place
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        with bind.begin() as conn:
+            existing = {i["name"] for i in inspect(conn).get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda i: i.name):
+                if index.name in existing:
+                    continue
+                if index.unique:
+                    _check_unique(conn, index)
+                index.create(conn)
+                added.append(index.name)
+    return added
+
+def _check_unique(conn: Connection, index: Index) -> None:
+    """Refuse, with the reason, to build a unique index over rows that already break it."""
+    columns = list(index.columns)
+    where = index.kwargs.get(f"{conn.dialect.name}_where")
+    groups = select(*columns).group_by(*columns).having(func.count() > 1)
+    if where is not None:
+        groups = groups.where(where)
+    duplicated = conn.scalar(select(func.count()).select_from(groups.subquery()))
+    if duplicated:
+        names = ", ".join(c.name for c in columns)
+        raise RuntimeError(
+            f"Cannot create unique index {index.name}: {duplicated} ({names}) value(s) occur more than once "
+            f"in {index.table.name}{f' where {where}' if where is not None else ''}. "
+            "Resolve the duplicate rows, then start the application again."
+        )
+
 def init_db() -> None:
     Base.metadata.create_all(bind=engine)
+    upgrade(engine)
@@ -2,7 +2,7 @@ from __future__ import annotations
 import datetime as dt
 from sqlalchemy import (
     String, DateTime, Date, ForeignKey, Integer, Numeric, Text, Float,
-    UniqueConstraint
+    UniqueConstraint, Index, text
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 import datetime as dt
@@ -29,9 +29,19 @@ class Invoice(Base):
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
     status: Mapped[str] = mapped_column(String(20), default="open", nullable=False)  # open|matched
     created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=utcnow, nullable=False)
+    updated_at: Mapped[dt.datetime] = mapped_column(DateTime, default=utcnow, onupdate=utcnow, nullable=False)
+
+    __table_args__ = (
+        # keyset pagination in id order, optionally filtered by status
+        Index("ix_invoice_tenant_status_id", "tenant_id", "status", "id"),
+    )
 
     tenant = relationship("Tenant")
 
+EXTERNAL_ID_PRESENT = text("external_id IS NOT NULL AND external_id <> ''")
+MATCH_CONFIRMED = text("status = 'confirmed'")
+JOB_RUNNING = text("status = 'running'")
+
 class BankTransaction(Base):
     __tablename__ = "bank_transactions"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -42,6 +52,19 @@ class BankTransaction(Base):
     currency: Mapped[str] = mapped_column(String(3), default="USD", nullable=False)
     description: Mapped[str] = mapped_column(Text, nullable=False)
     created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=utcnow, nullable=False)
+    updated_at: Mapped[dt.datetime] = mapped_column(DateTime, default=utcnow, onupdate=utcnow, nullable=False)
+
+    __table_args__ = (
+        # import dedup key; empty external ids are treated as absent
+        Index(
+            "uq_tx_tenant_external_id", "tenant_id", "external_id",
+            unique=True,
+            sqlite_where=EXTERNAL_ID_PRESENT,
+            postgresql_where=EXTERNAL_ID_PRESENT,
+        ),
+        # keyset pagination, newest first
+        Index("ix_tx_tenant_posted_id", "tenant_id", "posted_at", "id"),
+    )
 
     tenant = relationship("Tenant")
 
@@ -54,10 +77,25 @@ class Match(Base):
     score: Mapped[float] = mapped_column(Float, nullable=False)
     status: Mapped[str] = mapped_column(String(20), nullable=False)  # proposed|confirmed
     reasons: Mapped[str] = mapped_column(Text, nullable=False, default="[]")  # json list
+    # background reconcile job that proposed it; NULL for synchronous runs
+    job_id: Mapped[int | None] = mapped_column(ForeignKey("reconcile_jobs.id"), index=True, nullable=True)
     created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=utcnow, nullable=False)
 
     __table_args__ = (
         UniqueConstraint("tenant_id", "invoice_id", "bank_transaction_id", name="uq_match_pair"),
+        # at most one confirmed match per invoice and per bank transaction, enforced by the database
+        Index(
+            "uq_match_confirmed_invoice", "tenant_id", "invoice_id",
+            unique=True,
+            sqlite_where=MATCH_CONFIRMED,
+            postgresql_where=MATCH_CONFIRMED,
+        ),
+        Index(
+            "uq_match_confirmed_tx", "tenant_id", "bank_transaction_id",
+            unique=True,
+            sqlite_where=MATCH_CONFIRMED,
+            postgresql_where=MATCH_CONFIRMED,
+        ),
     )
 
     invoice = relationship("Invoice")
@@ -70,8 +108,60 @@ class IdempotencyKey(Base):
     key: Mapped[str] = mapped_column(String(200), nullable=False)
     request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
     response_json: Mapped[str] = mapped_column(Text, nullable=False)
-    created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=utcnow, nullable=False)
+    created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=utcnow, index=True, nullable=False)  # TTL purge
 
     __table_args__ = (
         UniqueConstraint("tenant_id", "key", name="uq_idem_key"),
     )
+
+class ReconcileWatermark(Base):
+    __tablename__ = "reconcile_watermarks"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    tenant_id: Mapped[int] = mapped_column(ForeignKey("tenants.id"), unique=True, nullable=False)
+    max_invoice_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    max_transaction_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # parameters the stored proposals were ranked with; a change forces a full run
+    window_days: Mapped[int] = mapped_column(Integer, nullable=False)
+    max_candidates_per_invoice: Mapped[int] = mapped_column(Integer, nullable=False)
+    reconciled_at: Mapped[dt.datetime] = mapped_column(DateTime, nullable=False)
+
+class ReconcileJob(Base):
+    __tablename__ = "reconcile_jobs"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    tenant_id: Mapped[int] = mapped_column(ForeignKey("tenants.id"), index=True, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), index=True, nullable=False, default="queued")  # queued|running|succeeded|failed
+    params: Mapped[str] = mapped_column(Text, nullable=False, default="{}")  # json ReconcileRequest
+    invoices_total: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    invoices_done: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    matches_created: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=utcnow, nullable=False)
+    started_at: Mapped[dt.datetime | None] = mapped_column(DateTime, nullable=True)
+    # bumped with every progress commit; a stale one means the worker died
+    heartbeat_at: Mapped[dt.datetime | None] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[dt.datetime | None] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # one running job per tenant: runs replace the tenant's proposals chunk by chunk and must not interleave
+        Index(
+            "uq_reconcile_job_running_tenant", "tenant_id",
+            unique=True,
+            sqlite_where=JOB_RUNNING,
+            postgresql_where=JOB_RUNNING,
+        ),
+    )
+
+class ExplanationCacheEntry(Base):
+    __tablename__ = "explanation_cache"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    tenant_id: Mapped[int] = mapped_column(ForeignKey("tenants.id"), nullable=False)
+    # no FKs: entries must not block deleting an invoice or transaction; they expire instead
+    invoice_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    bank_transaction_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    context_hash: Mapped[str] = mapped_column(String(64), nullable=False)  # sha256 of the ExplainContext
+    explanation: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=utcnow, index=True, nullable=False)  # TTL purge
+
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "invoice_id", "bank_transaction_id", "context_hash", name="uq_explanation_key"),
+    )
@@ -1,8 +1,16 @@
 from __future__ import annotations
+import asyncio
+from functools import lru_cache
+from typing import AsyncIterator, Callable, TypeVar
+
+from fastapi import Depends
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from app.core.config import settings
 
+T = TypeVar("T")
+
 # SQLite needs check_same_thread=False when used from FastAPI threads
 connect_args = {"check_same_thread": False} if settings.database_url.startswith("sqlite") else {}
 
@@ -15,3 +23,100 @@ def get_session() -> Session:
         yield db
     finally:
         db.close()
+
+# sync driver -> asyncio driver for DB_ASYNC
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+def async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    if scheme not in ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver known for {scheme!r}")
+    return ASYNC_DRIVERS[scheme] + sep + rest
+
+@lru_cache(maxsize=1)
+def async_session_factory():
+    """Built on first use, so aiosqlite/asyncpg are only needed with DB_ASYNC=1."""
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(async_url(settings.database_url), future=True, echo=False)
+    # objects are read after the commit, outside the greenlet that could refresh them
+    return async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+class Db:
+    """The request's database, for async handlers.
+
+    `run(fn, *args)` calls `fn(session, *args)` with a sync Session, so the
+    services stay synchronous. `offload` is for CPU-heavy work (scoring,
+    parsing large uploads) that must not run on the event loop.
+
+    A Session is not safe for concurrent use, and GraphQL resolves sibling
+    fields concurrently over one Db, so calls on the request session are
+    serialized by a per-request lock.
+    """
+
+    session: Session  # only use it inside `run`
+    sync_factory: sessionmaker  # for background work outside the request
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        raise NotImplementedError
+
+    async def offload(self, fn: Callable[..., T], *args) -> T:
+        raise NotImplementedError
+
+
+class ThreadedDb(Db):
+    """Sync path: the session is used from a threadpool thread, as sync handlers do."""
+
+    def __init__(self, session: Session):
+        self.session = session
+        self._lock = asyncio.Lock()
+
+    @property
+    def sync_factory(self) -> sessionmaker:
+        # only needed to submit background jobs; a separate factory only when get_session is overridden
+        bind = self.session.get_bind()
+        return SessionLocal if bind is engine else sessionmaker(bind=bind, autoflush=False)
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        async with self._lock:
+            return await run_in_threadpool(fn, self.session, *args)
+
+    async def offload(self, fn: Callable[..., T], *args) -> T:
+        return await self.run(fn, *args)
+
+
+class AsyncDb(Db):
+    """Async path: `AsyncSession.run_sync`, so waiting on the database
+    suspends the request instead of holding a thread."""
+
+    def __init__(self, session, sync_factory: sessionmaker):
+        self.async_session = session
+        self.session = session.sync_session
+        self.sync_factory = sync_factory
+        self._lock = asyncio.Lock()
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        async with self._lock:
+            return await self.async_session.run_sync(fn, *args)
+
+    async def offload(self, fn: Callable[..., T], *args) -> T:
+        def work() -> T:
+            with self.sync_factory() as session:
+                return fn(session, *args)
+
+        return await run_in_threadpool(work)
+
+
+async def get_db(session: Session = Depends(get_session)) -> AsyncIterator[Db]:
+    # the sync Session does not connect until used, so it costs nothing on the async path
+    if not settings.db_async:
+        yield ThreadedDb(session)
+        return
+    async with async_session_factory()() as async_session:
+        yield AsyncDb(async_session, SessionLocal)
@@ -1,4 +1,5 @@
 from __future__ import annotations
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi import Request
 from fastapi.responses import JSONResponse
@@ -8,11 +9,37 @@ from app.core.errors import NotFoundError, ConflictError
 from app.api.rest import router as rest_router
 from app.api.graphql import build_graphql_router
 from app.db.init_db import init_db
+from app.db.session import SessionLocal
+from app.core.config import settings
 from app.core.exception_handlers import register_exception_handlers
+from app.core.scheduler import start_periodic
+from app.modules.transactions import purge as idempotency_purge
+from app.modules.reconciliation import ai, worker
+from app.modules.reconciliation import purge as explanation_purge
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    worker.recover(SessionLocal)
+    stops = []
+    if settings.idempotency_purge_interval_s > 0:
+        stops.append(start_periodic(
+            "idempotency-purge", settings.idempotency_purge_interval_s,
+            lambda: idempotency_purge.purge(SessionLocal),
+        ))
+    if settings.explain_cache_purge_interval_s > 0:
+        stops.append(start_periodic(
+            "explanation-purge", settings.explain_cache_purge_interval_s,
+            lambda: explanation_purge.purge(SessionLocal),
+        ))
+    yield
+    for stop in stops:
+        stop.set()
+    await ai.close_default()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="Multi-Tenant Reconciliation API (MVP)")
+    app = FastAPI(title="Multi-Tenant Reconciliation API (MVP)", lifespan=lifespan)
 
     register_exception_handlers(app)
 
@@ -0,0 +1,106 @@
+from __future__ import annotations
+import datetime as dt
+import logging
+from typing import Callable, Iterator
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.session import get_session
+from app.core.errors import BadRequestError
+from app.modules.exports.formats import EXPORT_FORMATS, MEDIA_TYPES, encode
+from app.modules.exports.service import (
+    ExportService, INVOICE_FIELDS, MATCH_FIELDS, TRANSACTION_FIELDS, check_filters,
+)
+
+log = logging.getLogger(__name__)
+
+router = APIRouter(tags=["exports"])
+
+FORMAT_QUERY = Query(default="ndjson", description="ndjson | csv")
+GZIP_QUERY = Query(default=False, description="gzip the body (Content-Encoding: gzip)")
+
+
+def _stream(
+    session: Session,
+    name: str,
+    fmt: str,
+    gzip: bool,
+    fields: tuple[str, ...],
+    rows: Callable[[ExportService], Iterator[dict]],
+) -> StreamingResponse:
+    if fmt not in EXPORT_FORMATS:
+        raise BadRequestError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    # the request session is closed once the endpoint returns, before the body
+    # is sent, so the stream reads through its own session on the same engine
+    factory = sessionmaker(bind=session.get_bind(), autoflush=False)
+
+    def body() -> Iterator[bytes]:
+        with factory() as export_session:
+            try:
+                yield from encode(fmt, rows(ExportService(export_session)), fields, gzip)
+            except Exception:
+                # headers are already sent; the client sees a truncated body
+                log.exception("%s export failed mid-stream", name)
+                raise
+
+    headers = {"Content-Disposition": f'attachment; filename="{name}.{fmt}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body(), media_type=MEDIA_TYPES[fmt], headers=headers)
+
+
+@router.get("/tenants/{tenant_id}/exports/invoices")
+def export_invoices(
+    tenant_id: int,
+    format: str = FORMAT_QUERY,
+    gzip: bool = GZIP_QUERY,
+    status: str | None = None,
+    date_from: dt.date | None = None,
+    date_to: dt.date | None = None,
+    amount_min: float | None = None,
+    amount_max: float | None = None,
+    session: Session = Depends(get_session),
+) -> StreamingResponse:
+    check_filters(date_from, date_to, amount_min, amount_max)
+    return _stream(
+        session, f"invoices-{tenant_id}", format, gzip, INVOICE_FIELDS,
+        lambda s: s.invoices(tenant_id, status, date_from, date_to, amount_min, amount_max),
+    )
+
+
+@router.get("/tenants/{tenant_id}/exports/bank-transactions")
+def export_bank_transactions(
+    tenant_id: int,
+    format: str = FORMAT_QUERY,
+    gzip: bool = GZIP_QUERY,
+    date_from: dt.date | None = None,
+    date_to: dt.date | None = None,
+    amount_min: float | None = None,
+    amount_max: float | None = None,
+    session: Session = Depends(get_session),
+) -> StreamingResponse:
+    check_filters(date_from, date_to, amount_min, amount_max)
+    return _stream(
+        session, f"bank-transactions-{tenant_id}", format, gzip, TRANSACTION_FIELDS,
+        lambda s: s.bank_transactions(tenant_id, date_from, date_to, amount_min, amount_max),
+    )
+
+
+@router.get("/tenants/{tenant_id}/exports/matches")
+def export_matches(
+    tenant_id: int,
+    format: str = FORMAT_QUERY,
+    gzip: bool = GZIP_QUERY,
+    status: str | None = None,
+    date_from: dt.date | None = None,
+    date_to: dt.date | None = None,
+    amount_min: float | None = None,
+    amount_max: float | None = None,
+    session: Session = Depends(get_session),
+) -> StreamingResponse:
+    check_filters(date_from, date_to, amount_min, amount_max)
+    return _stream(
+        session, f"matches-{tenant_id}", format, gzip, MATCH_FIELDS,
+        lambda s: s.matches(tenant_id, status, date_from, date_to, amount_min, amount_max),
+    )
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import zlib
+from typing import Iterable, Iterator
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# rows are written into buffers of about this size before being sent
+FLUSH_BYTES = 64 * 1024
+
+
+def ndjson_lines(rows: Iterable[dict]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row, separators=(",", ":")) + "\n"
+
+
+def csv_lines(rows: Iterable[dict], fields: tuple[str, ...]) -> Iterator[str]:
+    """Header first, then one line per row; list values are written as JSON."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    def line(values) -> str:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerow(values)
+        return buf.getvalue()
+
+    yield line(fields)
+    for row in rows:
+        yield line([json.dumps(v) if isinstance(v, list) else v for v in (row[f] for f in fields)])
+
+
+def buffered(lines: Iterable[str], flush_bytes: int = FLUSH_BYTES) -> Iterator[bytes]:
+    """Join lines into ~`flush_bytes` chunks. The first line goes out on its own
+    so the client gets a first byte before the rest of the query has run."""
+    parts: list[str] = []
+    size = 0
+    first = True
+    for text in lines:
+        parts.append(text)
+        size += len(text)
+        if first or size >= flush_bytes:
+            yield "".join(parts).encode("utf-8")
+            parts, size, first = [], 0, False
+    if parts:
+        yield "".join(parts).encode("utf-8")
+
+
+def gzipped(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Incremental gzip stream (`Content-Encoding: gzip`)."""
+    z = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        # sync flush keeps each chunk decodable as it arrives, at a small ratio cost
+        yield z.compress(chunk) + z.flush(zlib.Z_SYNC_FLUSH)
+    yield z.flush()
+
+
+def encode(fmt: str, rows: Iterable[dict], fields: tuple[str, ...], gzip: bool = False) -> Iterator[bytes]:
+    lines = csv_lines(rows, fields) if fmt == "csv" else ndjson_lines(rows)
+    chunks = buffered(lines)
+    return gzipped(chunks) if gzip else chunks
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import datetime as dt
+import json
+from typing import Iterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.errors import BadRequestError
+from app.db.models import BankTransaction, Invoice, Match
+
+INVOICE_FIELDS = ("id", "tenant_id", "amount", "currency", "invoice_date", "description", "status", "created_at")
+TRANSACTION_FIELDS = ("id", "tenant_id", "external_id", "posted_at", "amount", "currency", "description")
+MATCH_FIELDS = (
+    "id", "tenant_id", "invoice_id", "bank_transaction_id", "score", "status", "reasons", "created_at",
+    "invoice_amount", "invoice_date", "transaction_amount", "posted_at",
+)
+
+
+def check_filters(date_from: dt.date | None = None, date_to: dt.date | None = None,
+                  amount_min: float | None = None, amount_max: float | None = None) -> None:
+    if date_from and date_to and date_from > date_to:
+        raise BadRequestError("date_from must not be after date_to")
+    if amount_min is not None and amount_max is not None and amount_min > amount_max:
+        raise BadRequestError("amount_min must not be above amount_max")
+
+
+def _iso(value: dt.date | None) -> str | None:
+    return value.isoformat() if value is not None else None
+
+
+def _day_bounds(column, date_from: dt.date | None, date_to: dt.date | None) -> list:
+    # inclusive calendar days on a DateTime column
+    conds = []
+    if date_from:
+        conds.append(column >= dt.datetime.combine(date_from, dt.time.min))
+    if date_to:
+        conds.append(column < dt.datetime.combine(date_to + dt.timedelta(days=1), dt.time.min))
+    return conds
+
+
+def _amount_bounds(column, amount_min: float | None, amount_max: float | None) -> list:
+    conds = []
+    if amount_min is not None:
+        conds.append(column >= amount_min)
+    if amount_max is not None:
+        conds.append(column <= amount_max)
+    return conds
+
+
+class ExportService:
+    """Tenant exports as row iterators for streaming responses.
+
+    Queries select plain columns (no ORM identities) and are fetched
+    `batch_size` rows at a time from a server-side cursor, so memory does
+    not depend on how many rows a tenant has. Rows come out in id order.
+    """
+
+    def __init__(self, session: Session, batch_size: int = 1000):
+        self.session = session
+        self.batch_size = batch_size
+
+    def _rows(self, stmt):
+        return self.session.execute(stmt.execution_options(yield_per=self.batch_size))
+
+    def invoices(self, tenant_id: int, status: str | None = None,
+                 date_from: dt.date | None = None, date_to: dt.date | None = None,
+                 amount_min: float | None = None, amount_max: float | None = None) -> Iterator[dict]:
+        """Filters: `status`, `invoice_date` in [date_from, date_to], `amount` in [amount_min, amount_max]."""
+        stmt = select(*(getattr(Invoice, f) for f in INVOICE_FIELDS)).where(Invoice.tenant_id == tenant_id)
+        if status:
+            stmt = stmt.where(Invoice.status == status)
+        if date_from:
+            stmt = stmt.where(Invoice.invoice_date >= date_from)
+        if date_to:
+            stmt = stmt.where(Invoice.invoice_date <= date_to)
+        stmt = stmt.where(*_amount_bounds(Invoice.amount, amount_min, amount_max)).order_by(Invoice.id)
+        for r in self._rows(stmt):
+            yield {
+                "id": r.id,
+                "tenant_id": r.tenant_id,
+                "amount": float(r.amount),
+                "currency": r.currency,
+                "invoice_date": _iso(r.invoice_date),
+                "description": r.description,
+                "status": r.status,
+                "created_at": _iso(r.created_at),
+            }
+
+    def bank_transactions(self, tenant_id: int,
+                          date_from: dt.date | None = None, date_to: dt.date | None = None,
+                          amount_min: float | None = None, amount_max: float | None = None) -> Iterator[dict]:
+        """Filters: `posted_at` on days [date_from, date_to], `amount` in [amount_min, amount_max]."""
+        stmt = (
+            select(*(getattr(BankTransaction, f) for f in TRANSACTION_FIELDS))
+            .where(BankTransaction.tenant_id == tenant_id)
+            .where(*_day_bounds(BankTransaction.posted_at, date_from, date_to))
+            .where(*_amount_bounds(BankTransaction.amount, amount_min, amount_max))
+            .order_by(BankTransaction.id)
+        )
+        for r in self._rows(stmt):
+            yield {
+                "id": r.id,
+                "tenant_id": r.tenant_id,
+                "external_id": r.external_id,
+                "posted_at": _iso(r.posted_at),
+                "amount": float(r.amount),
+                "currency": r.currency,
+                "description": r.description,
+            }
+
+    def matches(self, tenant_id: int, status: str | None = None,
+                date_from: dt.date | None = None, date_to: dt.date | None = None,
+                amount_min: float | None = None, amount_max: float | None = None) -> Iterator[dict]:
+        """Matches with both sides' amount and date. Filters: `status`, the
+        transaction's `posted_at` on days [date_from, date_to] and the
+        invoice `amount` in [amount_min, amount_max]."""
+        stmt = (
+            select(
+                Match.id, Match.tenant_id, Match.invoice_id, Match.bank_transaction_id,
+                Match.score, Match.status, Match.reasons, Match.created_at,
+                Invoice.amount.label("invoice_amount"), Invoice.invoice_date,
+                BankTransaction.amount.label("transaction_amount"), BankTransaction.posted_at,
+            )
+            .join(Invoice, Invoice.id == Match.invoice_id)
+            .join(BankTransaction, BankTransaction.id == Match.bank_transaction_id)
+            .where(Match.tenant_id == tenant_id)
+            .where(*_day_bounds(BankTransaction.posted_at, date_from, date_to))
+            .where(*_amount_bounds(Invoice.amount, amount_min, amount_max))
+            .order_by(Match.id)
+        )
+        if status:
+            stmt = stmt.where(Match.status == status)
+        for r in self._rows(stmt):
+            yield {
+                "id": r.id,
+                "tenant_id": r.tenant_id,
+                "invoice_id": r.invoice_id,
+                "bank_transaction_id": r.bank_transaction_id,
+                "score": float(r.score),
+                "status": r.status,
+                "reasons": json.loads(r.reasons),
+                "created_at": _iso(r.created_at),
+                "invoice_amount": float(r.invoice_amount),
+                "invoice_date": _iso(r.invoice_date),
+                "transaction_amount": float(r.transaction_amount),
+                "posted_at": _iso(r.posted_at),
+            }
@@ -1,33 +1,100 @@
 from __future__ import annotations
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+import hashlib
+import json
+import tempfile
+from fastapi import APIRouter, Depends, Header, Request, Response
 
-from app.db.session import get_session
-from app.modules.invoices.schemas import InvoiceCreate, InvoiceOut
-from app.modules.invoices.service import InvoiceService
+from app.db.session import Db, get_db
+from app.modules.invoices.schemas import InvoiceCreate, InvoiceOut, InvoiceBulkResult
+from app.modules.invoices.service import InvoiceService, numbered
+from app.modules.transactions.api import SPOOL_MAX_MEMORY
+from app.modules.transactions.idempotency import canonical_hash
+from app.modules.transactions.parsers import parse_ndjson
+from app.core.config import settings
+from app.core.errors import BadRequestError
+from app.core.pagination import NEXT_CURSOR_HEADER
 
 router = APIRouter(tags=["invoices"])
 
 @router.post("/tenants/{tenant_id}/invoices", response_model=InvoiceOut)
-def create_invoice(tenant_id: int, payload: InvoiceCreate, session: Session = Depends(get_session)) -> InvoiceOut:
-    return InvoiceService(session).create(tenant_id, **payload.model_dump())
+async def create_invoice(tenant_id: int, payload: InvoiceCreate, db: Db = Depends(get_db)) -> InvoiceOut:
+    return await db.run(
+        lambda s: InvoiceOut.model_validate(InvoiceService(s).create(tenant_id, **payload.model_dump()))
+    )
+
+@router.post("/tenants/{tenant_id}/invoices/bulk", response_model=InvoiceBulkResult)
+async def create_invoices_bulk(
+    tenant_id: int,
+    request: Request,
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    db: Db = Depends(get_db),
+) -> InvoiceBulkResult:
+    """Body: a JSON array of invoices, or NDJSON (`Content-Type: application/x-ndjson`),
+    which is spooled and read incrementally. Validation and inserts run off the event loop."""
+    if request.headers.get("content-type", "").split(";")[0].strip() == "application/x-ndjson":
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as spool:
+            digest = hashlib.sha256(b"ndjson:")
+            async for chunk in request.stream():
+                digest.update(chunk)
+                spool.write(chunk)
+
+            def open_items():
+                spool.seek(0)
+                return parse_ndjson(spool)
+
+            result = await db.offload(
+                lambda s: InvoiceService(s).create_bulk(
+                    tenant_id, idempotency_key, digest.hexdigest(), open_items, settings.import_chunk_size
+                )
+            )
+        return InvoiceBulkResult(**result)
+
+    try:
+        items = json.loads(await request.body())
+    except ValueError:
+        raise BadRequestError("Body must be a JSON array of invoices")
+    if not isinstance(items, list):
+        raise BadRequestError("Body must be a JSON array of invoices")
+    result = await db.offload(
+        lambda s: InvoiceService(s).create_bulk(
+            tenant_id, idempotency_key, canonical_hash(items), lambda: numbered(items), settings.import_chunk_size
+        )
+    )
+    return InvoiceBulkResult(**result)
 
 @router.get("/tenants/{tenant_id}/invoices", response_model=list[InvoiceOut])
-def list_invoices(
+async def list_invoices(
     tenant_id: int,
+    response: Response,
     status: str | None = None,
     amount_min: float | None = None,
     amount_max: float | None = None,
-    session: Session = Depends(get_session),
+    limit: int | None = None,
+    cursor: str | None = None,
+    db: Db = Depends(get_db),
 ) -> list[InvoiceOut]:
-    return InvoiceService(session).list(
-        tenant_id=tenant_id,
-        status=status,
-        amount_min=amount_min,
-        amount_max=amount_max,
-    )
+    # no limit and no cursor: the full list, as before pagination; a cursor alone pages by 100
+    if limit is None and cursor is not None:
+        limit = 100
+
+    def load(session):
+        page = InvoiceService(session).list(
+            tenant_id=tenant_id,
+            status=status,
+            amount_min=amount_min,
+            amount_max=amount_max,
+            limit=limit,
+            cursor=cursor,
+        )
+        return [InvoiceOut.model_validate(i) for i in page.items], page.next_cursor
+
+    items, next_cursor = await db.run(load)
+    # next page: same query with ?cursor=<X-Next-Cursor>; header absent on the last page
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return items
 
 @router.delete("/tenants/{tenant_id}/invoices/{invoice_id}")
-def delete_invoice(tenant_id: int, invoice_id: int, session: Session = Depends(get_session)) -> dict:
-    InvoiceService(session).delete(tenant_id, invoice_id)
+async def delete_invoice(tenant_id: int, invoice_id: int, db: Db = Depends(get_db)) -> dict:
+    await db.run(lambda s: InvoiceService(s).delete(tenant_id, invoice_id))
     return {"deleted": True}
@@ -3,7 +3,10 @@ import datetime as dt
 import strawberry
 from sqlalchemy.orm import Session
 
-from app.modules.invoices.service import InvoiceService
+from app.core.config import settings
+from app.db.session import Db
+from app.modules.invoices.service import InvoiceService, numbered
+from app.modules.transactions.idempotency import canonical_hash
 
 @strawberry.type
 class InvoiceType:
@@ -15,6 +18,23 @@ class InvoiceType:
     description: str | None
     status: str
 
+@strawberry.type
+class InvoicePage:
+    items: list[InvoiceType]
+    next_cursor: str | None
+
+
+def _invoice_type(i) -> InvoiceType:
+    return InvoiceType(
+        id=i.id,
+        tenant_id=i.tenant_id,
+        amount=float(i.amount),
+        currency=i.currency,
+        invoice_date=i.invoice_date.isoformat() if i.invoice_date else None,
+        description=i.description,
+        status=i.status,
+    )
+
 @strawberry.input
 class CreateInvoiceInput:
     amount: float
@@ -22,10 +42,15 @@ class CreateInvoiceInput:
     invoice_date: str | None = None
     description: str | None = None
 
+@strawberry.type
+class InvoiceBulkResultType:
+    created: int
+    invoice_ids: list[int]
+
 @strawberry.type
 class InvoicesQuery:
     @strawberry.field
-    def invoices(
+    async def invoices(
         self,
         info,
         tenant_id: int,
@@ -33,40 +58,73 @@ class InvoicesQuery:
         amount_min: float | None = None,
         amount_max: float | None = None,
     ) -> list[InvoiceType]:
-        session: Session = info.context["session"]
-        items = InvoiceService(session).list(tenant_id, status=status, amount_min=amount_min, amount_max=amount_max)
-        return [
-            InvoiceType(
-                id=i.id,
-                tenant_id=i.tenant_id,
-                amount=float(i.amount),
-                currency=i.currency,
-                invoice_date=i.invoice_date.isoformat() if i.invoice_date else None,
-                description=i.description,
-                status=i.status,
+        db: Db = info.context["db"]
+
+        def load(session: Session) -> list[InvoiceType]:
+            # unpaginated for existing clients; see invoices_page
+            page = InvoiceService(session).list(
+                tenant_id, status=status, amount_min=amount_min, amount_max=amount_max, limit=None
             )
-            for i in items
-        ]
+            return [_invoice_type(i) for i in page.items]
+
+        return await db.run(load)
+
+    @strawberry.field
+    async def invoices_page(
+        self,
+        info,
+        tenant_id: int,
+        status: str | None = None,
+        amount_min: float | None = None,
+        amount_max: float | None = None,
+        limit: int = 100,
+        cursor: str | None = None,
+    ) -> InvoicePage:
+        db: Db = info.context["db"]
+
+        def load(session: Session) -> InvoicePage:
+            page = InvoiceService(session).list(
+                tenant_id, status=status, amount_min=amount_min, amount_max=amount_max, limit=limit, cursor=cursor
+            )
+            return InvoicePage(items=[_invoice_type(i) for i in page.items], next_cursor=page.next_cursor)
+
+        return await db.run(load)
 
 @strawberry.type
 class InvoicesMutation:
     @strawberry.mutation
-    def create_invoice(self, info, tenant_id: int, input: CreateInvoiceInput) -> InvoiceType:
-        session: Session = info.context["session"]
+    async def create_invoice(self, info, tenant_id: int, input: CreateInvoiceInput) -> InvoiceType:
+        db: Db = info.context["db"]
         inv_date = dt.date.fromisoformat(input.invoice_date) if input.invoice_date else None
-        inv = InvoiceService(session).create(tenant_id, amount=input.amount, currency=input.currency, invoice_date=inv_date, description=input.description)
-        return InvoiceType(
-            id=inv.id,
-            tenant_id=inv.tenant_id,
-            amount=float(inv.amount),
-            currency=inv.currency,
-            invoice_date=inv.invoice_date.isoformat() if inv.invoice_date else None,
-            description=inv.description,
-            status=inv.status,
+
+        def create(session: Session) -> InvoiceType:
+            inv = InvoiceService(session).create(tenant_id, amount=input.amount, currency=input.currency, invoice_date=inv_date, description=input.description)
+            return _invoice_type(inv)
+
+        return await db.run(create)
+
+    @strawberry.mutation
+    async def create_invoices_bulk(
+        self,
+        info,
+        tenant_id: int,
+        input: list[CreateInvoiceInput],
+        idempotency_key: str | None = None,
+    ) -> InvoiceBulkResultType:
+        db: Db = info.context["db"]
+        items = [
+            {"amount": it.amount, "currency": it.currency, "invoice_date": it.invoice_date, "description": it.description}
+            for it in input
+        ]
+        result = await db.offload(
+            lambda s: InvoiceService(s).create_bulk(
+                tenant_id, idempotency_key, canonical_hash(items), lambda: numbered(items), settings.import_chunk_size
+            )
         )
+        return InvoiceBulkResultType(created=result["created"], invoice_ids=result["invoice_ids"])
 
     @strawberry.mutation
-    def delete_invoice(self, info, tenant_id: int, invoice_id: int) -> bool:
-        session: Session = info.context["session"]
-        InvoiceService(session).delete(tenant_id, invoice_id)
+    async def delete_invoice(self, info, tenant_id: int, invoice_id: int) -> bool:
+        db: Db = info.context["db"]
+        await db.run(lambda s: InvoiceService(s).delete(tenant_id, invoice_id))
         return True
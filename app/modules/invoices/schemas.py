@@ -19,3 +19,7 @@ class InvoiceOut(BaseModel):
     description: str | None
     status: str
     created_at: dt.datetime
+
+class InvoiceBulkResult(BaseModel):
+    created: int
+    invoice_ids: list[int]
@@ -1,9 +1,25 @@
 from __future__ import annotations
 import datetime as dt
+from contextlib import closing
+from typing import Callable, Iterator
+from pydantic import ValidationError as PydanticValidationError
 from sqlalchemy.orm import Session
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, insert
 from app.db.models import Invoice
 from app.core.errors import NotFoundError, BadRequestError
+from app.core.pagination import Page, check_limit, decode_cursor, encode_cursor
+from app.modules.invoices.schemas import InvoiceCreate
+from app.modules.transactions import idempotency
+
+# bulk idempotency keys share the import keys' table
+BULK_KEY_PREFIX = "invoices-bulk:"
+
+def numbered(items: list[dict]) -> Iterator[tuple[int, dict]]:
+    """`open_items` rows for an in-memory list (1-based positions)."""
+    yield from enumerate(items, start=1)
+
+def _bulk_result(invoice_ids: list[int]) -> dict:
+    return {"created": len(invoice_ids), "invoice_ids": invoice_ids}
 
 class InvoiceService:
     def __init__(self, session: Session):
@@ -28,8 +44,88 @@ class InvoiceService:
         self.session.refresh(inv)
         return inv
 
+    def create_bulk(
+        self,
+        tenant_id: int,
+        idempotency_key: str | None,
+        req_hash: str,
+        open_items: Callable[[], Iterator[tuple[int, dict]]],
+        chunk_size: int,
+    ) -> dict:
+        """Create invoices from `(position, raw item)` rows, committing one
+        multi-row INSERT per `chunk_size` items. Ids come back in input order.
+
+        `open_items()` re-reads the rows: the first pass validates all of them,
+        so one bad row rejects the request before anything is written. With
+        an idempotency key, each chunk commits together with the key's
+        progress; a retry after a failure resumes behind the last committed
+        chunk, and one after success replays the stored result.
+        """
+        key = BULK_KEY_PREFIX + idempotency_key if idempotency_key else None
+        progress = idempotency.replay(self.session, tenant_id, key, req_hash) if key else None
+        if progress is not None and not progress.get("partial"):
+            return progress
+
+        total = sum(1 for _ in self._validated(open_items()))
+        if not total:
+            raise BadRequestError("Invoice list must not be empty")
+
+        invoice_ids: list[int] = list(progress["invoice_ids"]) if progress else []
+        skip = len(invoice_ids)
+        resumed = progress is not None
+        try:
+            chunk: list[dict] = []
+            for n, item in enumerate(self._validated(open_items())):
+                if n < skip:
+                    continue  # committed by an earlier attempt
+                chunk.append(item)
+                if len(chunk) == chunk_size:
+                    invoice_ids += self._insert(tenant_id, chunk)
+                    chunk = []
+                    if key and len(invoice_ids) < total:
+                        idempotency.store(self.session, tenant_id, key, req_hash, _bulk_result(invoice_ids),
+                                          partial=True, resumed=resumed)
+                        resumed = True
+                    self.session.commit()
+            invoice_ids += self._insert(tenant_id, chunk)
+
+            result = _bulk_result(invoice_ids)
+            remember = lambda: None
+            if key:
+                remember = idempotency.store(self.session, tenant_id, key, req_hash, result, resumed=resumed)
+            self.session.commit()
+            remember()
+            return result
+        except Exception:
+            self.session.rollback()
+            raise
+
+    @staticmethod
+    def _validated(rows: Iterator[tuple[int, dict]]) -> Iterator[dict]:
+        with closing(rows):
+            for pos, raw in rows:
+                try:
+                    item = InvoiceCreate.model_validate(raw)
+                except PydanticValidationError as exc:
+                    err = exc.errors()[0]
+                    field = ".".join(str(p) for p in err["loc"])
+                    raise BadRequestError(f"item {pos}: {field}: {err['msg']}")
+                if item.amount <= 0:
+                    raise BadRequestError(f"item {pos}: Invoice amount must be > 0")
+                yield item.model_dump()
+
+    def _insert(self, tenant_id: int, items: list[dict]) -> list[int]:
+        # one INSERT ... RETURNING per chunk; ids follow VALUES order
+        if not items:
+            return []
+        rows = [{**it, "tenant_id": tenant_id, "status": "open"} for it in items]
+        return sorted(self.session.scalars(insert(Invoice).returning(Invoice.id), rows))
+
     def list(self, tenant_id: int, status: str | None=None,
-             amount_min: float | None=None, amount_max: float | None=None) -> list[Invoice]:
+             amount_min: float | None=None, amount_max: float | None=None,
+             limit: int | None=100, cursor: str | None=None) -> Page[Invoice]:
+        """Invoices in id order, keyset-paginated: `cursor` is the previous
+        page's `next_cursor`. `limit=None` returns everything after the cursor."""
         stmt = select(Invoice).where(Invoice.tenant_id == tenant_id)
         if status:
             stmt = stmt.where(Invoice.status == status)
@@ -37,8 +133,19 @@ class InvoiceService:
             stmt = stmt.where(Invoice.amount >= amount_min)
         if amount_max is not None:
             stmt = stmt.where(Invoice.amount <= amount_max)
+        if cursor:
+            (last_id,) = decode_cursor(cursor, int)
+            stmt = stmt.where(Invoice.id > last_id)
         stmt = stmt.order_by(Invoice.id.asc())
-        return list(self.session.scalars(stmt).all())
+        if limit is None:
+            return Page(list(self.session.scalars(stmt).all()), None)
+
+        check_limit(limit)
+        items = list(self.session.scalars(stmt.limit(limit + 1)).all())
+        if len(items) <= limit:
+            return Page(items, None)
+        items = items[:limit]
+        return Page(items, encode_cursor(items[-1].id))
 
     def get(self, tenant_id: int, invoice_id: int) -> Invoice:
         stmt = select(Invoice).where(Invoice.tenant_id == tenant_id, Invoice.id == invoice_id)
@@ -1,7 +1,15 @@
 from __future__ import annotations
+import asyncio
+import dataclasses
 import datetime as dt
+import json
+import time
 from dataclasses import dataclass
+
+import httpx
+
 from app.core.config import settings
+from app.core.resilience import CircuitBreaker, LatencyHistogram
 
 class AIUnavailableError(Exception):
     pass
@@ -36,24 +44,197 @@ class StubAIClient(AIClient):
             f"Overall score {ctx.score:.1f} based on deterministic heuristics."
         )
 
+class AsyncAIClient:
+    async def explain(self, ctx: ExplainContext) -> str:
+        raise NotImplementedError
+
+class AITimeoutError(AIUnavailableError):
+    pass
+
+class HttpAIClient(AsyncAIClient):
+    """Explanation provider over HTTP: `POST {base_url}/v1/explain` with
+    `{"context": {...}}`, answered by `{"explanation": "..."}`.
+
+    Connections are pooled and reused across calls. Each call has a single
+    deadline of `timeout_s`; connection errors, 429 and 5xx are retried
+    (with backoff) up to `retries` times while time is left.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str | None,
+        timeout_s: float,
+        retries: int = 0,
+        pool_size: int = 20,
+        backoff_s: float = 0.05,
+    ):
+        self.url = base_url.rstrip("/") + "/v1/explain"
+        self.api_key = api_key
+        self.timeout_s = timeout_s
+        self.retries = retries
+        self.pool_size = pool_size
+        self.backoff_s = backoff_s
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _http(self) -> httpx.AsyncClient:
+        # pooled connections belong to one event loop: a server has one, test clients start several
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is not loop:
+            self._release()
+        if self._client is None:
+            headers = {"Content-Type": "application/json"}
+            if self.api_key:
+                headers["Authorization"] = f"Bearer {self.api_key}"
+            limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+            # httpx's own 5 s default would otherwise cut calls short of `timeout_s`
+            self._client = httpx.AsyncClient(headers=headers, limits=limits, timeout=httpx.Timeout(self.timeout_s))
+            self._loop = loop
+        return self._client
+
+    def _release(self) -> None:
+        """Drop the client of another event loop, closing it on that loop if it still runs."""
+        client, loop, self._client = self._client, self._loop, None
+        if client is not None and loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        # a stopped loop can no longer run the close; its sockets go with the client
+
+    async def explain(self, ctx: ExplainContext) -> str:
+        body = json.dumps({"context": dataclasses.asdict(ctx)}, default=str).encode("utf-8")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout_s
+        error = "no attempt made"
+        for attempt in range(self.retries + 1):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                resp = await asyncio.wait_for(self._http().post(self.url, content=body), remaining)
+            except (asyncio.TimeoutError, httpx.TimeoutException) as exc:
+                raise AITimeoutError(f"No answer within {self.timeout_s}s") from exc
+            except httpx.TransportError as exc:
+                error = f"{type(exc).__name__}: {exc}"
+            else:
+                if resp.status_code < 400:
+                    return self._explanation(resp)
+                error = f"Provider returned {resp.status_code}"
+                if resp.status_code != 429 and resp.status_code < 500:
+                    raise AIUnavailableError(error)
+            if attempt < self.retries:
+                await asyncio.sleep(max(0.0, min(self.backoff_s * 2 ** attempt, deadline - loop.time())))
+        raise AIUnavailableError(error)
+
+    @staticmethod
+    def _explanation(resp: httpx.Response) -> str:
+        try:
+            payload = resp.json()
+        except ValueError as exc:
+            raise AIUnavailableError("Provider returned invalid JSON") from exc
+        text = payload.get("explanation") if isinstance(payload, dict) else None
+        if not isinstance(text, str) or not text:
+            raise AIUnavailableError("Provider returned no explanation")
+        return text
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        if client is not None and self._loop is asyncio.get_running_loop():
+            await client.aclose()
+
+def _default_client() -> AIClient | AsyncAIClient:
+    if settings.ai_base_url:
+        return HttpAIClient(
+            settings.ai_base_url,
+            settings.ai_api_key,
+            settings.explain_timeout_s,
+            retries=settings.ai_retries,
+            pool_size=settings.ai_pool_size,
+        )
+    return StubAIClient(settings.ai_api_key)
+
 class AIExplainService:
-    def __init__(self, client: AIClient | None = None):
-        self.client = client or StubAIClient(settings.ai_api_key)
+    """Calls the AI client behind a circuit breaker and records call latency.
+
+    While the circuit is open the provider is not called at all and
+    `try_explain` returns None, so callers serve the deterministic fallback.
+    """
+
+    def __init__(
+        self,
+        client: AIClient | AsyncAIClient | None = None,
+        breaker: CircuitBreaker | None = None,
+        timeout_s: float | None = None,
+    ):
+        self.client = client or _default_client()
+        self.breaker = breaker or CircuitBreaker(settings.ai_breaker_failures, settings.ai_breaker_reset_s)
+        self.timeout_s = settings.explain_timeout_s if timeout_s is None else timeout_s
+        self.latency = {outcome: LatencyHistogram() for outcome in ("ok", "error", "timeout")}
 
-    def explain_or_fallback(self, ctx: ExplainContext) -> str:
+    async def try_explain(self, ctx: ExplainContext) -> str | None:
+        """AI explanation, or None when the client fails or the circuit is open."""
+        if not self.breaker.allow():
+            return None
+        if isinstance(self.client, AsyncAIClient):
+            call = self.client.explain(ctx)
+        else:
+            # blocking clients run in a worker thread, which is left to finish on timeout
+            call = asyncio.to_thread(self.client.explain, ctx)
+        started = time.perf_counter()
+        outcome = "error"
         try:
-            return self.client.explain(ctx)
+            text = await asyncio.wait_for(call, self.timeout_s)
+            outcome = "ok"
+            return text
+        except (asyncio.TimeoutError, AITimeoutError):
+            outcome = "timeout"
+            return None
         except Exception:
-            # deterministic fallback
-            parts = []
-            if "amount_exact" in ctx.reasons:
-                parts.append("Amount is an exact match.")
+            return None
+        finally:
+            # also reached when the caller cancels us, so a half-open probe never stays pending
+            self.latency[outcome].observe(time.perf_counter() - started)
+            if outcome == "ok":
+                self.breaker.record_success()
             else:
-                parts.append("Amount does not exactly match.")
-            date_reason = next((r for r in ctx.reasons if r.startswith("date_within_")), None)
-            if date_reason:
-                parts.append(f"Transaction date is close to the invoice date ({date_reason.replace('_', ' ')}).")
-            if "text_contains" in ctx.reasons or "text_overlap" in ctx.reasons:
-                parts.append("Descriptions contain overlapping keywords.")
-            parts.append(f"Deterministic score: {ctx.score:.1f}.")
-            return " ".join(parts)
+                self.breaker.record_failure()
+
+    async def explain_or_fallback(self, ctx: ExplainContext) -> str:
+        text = await self.try_explain(ctx)
+        return text if text is not None else self.fallback(ctx)
+
+    def stats(self) -> dict:
+        return {
+            "client": type(self.client).__name__,
+            "breaker": self.breaker.stats(),
+            "latency_ms": {outcome: h.stats() for outcome, h in self.latency.items()},
+        }
+
+    @staticmethod
+    def fallback(ctx: ExplainContext) -> str:
+        # deterministic fallback
+        parts = []
+        if "amount_exact" in ctx.reasons:
+            parts.append("Amount is an exact match.")
+        else:
+            parts.append("Amount does not exactly match.")
+        date_reason = next((r for r in ctx.reasons if r.startswith("date_within_")), None)
+        if date_reason:
+            parts.append(f"Transaction date is close to the invoice date ({date_reason.replace('_', ' ')}).")
+        if "text_contains" in ctx.reasons or "text_overlap" in ctx.reasons:
+            parts.append("Descriptions contain overlapping keywords.")
+        parts.append(f"Deterministic score: {ctx.score:.1f}.")
+        return " ".join(parts)
+
+_default: AIExplainService | None = None
+
+def default_explainer() -> AIExplainService:
+    """Process-wide explainer, so the AI client is built once."""
+    global _default
+    if _default is None:
+        _default = AIExplainService()
+    return _default
+
+async def close_default() -> None:
+    """Release the default client's pooled connections (app shutdown)."""
+    if _default is not None and isinstance(_default.client, HttpAIClient):
+        await _default.client.aclose()
@@ -1,14 +1,19 @@
 from __future__ import annotations
 import json
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends
 
-from app.db.session import get_session
-from app.modules.reconciliation.schemas import ReconcileRequest, MatchOut, ExplainOut
-from app.modules.reconciliation.ai import AIExplainService
-from app.modules.reconciliation.explain_service import ExplainService
+from app.db.session import Db, get_db
+from app.modules.reconciliation.schemas import (
+    ReconcileRequest, ReconcileJobOut, MatchOut, ExplainOut, ConfirmMatchesRequest,
+    ExplainBatchRequest, ExplainItemOut, ExplainCacheStatsOut, AIStatsOut,
+)
+from app.modules.reconciliation.ai import default_explainer
+from app.modules.reconciliation.explain_cache import explanation_cache
+from app.modules.reconciliation.explain_service import ExplainService, DEFAULT_WINDOW_DAYS
 from app.modules.reconciliation.reconcile_service import ReconciliationService
 from app.modules.reconciliation.match_service import MatchService
+from app.modules.reconciliation.job_service import ReconcileJobService
+from app.modules.reconciliation import worker
 
 
 
@@ -26,27 +31,121 @@ def _match_to_out(m) -> MatchOut:
     )
 
 @router.post("/tenants/{tenant_id}/reconcile", response_model=list[MatchOut])
-def reconcile(
+async def reconcile(
     tenant_id: int,
     req: ReconcileRequest = ReconcileRequest(),
-    session: Session = Depends(get_session),
+    db: Db = Depends(get_db),
 ) -> list[MatchOut]:
-    matches = ReconciliationService(session).reconcile(
-        tenant_id=tenant_id,
-        window_days=req.window_days,
-        max_candidates_per_invoice=req.max_candidates_per_invoice,
+    def run(session):
+        ReconcileJobService(session).check_idle(tenant_id)
+        matches = ReconciliationService(session).reconcile(
+            tenant_id=tenant_id,
+            window_days=req.window_days,
+            max_candidates_per_invoice=req.max_candidates_per_invoice,
+            candidate_mode=req.candidate_mode,
+            engine=req.engine,
+            mode=req.mode,
+            workers=req.workers,
+            stream=req.stream,
+            chunk_size=req.chunk_size,
+        )
+        return [_match_to_out(m) for m in matches]
+
+    # scoring is CPU-bound: keep it off the event loop
+    return await db.offload(run)
+
+def _job_to_out(job, matches, matches_next_cursor: str | None = None) -> ReconcileJobOut:
+    duration_ms = None
+    if job.started_at and job.finished_at:
+        duration_ms = int((job.finished_at - job.started_at).total_seconds() * 1000)
+    return ReconcileJobOut(
+        id=job.id,
+        tenant_id=job.tenant_id,
+        status=job.status,
+        params=ReconcileRequest(**json.loads(job.params)),
+        invoices_total=job.invoices_total,
+        invoices_done=job.invoices_done,
+        matches_created=job.matches_created,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        duration_ms=duration_ms,
+        matches=[_match_to_out(m) for m in matches],
+        matches_next_cursor=matches_next_cursor,
     )
+
+@router.post("/tenants/{tenant_id}/reconcile/jobs", response_model=ReconcileJobOut, status_code=202)
+async def enqueue_reconcile_job(
+    tenant_id: int,
+    req: ReconcileRequest = ReconcileRequest(),
+    db: Db = Depends(get_db),
+) -> ReconcileJobOut:
+    # jobs commit per invoice chunk, which needs the streaming path
+    job = await db.run(
+        lambda s: _job_to_out(ReconcileJobService(s).enqueue(tenant_id, {**req.model_dump(), "stream": True}), [])
+    )
+    worker.submit(db.sync_factory, job.id)
+    return job
+
+@router.get("/tenants/{tenant_id}/reconcile/jobs/{job_id}", response_model=ReconcileJobOut)
+async def get_reconcile_job(
+    tenant_id: int,
+    job_id: int,
+    limit: int = 100,
+    cursor: str | None = None,
+    db: Db = Depends(get_db),
+) -> ReconcileJobOut:
+    """`limit` / `cursor` page through the job's `matches`."""
+    def load(session):
+        jobs = ReconcileJobService(session)
+        job = jobs.get(tenant_id, job_id)
+        return _job_to_out(job, *jobs.matches(job, limit, cursor))
+
+    return await db.run(load)
+
+@router.post("/tenants/{tenant_id}/matches/confirm", response_model=list[MatchOut])
+async def confirm_matches(tenant_id: int, req: ConfirmMatchesRequest, db: Db = Depends(get_db)) -> list[MatchOut]:
+    matches = await db.run(lambda s: MatchService(s).confirm_bulk(tenant_id, req.match_ids, req.auto_confirm_above))
     return [_match_to_out(m) for m in matches]
 
 @router.post("/tenants/{tenant_id}/matches/{match_id}/confirm", response_model=MatchOut)
-def confirm_match(tenant_id: int, match_id: int, session: Session = Depends(get_session)) -> MatchOut:
-    m = MatchService(session).confirm(tenant_id, match_id)
+async def confirm_match(tenant_id: int, match_id: int, db: Db = Depends(get_db)) -> MatchOut:
+    m = await db.run(lambda s: MatchService(s).confirm(tenant_id, match_id))
     return _match_to_out(m)
 
 @router.get("/tenants/{tenant_id}/reconcile/explain", response_model=ExplainOut)
-def explain(tenant_id: int, invoice_id: int, transaction_id: int, session: Session = Depends(get_session)) -> ExplainOut:
-    # Gather deterministic context via reconciliation service helpers
-    ctx = ExplainService(session).build_context(tenant_id, invoice_id, transaction_id)
-    explainer = AIExplainService()
-    text = explainer.explain_or_fallback(ctx)
+async def explain(
+    tenant_id: int,
+    invoice_id: int,
+    transaction_id: int,
+    window_days: int = DEFAULT_WINDOW_DAYS,
+    db: Db = Depends(get_db),
+) -> ExplainOut:
+    # window_days only applies to pairs without a stored match
+    text = await ExplainService(db.session, db).explain(tenant_id, invoice_id, transaction_id, window_days=window_days)
     return ExplainOut(explanation=text)
+
+@router.post("/tenants/{tenant_id}/reconcile/explain/batch", response_model=list[ExplainItemOut])
+async def explain_batch(
+    tenant_id: int,
+    req: ExplainBatchRequest,
+    db: Db = Depends(get_db),
+) -> list[ExplainItemOut]:
+    items = await ExplainService(db.session, db).explain_batch(
+        tenant_id,
+        pairs=[(p.invoice_id, p.transaction_id) for p in req.pairs],
+        match_ids=req.match_ids,
+        window_days=req.window_days,
+    )
+    return [ExplainItemOut.model_validate(it) for it in items]
+
+@router.get("/reconcile/explain/cache-stats", response_model=ExplainCacheStatsOut)
+def explain_cache_stats() -> ExplainCacheStatsOut:
+    # per process; sum across workers when sizing
+    return ExplainCacheStatsOut(**explanation_cache.stats())
+
+@router.get("/reconcile/explain/ai-stats", response_model=AIStatsOut)
+def explain_ai_stats() -> AIStatsOut:
+    # circuit breaker state and AI call latency for this process
+    return AIStatsOut(**default_explainer().stats())
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import bisect
+from collections import defaultdict
+from typing import Any
+
+from app.modules.reconciliation.text_index import TextIndex
+
+CANDIDATE_MODES = ("blocked", "exhaustive")
+
+
+def amount_key(amount: Any) -> int:
+    """Integer cents; float-equal amounts always share a key."""
+    return int(round(float(amount) * 100))
+
+
+class CandidateIndex:
+    """Blocks a tenant's transactions so an invoice is only scored against
+    transactions that can earn points in `score_match`.
+
+    A transaction is a candidate when it shares the invoice currency and at
+    least one of: the exact amount, a posted day within `window_days`, or a
+    positive text score from the currency's `TextIndex`. Every pair
+    `score_match` would score above zero is in that set, so the ranked
+    output equals the exhaustive scan.
+    """
+
+    def __init__(self, txs):
+        self._by_id: dict[int, Any] = {}
+        self._by_amount: dict[tuple[str, int], list] = defaultdict(list)
+        self._by_day: dict[tuple[str, int], list] = defaultdict(list)
+        by_currency: dict[str, list] = defaultdict(list)
+
+        for tx in txs:
+            cur = tx.currency
+            self._by_id[tx.id] = tx
+            by_currency[cur].append(tx)
+            self._by_amount[(cur, amount_key(tx.amount))].append(tx)
+            self._by_day[(cur, tx.posted_at.toordinal())].append(tx)
+
+        days: dict[str, set[int]] = defaultdict(set)
+        for cur, day in self._by_day:
+            days[cur].add(day)
+        self._days = {cur: sorted(d) for cur, d in days.items()}
+        self._text = {cur: TextIndex(items) for cur, items in by_currency.items()}
+
+    def text_scores(self, invoice) -> dict[int, tuple[float, list[str]]]:
+        """Positive `_text_score` results for the invoice, keyed by transaction id."""
+        index = self._text.get(invoice.currency)
+        return index.text_scores(invoice.description) if index else {}
+
+    def get(self, tx_id: int):
+        return self._by_id[tx_id]
+
+    def candidates(self, invoice, window_days: int, text: bool = True) -> list:
+        """Candidate transactions; `text=False` returns only the amount and date buckets."""
+        cur = invoice.currency
+        if cur not in self._text:
+            return []
+
+        found: dict[int, Any] = {}
+
+        def add(txs) -> None:
+            for tx in txs:
+                found[tx.id] = tx
+
+        add(self._by_amount.get((cur, amount_key(invoice.amount)), ()))
+
+        if invoice.invoice_date is not None:
+            day = invoice.invoice_date.toordinal()
+            days = self._days[cur]
+            lo = bisect.bisect_left(days, day - window_days)
+            hi = bisect.bisect_right(days, day + window_days)
+            for d in days[lo:hi]:
+                add(self._by_day[(cur, d)])
+
+        if text:
+            add(self._by_id[tx_id] for tx_id in self.text_scores(invoice))
+
+        return list(found.values())
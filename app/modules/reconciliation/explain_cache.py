@@ -0,0 +1,140 @@
+"""Cache of AI explanations.
+
+Keys are `(tenant_id, invoice_id, transaction_id, context_hash)`, where the
+hash covers every input the explanation is generated from. Editing either
+side (amount, date, description) or a scoring change yields a new hash, so
+stale entries are never served; they just age out. Lookups go to the
+per-process LRU first, then, with `EXPLAIN_CACHE_PERSIST`, to the
+`explanation_cache` table, which survives restarts and is shared by workers.
+"""
+from __future__ import annotations
+
+import dataclasses
+import datetime as dt
+import hashlib
+import json
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.expiry import TTLCache, aware, process_key, purge_before
+from app.db.models import ExplanationCacheEntry, utcnow
+from app.modules.reconciliation.ai import ExplainContext
+
+CacheKey = tuple[int, int, int, str]
+
+
+def context_hash(ctx: ExplainContext) -> str:
+    raw = json.dumps(dataclasses.asdict(ctx), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def cache_key(tenant_id: int, invoice_id: int, transaction_id: int, ctx: ExplainContext) -> CacheKey:
+    return (tenant_id, invoice_id, transaction_id, context_hash(ctx))
+
+
+def ttl() -> dt.timedelta:
+    return dt.timedelta(hours=settings.explain_cache_ttl_hours)
+
+
+class ExplanationCache(TTLCache):
+    """The LRU plus counters for lookups answered by the table or by neither."""
+
+    def __init__(self, maxsize: int):
+        super().__init__(maxsize)
+        self.db_hits = 0
+        self.misses = 0
+
+    def record(self, db_hit: bool) -> None:
+        with self._lock:
+            if db_hit:
+                self.db_hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        with self._lock:
+            lookups = self.hits + self.db_hits + self.misses
+            stats.update({
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.db_hits) / lookups, 4) if lookups else None,
+            })
+        return stats
+
+    def clear(self) -> None:
+        super().clear()
+        with self._lock:
+            self.db_hits = self.misses = 0
+
+
+explanation_cache = ExplanationCache(settings.explain_cache_size)
+
+
+def _where(key: CacheKey) -> tuple:
+    tenant_id, invoice_id, transaction_id, ctx_hash = key
+    return (
+        ExplanationCacheEntry.tenant_id == tenant_id,
+        ExplanationCacheEntry.invoice_id == invoice_id,
+        ExplanationCacheEntry.bank_transaction_id == transaction_id,
+        ExplanationCacheEntry.context_hash == ctx_hash,
+    )
+
+
+def lookup(session: Session, key: CacheKey) -> str | None:
+    """Cached explanation from the LRU, else the table (which refills the LRU)."""
+    hit = explanation_cache.get(process_key(session, *key))
+    if hit is not None:
+        return hit
+    if settings.explain_cache_persist:
+        row = session.execute(
+            select(ExplanationCacheEntry.explanation, ExplanationCacheEntry.created_at).where(*_where(key))
+        ).first()
+        if row is not None:
+            expires = aware(row.created_at) + ttl()
+            if expires > utcnow():
+                explanation_cache.put(process_key(session, *key), row.explanation, expires)
+                explanation_cache.record(db_hit=True)
+                return row.explanation
+    explanation_cache.record(db_hit=False)
+    return None
+
+
+def store(session: Session, key: CacheKey, explanation: str) -> None:
+    store_many(session, [(key, explanation)])
+
+
+def store_many(session: Session, entries: list[tuple[CacheKey, str]]) -> None:
+    """Cache explanations in the LRU and, when persisted, in one commit."""
+    created_at = utcnow()
+    for key, explanation in entries:
+        explanation_cache.put(process_key(session, *key), explanation, created_at + ttl())
+    if not settings.explain_cache_persist:
+        return
+    try:
+        for key, explanation in entries:
+            tenant_id, invoice_id, transaction_id, ctx_hash = key
+            # an expired row for the same key would block the insert
+            session.execute(delete(ExplanationCacheEntry).where(*_where(key)))
+            session.add(ExplanationCacheEntry(
+                tenant_id=tenant_id,
+                invoice_id=invoice_id,
+                bank_transaction_id=transaction_id,
+                context_hash=ctx_hash,
+                explanation=explanation,
+                created_at=created_at,
+            ))
+        session.commit()
+    except IntegrityError:
+        # a concurrent request stored one of the keys first; the LRU still has them all
+        session.rollback()
+
+
+def purge_expired(session: Session, batch_size: int = 1000, now: dt.datetime | None = None) -> int:
+    """Delete expired persisted explanations in batches, committing each."""
+    return purge_before(
+        session, ExplanationCacheEntry.id, ExplanationCacheEntry.created_at, (now or utcnow()) - ttl(), batch_size
+    )
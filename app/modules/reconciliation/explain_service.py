@@ -1,50 +1,259 @@
 from __future__ import annotations
 
+import asyncio
+import json
+from dataclasses import dataclass
+
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import and_, select
 
-from app.db.models import Invoice, BankTransaction
-from app.core.errors import NotFoundError
-from app.modules.reconciliation.ai import ExplainContext
+from app.core.config import settings
+from app.db.models import Invoice, BankTransaction, Match
+from app.db.session import Db, ThreadedDb
+from app.core.errors import NotFoundError, BadRequestError
+from app.modules.reconciliation import explain_cache
+from app.modules.reconciliation.ai import AIExplainService, ExplainContext, default_explainer
 from app.modules.reconciliation.scoring import score_match
 
+# pairs plus match ids per batch request
+MAX_EXPLAIN_BATCH = 200
+# scoring window for pairs that have no stored match
+DEFAULT_WINDOW_DAYS = 3
+
+
+@dataclass
+class ExplainItem:
+    invoice_id: int | None
+    transaction_id: int | None
+    match_id: int | None = None
+    explanation: str | None = None
+    source: str | None = None  # cache|ai|fallback
+    error: str | None = None
+
+
+def _context(
+    inv: Invoice, tx: BankTransaction, window_days: int, score: float | None = None, reasons: str | None = None
+) -> ExplainContext:
+    """Context from a stored match's score and reasons when given, else by scoring the pair."""
+    if score is None:
+        cand = score_match(inv, tx, window_days=window_days)
+        score, reason_list = (float(cand.score), cand.reasons) if cand else (0.0, [])
+    else:
+        score, reason_list = float(score), json.loads(reasons or "[]")
+    return ExplainContext(
+        invoice_amount=float(inv.amount),
+        invoice_date=inv.invoice_date,
+        invoice_description=inv.description,
+        tx_amount=float(tx.amount),
+        tx_posted_at=tx.posted_at,
+        tx_description=tx.description,
+        score=score,
+        reasons=reason_list,
+    )
+
 
 class ExplainService:
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, db: Db | None = None):
         self.session = session
+        # how the async methods reach `session`; by default from worker threads
+        self.db = db or ThreadedDb(session)
 
     def build_context(
         self,
         tenant_id: int,
         invoice_id: int,
         transaction_id: int,
-        window_days: int = 3,
+        window_days: int = DEFAULT_WINDOW_DAYS,
     ) -> ExplainContext:
-        inv = self.session.scalars(
-            select(Invoice).where(Invoice.tenant_id == tenant_id, Invoice.id == invoice_id)
-        ).first()
-        if not inv:
-            raise NotFoundError("Invoice not found")
+        """One query for the invoice, the transaction and their match, if any.
 
-        tx = self.session.scalars(
-            select(BankTransaction).where(
-                BankTransaction.tenant_id == tenant_id, BankTransaction.id == transaction_id
+        A pair that reconcile proposed is explained with the score and reasons
+        stored on its match, so the text agrees with what the user sees; only
+        ad-hoc pairs are scored here, with `window_days`.
+        """
+        row = self.session.execute(
+            select(Invoice, BankTransaction, Match.score, Match.reasons)
+            .select_from(Invoice)
+            .outerjoin(
+                BankTransaction,
+                and_(BankTransaction.tenant_id == tenant_id, BankTransaction.id == transaction_id),
             )
+            .outerjoin(
+                Match,
+                and_(
+                    Match.tenant_id == Invoice.tenant_id,
+                    Match.invoice_id == Invoice.id,
+                    Match.bank_transaction_id == BankTransaction.id,
+                ),
+            )
+            .where(Invoice.tenant_id == tenant_id, Invoice.id == invoice_id)
         ).first()
-        if not tx:
+        if row is None:
+            raise NotFoundError("Invoice not found")
+        inv, tx, score, reasons = row
+        if tx is None:
             raise NotFoundError("Bank transaction not found")
+        return _context(inv, tx, window_days, score, reasons)
 
-        cand = score_match(inv, tx, window_days=window_days)
-        score = float(cand.score) if cand else 0.0
-        reasons = cand.reasons if cand else []
-
-        return ExplainContext(
-            invoice_amount=float(inv.amount),
-            invoice_date=inv.invoice_date,
-            invoice_description=inv.description,
-            tx_amount=float(tx.amount),
-            tx_posted_at=tx.posted_at,
-            tx_description=tx.description,
-            score=score,
-            reasons=reasons,
+    def build_contexts(
+        self,
+        tenant_id: int,
+        pairs: list[tuple[int, int]],
+        window_days: int = DEFAULT_WINDOW_DAYS,
+    ) -> dict[tuple[int, int], ExplainContext]:
+        """Contexts for many (invoice_id, transaction_id) pairs: one query per
+        side plus one for their matches. Pairs with a missing (or other
+        tenant's) row are left out."""
+        invoice_ids = {p[0] for p in pairs}
+        tx_ids = {p[1] for p in pairs}
+        invoices = {
+            inv.id: inv for inv in self.session.scalars(
+                select(Invoice).where(Invoice.tenant_id == tenant_id, Invoice.id.in_(invoice_ids))
+            )
+        }
+        txs = {
+            tx.id: tx for tx in self.session.scalars(
+                select(BankTransaction).where(BankTransaction.tenant_id == tenant_id, BankTransaction.id.in_(tx_ids))
+            )
+        }
+        stored = {
+            (m.invoice_id, m.bank_transaction_id): m for m in self.session.execute(
+                select(Match.invoice_id, Match.bank_transaction_id, Match.score, Match.reasons).where(
+                    Match.tenant_id == tenant_id, Match.invoice_id.in_(invoice_ids), Match.bank_transaction_id.in_(tx_ids)
+                )
+            )
+        }
+        contexts = {}
+        for i, t in pairs:
+            if i in invoices and t in txs:
+                m = stored.get((i, t))
+                contexts[(i, t)] = _context(invoices[i], txs[t], window_days, *((m.score, m.reasons) if m else ()))
+        return contexts
+
+    async def explain(
+        self,
+        tenant_id: int,
+        invoice_id: int,
+        transaction_id: int,
+        explainer: AIExplainService | None = None,
+        window_days: int = DEFAULT_WINDOW_DAYS,
+    ) -> str:
+        """AI explanation through the explanation cache.
+
+        The deterministic fallback is not cached, so once the AI client
+        recovers the next request gets a real explanation. DB work goes
+        through `self.db`; the AI call is awaited on the event loop.
+        """
+        if window_days <= 0:
+            raise BadRequestError("window_days must be > 0")
+        ctx, key, cached = await self.db.run(lambda _: self._cached(tenant_id, invoice_id, transaction_id, window_days))
+        if cached is not None:
+            return cached
+        explainer = explainer or default_explainer()
+        text = await explainer.try_explain(ctx)
+        if text is None:
+            return explainer.fallback(ctx)
+        await self.db.run(explain_cache.store, key, text)
+        return text
+
+    def _cached(
+        self, tenant_id: int, invoice_id: int, transaction_id: int, window_days: int
+    ) -> tuple[ExplainContext, explain_cache.CacheKey, str | None]:
+        ctx = self.build_context(tenant_id, invoice_id, transaction_id, window_days)
+        key = explain_cache.cache_key(tenant_id, invoice_id, transaction_id, ctx)
+        return ctx, key, explain_cache.lookup(self.session, key)
+
+    async def explain_batch(
+        self,
+        tenant_id: int,
+        pairs: list[tuple[int, int]] = (),
+        match_ids: list[int] = (),
+        explainer: AIExplainService | None = None,
+        window_days: int = DEFAULT_WINDOW_DAYS,
+    ) -> list[ExplainItem]:
+        """Explain many pairs, in request order (pairs, then match ids).
+
+        Cache misses go to the AI client concurrently, at most
+        `EXPLAIN_CONCURRENCY` at a time; an item that errors or takes longer
+        than `EXPLAIN_TIMEOUT_S` gets the deterministic fallback. Unknown ids
+        come back with `error` set instead of failing the batch. DB work goes
+        through `self.db`, so the event loop only waits on the AI calls.
+        """
+        if not pairs and not match_ids:
+            raise BadRequestError("Give pairs or match_ids")
+        if len(pairs) + len(match_ids) > MAX_EXPLAIN_BATCH:
+            raise BadRequestError(f"At most {MAX_EXPLAIN_BATCH} items per batch")
+        if window_days <= 0:
+            raise BadRequestError("window_days must be > 0")
+
+        items, pending = await self.db.run(
+            lambda _: self._prepare_batch(tenant_id, list(pairs), list(match_ids), window_days)
         )
+
+        explainer = explainer or default_explainer()
+        limit = asyncio.Semaphore(settings.explain_concurrency)
+
+        async def call(ctx: ExplainContext) -> str | None:
+            async with limit:
+                try:
+                    return await asyncio.wait_for(explainer.try_explain(ctx), settings.explain_timeout_s)
+                except asyncio.TimeoutError:
+                    return None
+
+        # one call per distinct key, even if the batch repeats a pair
+        keys = list(pending)
+        texts = await asyncio.gather(*(call(pending[k][0]) for k in keys))
+        fresh = []
+        for key, text in zip(keys, texts):
+            ctx, waiting = pending[key]
+            source = "ai" if text is not None else "fallback"
+            if text is None:
+                text = explainer.fallback(ctx)
+            else:
+                fresh.append((key, text))
+            for item in waiting:
+                item.explanation, item.source = text, source
+        if fresh:
+            await self.db.run(explain_cache.store_many, fresh)
+        return items
+
+    def _prepare_batch(
+        self, tenant_id: int, pairs: list[tuple[int, int]], match_ids: list[int], window_days: int
+    ) -> tuple[list[ExplainItem], dict]:
+        """Items with cache hits and errors filled in, and the cache misses
+        as `{key: (context, [items waiting for it])}`."""
+        items = [ExplainItem(i, t) for i, t in pairs]
+        if match_ids:
+            found = {
+                m.id: m for m in self.session.execute(
+                    select(Match.id, Match.invoice_id, Match.bank_transaction_id)
+                    .where(Match.tenant_id == tenant_id, Match.id.in_(set(match_ids)))
+                )
+            }
+            for match_id in match_ids:
+                m = found.get(match_id)
+                if m is None:
+                    items.append(ExplainItem(None, None, match_id=match_id, error="Match not found"))
+                else:
+                    items.append(ExplainItem(m.invoice_id, m.bank_transaction_id, match_id=match_id))
+
+        wanted = [(it.invoice_id, it.transaction_id) for it in items if it.error is None]
+        contexts = self.build_contexts(tenant_id, wanted, window_days) if wanted else {}
+        pending: dict = {}
+        for it in items:
+            if it.error is not None:
+                continue
+            ctx = contexts.get((it.invoice_id, it.transaction_id))
+            if ctx is None:
+                it.error = "Invoice or bank transaction not found"
+                continue
+            key = explain_cache.cache_key(tenant_id, it.invoice_id, it.transaction_id, ctx)
+            if key in pending:
+                pending[key][1].append(it)
+                continue
+            cached = explain_cache.lookup(self.session, key)
+            if cached is not None:
+                it.explanation, it.source = cached, "cache"
+            else:
+                pending[key] = (ctx, [it])
+        return items, pending
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+import datetime as dt
 import json
 import strawberry
 from sqlalchemy.orm import Session
 
+from app.db.session import Db
 from app.modules.reconciliation.reconcile_service import ReconciliationService
 from app.modules.reconciliation.match_service import MatchService
-from app.modules.reconciliation.explain_service import ExplainService
-from app.modules.reconciliation.ai import AIExplainService
+from app.modules.reconciliation.explain_service import ExplainService, DEFAULT_WINDOW_DAYS
+from app.modules.reconciliation.job_service import ReconcileJobService
+from app.modules.reconciliation import worker
 
 
 @strawberry.type
@@ -26,57 +29,202 @@ class ExplainType:
     explanation: str
 
 
+@strawberry.input
+class ExplainPairInput:
+    invoice_id: int
+    transaction_id: int
+
+
+@strawberry.type
+class ExplainItemType:
+    invoice_id: int | None
+    transaction_id: int | None
+    match_id: int | None
+    explanation: str | None
+    source: str | None
+    error: str | None
+
+
+@strawberry.type
+class ReconcileJobType:
+    id: int
+    tenant_id: int
+    status: str
+    invoices_total: int | None
+    invoices_done: int
+    matches_created: int | None
+    error: str | None
+    created_at: dt.datetime
+    started_at: dt.datetime | None
+    finished_at: dt.datetime | None
+    matches: list[MatchType]
+    matches_next_cursor: str | None
+
+
+def _match_type(m) -> MatchType:
+    return MatchType(
+        id=m.id,
+        tenant_id=m.tenant_id,
+        invoice_id=m.invoice_id,
+        bank_transaction_id=m.bank_transaction_id,
+        score=float(m.score),
+        status=m.status,
+        reasons=json.loads(m.reasons),
+    )
+
+
+def _job_type(job, matches, matches_next_cursor: str | None = None) -> ReconcileJobType:
+    return ReconcileJobType(
+        id=job.id,
+        tenant_id=job.tenant_id,
+        status=job.status,
+        invoices_total=job.invoices_total,
+        invoices_done=job.invoices_done,
+        matches_created=job.matches_created,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        matches=[_match_type(m) for m in matches],
+        matches_next_cursor=matches_next_cursor,
+    )
+
+
 @strawberry.type
 class ReconciliationQuery:
     @strawberry.field
-    def explain_reconciliation(
+    async def explain_reconciliation(
         self,
         info,
         tenant_id: int,
         invoice_id: int,
         transaction_id: int,
+        window_days: int = DEFAULT_WINDOW_DAYS,
     ) -> ExplainType:
-        session: Session = info.context["session"]
-        ctx = ExplainService(session).build_context(tenant_id, invoice_id, transaction_id)
-        text = AIExplainService().explain_or_fallback(ctx)
+        db: Db = info.context["db"]
+        text = await ExplainService(db.session, db).explain(tenant_id, invoice_id, transaction_id, window_days=window_days)
         return ExplainType(explanation=text)
 
+    @strawberry.field
+    async def explain_reconciliation_batch(
+        self,
+        info,
+        tenant_id: int,
+        pairs: list[ExplainPairInput] | None = None,
+        match_ids: list[int] | None = None,
+        window_days: int = DEFAULT_WINDOW_DAYS,
+    ) -> list[ExplainItemType]:
+        db: Db = info.context["db"]
+        items = await ExplainService(db.session, db).explain_batch(
+            tenant_id,
+            pairs=[(p.invoice_id, p.transaction_id) for p in pairs or []],
+            match_ids=match_ids or [],
+            window_days=window_days,
+        )
+        return [
+            ExplainItemType(
+                invoice_id=it.invoice_id,
+                transaction_id=it.transaction_id,
+                match_id=it.match_id,
+                explanation=it.explanation,
+                source=it.source,
+                error=it.error,
+            )
+            for it in items
+        ]
+
+    @strawberry.field
+    async def reconcile_job(
+        self, info, tenant_id: int, job_id: int, limit: int = 100, cursor: str | None = None
+    ) -> ReconcileJobType:
+        db: Db = info.context["db"]
+
+        def load(session: Session) -> ReconcileJobType:
+            jobs = ReconcileJobService(session)
+            job = jobs.get(tenant_id, job_id)
+            return _job_type(job, *jobs.matches(job, limit, cursor))
+
+        return await db.run(load)
+
 
 @strawberry.type
 class ReconciliationMutation:
     @strawberry.mutation
-    def reconcile(
+    async def reconcile(
         self,
         info,
         tenant_id: int,
         window_days: int = 3,
         max_candidates_per_invoice: int = 3,
+        candidate_mode: str = "blocked",
+        engine: str = "python",
+        mode: str = "full",
+        workers: int | None = None,
+        stream: bool = False,
+        chunk_size: int | None = None,
     ) -> list[MatchType]:
-        session: Session = info.context["session"]
-        matches = ReconciliationService(session).reconcile(tenant_id, window_days, max_candidates_per_invoice)
-        return [
-            MatchType(
-                id=m.id,
-                tenant_id=m.tenant_id,
-                invoice_id=m.invoice_id,
-                bank_transaction_id=m.bank_transaction_id,
-                score=float(m.score),
-                status=m.status,
-                reasons=json.loads(m.reasons),
+        db: Db = info.context["db"]
+
+        def run(session: Session) -> list[MatchType]:
+            ReconcileJobService(session).check_idle(tenant_id)
+            matches = ReconciliationService(session).reconcile(
+                tenant_id,
+                window_days,
+                max_candidates_per_invoice,
+                candidate_mode=candidate_mode,
+                engine=engine,
+                mode=mode,
+                workers=workers,
+                stream=stream,
+                chunk_size=chunk_size,
             )
-            for m in matches
-        ]
+            return [_match_type(m) for m in matches]
+
+        # scoring is CPU-bound: keep it off the event loop
+        return await db.offload(run)
 
     @strawberry.mutation
-    def confirm_match(self, info, tenant_id: int, match_id: int) -> MatchType:
-        session: Session = info.context["session"]
-        m = MatchService(session).confirm(tenant_id, match_id)
-        return MatchType(
-            id=m.id,
-            tenant_id=m.tenant_id,
-            invoice_id=m.invoice_id,
-            bank_transaction_id=m.bank_transaction_id,
-            score=float(m.score),
-            status=m.status,
-            reasons=json.loads(m.reasons),
-        )
+    async def enqueue_reconcile_job(
+        self,
+        info,
+        tenant_id: int,
+        window_days: int = 3,
+        max_candidates_per_invoice: int = 3,
+        candidate_mode: str = "blocked",
+        engine: str = "python",
+        mode: str = "full",
+        workers: int | None = None,
+        chunk_size: int | None = None,
+    ) -> ReconcileJobType:
+        db: Db = info.context["db"]
+        params = {
+            "window_days": window_days,
+            "max_candidates_per_invoice": max_candidates_per_invoice,
+            "candidate_mode": candidate_mode,
+            "engine": engine,
+            "mode": mode,
+            "workers": workers,
+            "stream": True,
+            "chunk_size": chunk_size,
+        }
+        job = await db.run(lambda s: _job_type(ReconcileJobService(s).enqueue(tenant_id, params), []))
+        worker.submit(db.sync_factory, job.id)
+        return job
+
+    @strawberry.mutation
+    async def confirm_match(self, info, tenant_id: int, match_id: int) -> MatchType:
+        db: Db = info.context["db"]
+        m = await db.run(lambda s: MatchService(s).confirm(tenant_id, match_id))
+        return _match_type(m)
+
+    @strawberry.mutation
+    async def confirm_matches(
+        self,
+        info,
+        tenant_id: int,
+        match_ids: list[int] | None = None,
+        auto_confirm_above: float | None = None,
+    ) -> list[MatchType]:
+        db: Db = info.context["db"]
+        matches = await db.run(lambda s: MatchService(s).confirm_bulk(tenant_id, match_ids, auto_confirm_above))
+        return [_match_type(m) for m in matches]
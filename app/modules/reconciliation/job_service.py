@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import datetime as dt
+import json
+import logging
+
+from sqlalchemy import Row, delete, exists, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+
+from app.core.errors import ConflictError, NotFoundError
+from app.core.pagination import Page, check_limit, decode_cursor, encode_cursor
+from app.db.models import Invoice, Match, ReconcileJob, ReconcileWatermark, Tenant, utcnow
+from app.modules.reconciliation.reconcile_service import MATCH_COLUMNS, ReconciliationService, check_params
+
+log = logging.getLogger(__name__)
+
+
+def _tenant_idle():
+    """No running job for the outer job's tenant."""
+    running = aliased(ReconcileJob)
+    return ~exists().where(running.tenant_id == ReconcileJob.tenant_id, running.status == "running")
+
+
+class ReconcileJobService:
+    """Reconcile runs queued in `reconcile_jobs` and executed by a worker.
+
+    The jobs table is the queue: workers claim a queued row with a
+    conditional UPDATE, so an in-process thread and a `python -m` worker
+    never run the same job twice. A job is only claimed while its tenant has
+    no other job running; the partial unique index on running jobs backs
+    that up when two workers race.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def enqueue(self, tenant_id: int, params: dict) -> ReconcileJob:
+        if self.session.get(Tenant, tenant_id) is None:
+            raise NotFoundError("Tenant not found")
+        # reject bad parameters now rather than in the worker
+        check_params(
+            params["window_days"],
+            params["max_candidates_per_invoice"],
+            params["candidate_mode"],
+            params["engine"],
+            params["mode"],
+            params["workers"],
+            params["chunk_size"],
+        )
+
+        job = ReconcileJob(tenant_id=tenant_id, status="queued", params=json.dumps(params))
+        self.session.add(job)
+        self.session.commit()
+        self.session.refresh(job)
+        return job
+
+    def get(self, tenant_id: int, job_id: int) -> ReconcileJob:
+        job = self.session.get(ReconcileJob, job_id)
+        if not job or job.tenant_id != tenant_id:
+            raise NotFoundError("Reconcile job not found")
+        return job
+
+    def claim(self, job_id: int) -> bool:
+        """Move a queued job to running; False if another worker got it first
+        or its tenant already has a job running (it then stays queued)."""
+        try:
+            result = self.session.execute(
+                update(ReconcileJob)
+                .where(ReconcileJob.id == job_id, ReconcileJob.status == "queued", _tenant_idle())
+                .values(status="running", started_at=utcnow(), heartbeat_at=utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            self.session.commit()
+        except IntegrityError:
+            self.session.rollback()
+            return False
+        return result.rowcount == 1
+
+    def check_idle(self, tenant_id: int) -> None:
+        """Synchronous reconciles refuse to run next to a job on the same tenant."""
+        running = self.session.scalar(
+            select(ReconcileJob.id).where(ReconcileJob.tenant_id == tenant_id, ReconcileJob.status == "running")
+        )
+        if running is not None:
+            raise ConflictError(f"Reconcile job {running} is running for this tenant; retry when it has finished")
+
+    def recover(self, stale_after_s: float) -> list[int]:
+        """Requeue running jobs with no heartbeat for `stale_after_s` and return
+        every queued job id, oldest first, for a restarted process to resubmit.
+
+        A requeued job starts over: its partial progress is reset and the
+        tenant's watermark dropped, as for a failed run, so it reruns in full.
+        """
+        cutoff = utcnow() - dt.timedelta(seconds=stale_after_s)
+        stale = (
+            ReconcileJob.status == "running",
+            func.coalesce(ReconcileJob.heartbeat_at, ReconcileJob.started_at) < cutoff,
+        )
+        tenant_ids = set(self.session.scalars(select(ReconcileJob.tenant_id).where(*stale)))
+        requeued = self.session.execute(
+            update(ReconcileJob)
+            .where(*stale)
+            .values(status="queued", started_at=None, heartbeat_at=None, invoices_done=0)
+        ).rowcount
+        if tenant_ids:
+            self.session.execute(delete(ReconcileWatermark).where(ReconcileWatermark.tenant_id.in_(tenant_ids)))
+        if requeued:
+            log.warning("requeued %d stale reconcile job(s)", requeued)
+        job_ids = list(self.session.scalars(
+            select(ReconcileJob.id).where(ReconcileJob.status == "queued").order_by(ReconcileJob.id.asc())
+        ))
+        self.session.commit()
+        return job_ids
+
+    def claim_next(self, tenant_id: int | None = None) -> int | None:
+        """Oldest queued job id of a tenant with nothing running (optionally only
+        `tenant_id`), claimed for this worker, or None when there is none."""
+        while True:
+            stmt = select(ReconcileJob.id).where(ReconcileJob.status == "queued", _tenant_idle())
+            if tenant_id is not None:
+                stmt = stmt.where(ReconcileJob.tenant_id == tenant_id)
+            job_id = self.session.scalar(stmt.order_by(ReconcileJob.id.asc()).limit(1))
+            if job_id is None:
+                self.session.commit()
+                return None
+            if self.claim(job_id):
+                return job_id
+
+    def run(self, job_id: int) -> None:
+        """Execute a claimed job.
+
+        Proposals and progress are committed after every invoice chunk, so
+        the reconcile always streams. If the run fails midway the tenant's
+        watermark is dropped: the stored proposals may be partial and the
+        next incremental run has to fall back to a full one.
+        """
+        job = self.session.get(ReconcileJob, job_id)
+        params = json.loads(job.params)
+        tenant_id = job.tenant_id
+        job.invoices_total = self.session.scalar(
+            select(func.count(Invoice.id)).where(Invoice.tenant_id == tenant_id, Invoice.status == "open")
+        )
+        self.session.commit()
+
+        def on_chunk(n: int) -> None:
+            job.invoices_done += n
+            job.heartbeat_at = utcnow()
+            self.session.commit()
+
+        try:
+            ReconciliationService(self.session).reconcile(
+                tenant_id,
+                params["window_days"],
+                params["max_candidates_per_invoice"],
+                candidate_mode=params["candidate_mode"],
+                engine=params["engine"],
+                mode=params["mode"],
+                workers=params["workers"],
+                stream=True,
+                chunk_size=params["chunk_size"],
+                on_chunk=on_chunk,
+                job_id=job_id,
+            )
+        except Exception as exc:
+            log.exception("reconcile job %s failed", job_id)
+            self.session.rollback()
+            self.session.execute(delete(ReconcileWatermark).where(ReconcileWatermark.tenant_id == tenant_id))
+            job.status = "failed"
+            job.error = str(exc) or type(exc).__name__
+            job.finished_at = utcnow()
+            self.session.commit()
+            return
+
+        job.status = "succeeded"
+        job.matches_created = self.session.scalar(select(func.count(Match.id)).where(Match.job_id == job_id))
+        job.finished_at = utcnow()
+        self.session.commit()
+
+    def matches(self, job: ReconcileJob, limit: int = 100, cursor: str | None = None) -> Page[Row]:
+        """Matches this job proposed that still exist, in id order, once it has
+        succeeded; keyset-paginated like the list endpoints. An incremental
+        job only lists what it rescored, not proposals kept from earlier runs."""
+        check_limit(limit)
+        if job.status != "succeeded":
+            return Page([], None)
+        stmt = select(*MATCH_COLUMNS).where(Match.job_id == job.id)
+        if cursor:
+            (last_id,) = decode_cursor(cursor, int)
+            stmt = stmt.where(Match.id > last_id)
+        rows = list(self.session.execute(stmt.order_by(Match.id.asc()).limit(limit + 1)).all())
+        if len(rows) <= limit:
+            return Page(rows, None)
+        rows = rows[:limit]
+        return Page(rows, encode_cursor(rows[-1].id))
@@ -1,64 +1,167 @@
 from __future__ import annotations
 
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import Row, select, update, func, or_
 
-from app.db.models import Invoice, Match
+from app.db.models import Invoice, Match, utcnow
 from app.core.errors import NotFoundError, ConflictError, BadRequestError
+from app.modules.reconciliation.reconcile_service import MATCH_COLUMNS
+
+# largest explicit id list accepted by confirm_many
+MAX_BULK_CONFIRM = 10_000
 
 
 class MatchService:
     def __init__(self, session: Session):
         self.session = session
 
-    def confirm(self, tenant_id: int, match_id: int) -> Match:
-        match = self.session.scalars(
-            select(Match).where(
-                Match.tenant_id == tenant_id,
-                Match.id == match_id,
-            )
-        ).first()
+    def confirm(self, tenant_id: int, match_id: int) -> Row:
+        """Conditional `UPDATE ... WHERE status='proposed' RETURNING` plus the
+        invoice update, in one transaction and without reading first.
+
+        The partial unique indexes on confirmed matches make a concurrent
+        confirm for the same invoice or transaction fail in the database,
+        which surfaces as ConflictError.
+        """
+        try:
+            match = self.session.execute(
+                update(Match)
+                .where(Match.tenant_id == tenant_id, Match.id == match_id, Match.status == "proposed")
+                .values(status="confirmed")
+                .returning(*MATCH_COLUMNS)
+                .execution_options(synchronize_session=False)
+            ).first()
+            if match is None:
+                self.session.rollback()
+                self._not_proposed(tenant_id, match_id)
+            self._mark_matched(tenant_id, Invoice.id == match.invoice_id)
+            self.session.commit()
+        except IntegrityError:
+            self.session.rollback()
+            raise ConflictError("Invoice or bank transaction already has a confirmed match")
+        except Exception:
+            self.session.rollback()
+            raise
+        return match
 
-        if not match:
+    def _not_proposed(self, tenant_id: int, match_id: int) -> None:
+        status = self.session.scalar(select(Match.status).where(Match.tenant_id == tenant_id, Match.id == match_id))
+        if status is None:
             raise NotFoundError("Match not found")
+        raise BadRequestError(f"Match is not in proposed state (current={status})")
 
-        if match.status != "proposed":
-            raise BadRequestError(
-                f"Match is not in proposed state (current={match.status})"
-            )
+    def _mark_matched(self, tenant_id: int, *where) -> None:
+        self.session.execute(
+            update(Invoice)
+            .where(Invoice.tenant_id == tenant_id, *where)
+            .values(status="matched", updated_at=utcnow())
+            .execution_options(synchronize_session=False)
+        )
 
-        # Ensure only one confirmed match per invoice
-        existing_confirmed = self.session.scalars(
-            select(Match).where(
-                Match.tenant_id == tenant_id,
-                Match.invoice_id == match.invoice_id,
-                Match.status == "confirmed",
-            )
-        ).first()
+    def confirm_bulk(self, tenant_id: int, match_ids: list[int] | None = None,
+                     auto_confirm_above: float | None = None) -> list[Row]:
+        """Transport entry point: explicit ids or a score threshold, not both."""
+        if (match_ids is None) == (auto_confirm_above is None):
+            raise BadRequestError("Give exactly one of match_ids or auto_confirm_above")
+        if match_ids is not None:
+            return self.confirm_many(tenant_id, match_ids)
+        return self.auto_confirm(tenant_id, auto_confirm_above)
 
-        if existing_confirmed and existing_confirmed.id != match.id:
-            raise ConflictError("Invoice already has a confirmed match")
+    def confirm_many(self, tenant_id: int, match_ids: list[int]) -> list[Row]:
+        """Confirm proposals all-or-nothing and mark their invoices `matched`.
 
-        # Update match
-        match.status = "confirmed"
+        At most one match per invoice and per bank transaction may be
+        confirmed, counting both the request and what is already confirmed.
+        """
+        ids = list(dict.fromkeys(match_ids))
+        if not ids:
+            raise BadRequestError("match_ids must not be empty")
+        if len(ids) > MAX_BULK_CONFIRM:
+            raise BadRequestError(f"At most {MAX_BULK_CONFIRM} matches per request")
 
-        # Update invoice
-        invoice = self.session.scalars(
-            select(Invoice).where(
-                Invoice.tenant_id == tenant_id,
-                Invoice.id == match.invoice_id,
-            )
-        ).first()
+        rows = self.session.execute(
+            select(Match.id, Match.invoice_id, Match.bank_transaction_id, Match.status)
+            .where(Match.tenant_id == tenant_id, Match.id.in_(ids))
+        ).all()
+        if len(rows) != len(ids):
+            missing = sorted(set(ids) - {r.id for r in rows})
+            raise NotFoundError("Match not found" if len(ids) == 1 else f"Matches not found: {missing[:20]}")
+        not_proposed = [r for r in rows if r.status != "proposed"]
+        if not_proposed:
+            r = not_proposed[0]
+            raise BadRequestError(f"Match {r.id} is not in proposed state (current={r.status})")
+        if len({r.invoice_id for r in rows}) != len(rows):
+            raise ConflictError("More than one match per invoice in request")
+        if len({r.bank_transaction_id for r in rows}) != len(rows):
+            raise ConflictError("More than one match per bank transaction in request")
+
+        return self._confirm(tenant_id, ids)
 
-        if not invoice:
-            raise NotFoundError("Invoice not found")
+    def auto_confirm(self, tenant_id: int, above: float) -> list[Row]:
+        """Confirm each open invoice's best proposal scoring above `above`,
+        when it is unambiguous: no other proposal for the invoice has the
+        same score, and no other invoice's pick uses the same transaction.
+        Invoices or transactions that already have a confirmed match are
+        left alone."""
+        confirmed = select(Match.invoice_id, Match.bank_transaction_id).where(
+            Match.tenant_id == tenant_id, Match.status == "confirmed"
+        ).subquery()
+        order = (Match.score.desc(), Match.id)
+        ranked = (
+            select(
+                Match.id,
+                Match.invoice_id,
+                Match.bank_transaction_id,
+                Match.score,
+                func.row_number().over(partition_by=Match.invoice_id, order_by=order).label("rn"),
+                func.lead(Match.score).over(partition_by=Match.invoice_id, order_by=order).label("next_score"),
+            )
+            .join(Invoice, Invoice.id == Match.invoice_id)
+            .where(Match.tenant_id == tenant_id, Match.status == "proposed", Invoice.status == "open")
+            .subquery()
+        )
+        picks = (
+            select(
+                ranked.c.id,
+                func.count().over(partition_by=ranked.c.bank_transaction_id).label("tx_picks"),
+            )
+            .where(
+                ranked.c.rn == 1,
+                ranked.c.score > above,
+                or_(ranked.c.next_score.is_(None), ranked.c.next_score < ranked.c.score),
+                ranked.c.invoice_id.not_in(select(confirmed.c.invoice_id)),
+                ranked.c.bank_transaction_id.not_in(select(confirmed.c.bank_transaction_id)),
+            )
+            .subquery()
+        )
+        ids = list(self.session.scalars(select(picks.c.id).where(picks.c.tx_picks == 1).order_by(picks.c.id)))
+        if not ids:
+            return []
+        return self._confirm(tenant_id, ids)
 
-        invoice.status = "matched"
+    def _confirm(self, tenant_id: int, ids: list[int]) -> list[Row]:
+        """Two set-based UPDATEs (matches, then their invoices) and one commit.
 
+        Rows that stopped being proposals since they were read, or a
+        confirmed match that appeared meanwhile, abort the whole batch.
+        """
         try:
+            rows = self.session.execute(
+                update(Match)
+                .where(Match.tenant_id == tenant_id, Match.id.in_(ids), Match.status == "proposed")
+                .values(status="confirmed")
+                .returning(*MATCH_COLUMNS)
+                .execution_options(synchronize_session=False)
+            ).all()
+            if len(rows) != len(ids):
+                raise ConflictError("Matches changed concurrently; retry")
+            self._mark_matched(tenant_id, Invoice.id.in_({r.invoice_id for r in rows}))
             self.session.commit()
-            self.session.refresh(match)
-            return match
+        except IntegrityError:
+            self.session.rollback()
+            raise ConflictError("Invoice or bank transaction already has a confirmed match")
         except Exception:
             self.session.rollback()
             raise
+        return sorted(rows, key=lambda r: r.id)
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import datetime as dt
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, NamedTuple
+
+from app.modules.reconciliation.ranking import Ranker, RankStats
+from app.modules.reconciliation.scoring import Candidate
+
+SHARDS_PER_WORKER = 4
+
+
+class InvoiceRow(NamedTuple):
+    id: int
+    amount: float
+    currency: str
+    invoice_date: dt.date | None
+    description: str | None
+
+
+class TxRow(NamedTuple):
+    id: int
+    amount: float
+    currency: str
+    posted_at: dt.datetime
+    description: str
+
+
+def invoice_row(inv) -> InvoiceRow:
+    return InvoiceRow(inv.id, float(inv.amount), inv.currency, inv.invoice_date, inv.description)
+
+
+def tx_row(tx) -> TxRow:
+    return TxRow(tx.id, float(tx.amount), tx.currency, tx.posted_at, tx.description)
+
+
+# Per-worker ranker, built once by the pool initializer
+_ranker: Ranker | None = None
+
+
+def _init_worker(txs: list[TxRow], window_days: int, k: int, candidate_mode: str, engine: str) -> None:
+    global _ranker
+    _ranker = Ranker(txs, window_days, k, candidate_mode, engine)
+
+
+def _rank_shard(shard: list[InvoiceRow]) -> tuple[list[list[Candidate]], RankStats]:
+    _ranker.stats = RankStats()
+    return [cands for _inv, cands in _ranker.rank(shard)], _ranker.stats
+
+
+class ParallelRanker:
+    """Process-pool version of `Ranker` with identical output.
+
+    Every worker receives a picklable snapshot of the transactions (plain
+    tuples, not ORM objects) once, through the pool initializer, and builds
+    its own indexes. `rank` splits invoices into contiguous id-range shards;
+    each worker returns the shard's per-invoice top-k, so the parent only
+    concatenates results in submission order and sums the shards' `stats`.
+    """
+
+    def __init__(
+        self,
+        txs,
+        window_days: int,
+        k: int,
+        candidate_mode: str = "blocked",
+        engine: str = "python",
+        workers: int = 2,
+    ):
+        self.workers = workers
+        self.stats = RankStats()
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=([tx_row(tx) for tx in txs], window_days, k, candidate_mode, engine),
+        )
+
+    def rank(self, invoices) -> Iterator[tuple[object, list[Candidate]]]:
+        invoices = list(invoices)
+        if not invoices:
+            return
+        rows = [invoice_row(inv) for inv in invoices]
+
+        n_shards = min(len(rows), self.workers * SHARDS_PER_WORKER)
+        size = -(-len(rows) // n_shards)
+        shards = [rows[i:i + size] for i in range(0, len(rows), size)]
+
+        done = 0
+        for ranked, stats in self._pool.map(_rank_shard, shards):
+            self.stats.add(stats)
+            yield from zip(invoices[done:done + len(ranked)], ranked)
+            done += len(ranked)
+
+    def close(self) -> None:
+        self._pool.shutdown()
+
+    def __enter__(self) -> ParallelRanker:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,40 @@
+"""Purge of expired persisted explanations (`explanation_cache`).
+
+The API process runs it every `EXPLAIN_CACHE_PURGE_INTERVAL_S` on a daemon
+thread. With the interval set to 0, run it from cron instead:
+
+    python -m app.modules.reconciliation.purge [--batch-size 1000]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+
+from sqlalchemy.orm import sessionmaker
+
+from app.modules.reconciliation.explain_cache import purge_expired
+
+log = logging.getLogger(__name__)
+
+
+def purge(session_factory: sessionmaker, batch_size: int = 1000) -> int:
+    with session_factory() as session:
+        purged = purge_expired(session, batch_size=batch_size)
+    if purged:
+        log.info("purged %d expired explanations", purged)
+    return purged
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Delete expired cached explanations")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    from app.db.session import SessionLocal
+
+    purge(SessionLocal, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
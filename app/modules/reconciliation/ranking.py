@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass
+from typing import Iterator
+
+from app.modules.reconciliation.candidates import CandidateIndex
+from app.modules.reconciliation.scoring import TEXT_MAX, Candidate, _text_score, base_score, score_match
+from app.modules.reconciliation.vectorized import NumpyScorer
+
+
+def rank_key(c: Candidate) -> tuple[float, int]:
+    return (-c.score, c.bank_transaction_id)
+
+
+@dataclass
+class RankStats:
+    pairs_considered: int = 0
+    pairs_scored: int = 0
+    # pairs whose upper bound could not beat the current k-th best, so text was never scored
+    pairs_pruned: int = 0
+    # invoices whose text-only candidates were skipped because the k-th best already beat TEXT_MAX
+    text_lookups_skipped: int = 0
+
+    def add(self, other: RankStats) -> None:
+        self.pairs_considered += other.pairs_considered
+        self.pairs_scored += other.pairs_scored
+        self.pairs_pruned += other.pairs_pruned
+        self.text_lookups_skipped += other.text_lookups_skipped
+
+
+class TopK:
+    """Bounded min-heap keeping the k best candidates in `rank_key` order."""
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: list[tuple[float, int, Candidate]] = []
+
+    def can_enter(self, score: float, tx_id: int) -> bool:
+        """Whether a candidate with this (upper-bound) score could still make the top-k."""
+        if len(self._heap) < self.k:
+            return True
+        worst_score, worst_neg_id, _ = self._heap[0]
+        return (score, -tx_id) > (worst_score, worst_neg_id)
+
+    def push(self, cand: Candidate) -> None:
+        item = (cand.score, -cand.bank_transaction_id, cand)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, item)
+        elif item[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, item)
+
+    def sorted(self) -> list[Candidate]:
+        return sorted((c for _, _, c in self._heap), key=rank_key)
+
+
+class Ranker:
+    """Ranks invoices against a fixed set of transactions.
+
+    Indexes are built once in the constructor, so `rank` can be called per
+    invoice chunk. Works on ORM instances or any rows exposing the same
+    attributes. `stats` accumulates pruning counters across calls.
+    """
+
+    def __init__(
+        self,
+        txs,
+        window_days: int,
+        k: int,
+        candidate_mode: str = "blocked",
+        engine: str = "python",
+    ):
+        self.txs = txs
+        self.window_days = window_days
+        self.k = k
+        self.stats = RankStats()
+        self._scorer = NumpyScorer(txs, window_days) if engine == "numpy" else None
+        # "exhaustive" scores the full cross product; kept for comparison
+        self._index = CandidateIndex(txs) if engine == "python" and candidate_mode == "blocked" else None
+
+    def rank(self, invoices) -> Iterator[tuple[object, list[Candidate]]]:
+        """Yield `(invoice, top-k candidates)` in invoice order."""
+        if self._scorer is not None:
+            yield from self._scorer.rank(invoices, self.k)
+            return
+
+        for inv in invoices:
+            if self._index is not None:
+                yield inv, self._rank_pruned(inv)
+                continue
+
+            cands: list[Candidate] = []
+            for tx in self.txs:
+                self.stats.pairs_considered += 1
+                cand = score_match(inv, tx, window_days=self.window_days)
+                if cand and cand.score > 0:
+                    cands.append(cand)
+            self.stats.pairs_scored += len(self.txs)
+
+            cands.sort(key=rank_key)
+            yield inv, cands[:self.k]
+
+    def _rank_pruned(self, inv) -> list[Candidate]:
+        """Top-k for one invoice, skipping pairs that provably cannot enter it.
+
+        Amount/date bucket candidates are visited best cheap score first; the
+        text component (at most TEXT_MAX) is only scored when
+        `round(base + TEXT_MAX)` could still beat the current k-th best.
+        Text-only candidates score at most TEXT_MAX, so the text index is not
+        consulted at all once the k-th best is above that.
+        """
+        top = TopK(self.k)
+        stats = self.stats
+        seen: set[int] = set()
+
+        cheap = []
+        for tx in self._index.candidates(inv, self.window_days, text=False):
+            base = base_score(inv, tx, self.window_days)
+            cheap.append((base[0], tx.id, tx, base))
+        cheap.sort(key=lambda c: (-c[0], c[1]))
+
+        for bound, tx_id, tx, base in cheap:
+            seen.add(tx_id)
+            stats.pairs_considered += 1
+            if not top.can_enter(round(bound + TEXT_MAX, 3), tx_id):
+                stats.pairs_pruned += 1
+                continue
+            stats.pairs_scored += 1
+            text = _text_score(inv.description, tx.description)
+            cand = score_match(inv, tx, self.window_days, text=text, base=base)
+            if cand.score > 0:
+                top.push(cand)
+
+        if not top.can_enter(TEXT_MAX, 0):
+            stats.text_lookups_skipped += 1
+            return top.sorted()
+
+        for tx_id, text in self._index.text_scores(inv).items():
+            if tx_id in seen:
+                continue
+            stats.pairs_considered += 1
+            if not top.can_enter(round(text[0], 3), tx_id):
+                stats.pairs_pruned += 1
+                continue
+            stats.pairs_scored += 1
+            cand = score_match(inv, self._index.get(tx_id), self.window_days, text=text, base=(0.0, []))
+            if cand.score > 0:
+                top.push(cand)
+
+        return top.sorted()
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> Ranker:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
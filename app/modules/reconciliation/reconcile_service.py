@@ -1,85 +1,369 @@
 from __future__ import annotations
 
+import datetime as dt
 import json
+import logging
+from typing import Callable, Iterator
 
 from sqlalchemy.orm import Session
-from sqlalchemy import select, delete
+from sqlalchemy import Row, select, delete, func, insert
 
-from app.db.models import Invoice, BankTransaction, Match
+from app.db.models import Invoice, BankTransaction, Match, ReconcileWatermark, utcnow
 from app.core.errors import BadRequestError
-from app.modules.reconciliation.scoring import Candidate, score_match
+from app.core.config import settings
+from app.modules.reconciliation.candidates import CANDIDATE_MODES
+from app.modules.reconciliation.parallel import ParallelRanker, tx_row
+from app.modules.reconciliation.ranking import Ranker, RankStats, rank_key
+from app.modules.reconciliation.scoring import Candidate
+from app.modules.reconciliation.vectorized import ENGINES
+
+log = logging.getLogger(__name__)
+
+RECONCILE_MODES = ("full", "incremental")
+
+# Columns returned for proposals; rows expose the same attributes as Match
+MATCH_COLUMNS = (
+    Match.id,
+    Match.tenant_id,
+    Match.invoice_id,
+    Match.bank_transaction_id,
+    Match.score,
+    Match.status,
+    Match.reasons,
+)
+
+
+def check_params(
+    window_days: int,
+    max_candidates_per_invoice: int,
+    candidate_mode: str,
+    engine: str,
+    mode: str,
+    workers: int | None,
+    chunk_size: int | None,
+) -> tuple[int, int]:
+    """Validate reconcile parameters; returns `workers` and `chunk_size` with settings defaults applied."""
+    if window_days <= 0:
+        raise BadRequestError("window_days must be > 0")
+    if max_candidates_per_invoice <= 0:
+        raise BadRequestError("max_candidates_per_invoice must be > 0")
+    if candidate_mode not in CANDIDATE_MODES:
+        raise BadRequestError(f"candidate_mode must be one of {', '.join(CANDIDATE_MODES)}")
+    if engine not in ENGINES:
+        raise BadRequestError(f"engine must be one of {', '.join(ENGINES)}")
+    if mode not in RECONCILE_MODES:
+        raise BadRequestError(f"mode must be one of {', '.join(RECONCILE_MODES)}")
+    workers = settings.reconcile_workers if workers is None else workers
+    if workers <= 0:
+        raise BadRequestError("workers must be > 0")
+    if workers > settings.reconcile_max_workers:
+        raise BadRequestError(f"workers must be <= {settings.reconcile_max_workers}")
+    chunk_size = settings.reconcile_chunk_size if chunk_size is None else chunk_size
+    if chunk_size <= 0:
+        raise BadRequestError("chunk_size must be > 0")
+    return workers, chunk_size
 
 
 class ReconciliationService:
     def __init__(self, session: Session):
         self.session = session
+        self.stats = RankStats()
+        self._rankers: list[Ranker | ParallelRanker] = []
 
     def reconcile(
         self,
         tenant_id: int,
         window_days: int = 3,
         max_candidates_per_invoice: int = 3,
-    ) -> list[Match]:
-        if window_days <= 0:
-            raise BadRequestError("window_days must be > 0")
-        if max_candidates_per_invoice <= 0:
-            raise BadRequestError("max_candidates_per_invoice must be > 0")
+        candidate_mode: str = "blocked",
+        engine: str = "python",
+        mode: str = "full",
+        workers: int | None = None,
+        stream: bool = False,
+        chunk_size: int | None = None,
+        on_chunk: Callable[[int], None] | None = None,
+        job_id: int | None = None,
+    ) -> list[Row]:
+        """Rank open invoices and replace the tenant's proposals.
+
+        `on_chunk(n)` is called after each invoice chunk has been ranked and
+        its proposals written; background jobs use it to report progress,
+        and pass `job_id` to tag the proposals they write.
+        """
+        workers, chunk_size = check_params(
+            window_days, max_candidates_per_invoice, candidate_mode, engine, mode, workers, chunk_size
+        )
+
+        self._window_days = window_days
+        self._k = max_candidates_per_invoice
+        self._candidate_mode = candidate_mode
+        self._engine = engine
+        self._workers = workers
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._on_chunk = on_chunk
+        self._job_id = job_id
+        self._rankers = []
 
         try:
-            self.session.execute(
-                delete(Match).where(Match.tenant_id == tenant_id, Match.status == "proposed")
+            started_at = utcnow()
+            max_invoice_id, max_tx_id = self._max_ids(tenant_id)
+            wm = self.session.scalars(
+                select(ReconcileWatermark).where(ReconcileWatermark.tenant_id == tenant_id)
+            ).first()
+
+            incremental = (
+                mode == "incremental"
+                and wm is not None
+                and wm.window_days == window_days
+                and wm.max_candidates_per_invoice == max_candidates_per_invoice
             )
+            if incremental:
+                self._reconcile_incremental(tenant_id, wm, max_invoice_id, max_tx_id)
+                result = self.proposed(tenant_id)
+            else:
+                result = self._reconcile_full(tenant_id, max_invoice_id, max_tx_id)
 
-            invoices = list(
-                self.session.scalars(
-                    select(Invoice)
-                    .where(Invoice.tenant_id == tenant_id, Invoice.status == "open")
-                    .order_by(Invoice.id.asc())
-                ).all()
+            if wm is None:
+                wm = ReconcileWatermark(tenant_id=tenant_id)
+                self.session.add(wm)
+            wm.max_invoice_id = max_invoice_id
+            wm.max_transaction_id = max_tx_id
+            wm.window_days = window_days
+            wm.max_candidates_per_invoice = max_candidates_per_invoice
+            # a row written by a transaction still open when this run read its snapshot can carry an
+            # earlier updated_at (or id) than rows it saw; the margin makes the next run look again
+            wm.reconciled_at = started_at - dt.timedelta(seconds=settings.reconcile_watermark_margin_s)
+
+            self.session.commit()
+            self.stats = RankStats()
+            for ranker in self._rankers:
+                self.stats.add(ranker.stats)
+            log.info("reconcile tenant=%s mode=%s %s", tenant_id, "incremental" if incremental else "full", self.stats)
+            return result
+        except Exception:
+            self.session.rollback()
+            raise
+
+    def _reconcile_full(self, tenant_id: int, max_invoice_id: int, max_tx_id: int) -> list[Row]:
+        self.session.execute(
+            delete(Match).where(Match.tenant_id == tenant_id, Match.status == "proposed")
+        )
+
+        txs = self._transactions(tenant_id, BankTransaction.id <= max_tx_id)
+
+        created: list[Row] = []
+        pending: list[dict] = []
+        seen_pairs: set[tuple[int, int]] = set()
+
+        with self._ranker(txs) as ranker:
+            for chunk in self._invoice_chunks(tenant_id, Invoice.id <= max_invoice_id):
+                for _inv, cands in ranker.rank(chunk):
+                    for cand in cands:
+                        pair = (cand.invoice_id, cand.bank_transaction_id)
+                        if pair in seen_pairs:
+                            continue
+                        seen_pairs.add(pair)
+                        pending.append(self._match_values(tenant_id, cand))
+                if self._stream:
+                    created += self._insert_matches(pending)
+                    pending = []
+                self._progress(chunk)
+
+        created += self._insert_matches(pending)
+        return created
+
+    def _reconcile_incremental(
+        self, tenant_id: int, wm: ReconcileWatermark, max_invoice_id: int, max_tx_id: int
+    ) -> None:
+        """Rescore only what changed since `wm` and merge into the stored proposals.
+
+        Invoices that are new, edited, or lost a proposal because its
+        transaction was edited are ranked from scratch. Every other open
+        invoice is ranked against the new/edited transactions only and merged
+        with its existing proposals; since those are already its top-k over
+        the older transactions, top-k of the union stays exact.
+        """
+        since = wm.reconciled_at
+
+        # proposals for invoices that were matched or deleted since the last run
+        open_ids = select(Invoice.id).where(Invoice.tenant_id == tenant_id, Invoice.status == "open")
+        self.session.execute(
+            delete(Match).where(
+                Match.tenant_id == tenant_id,
+                Match.status == "proposed",
+                Match.invoice_id.not_in(open_ids),
             )
-            txs = list(
-                self.session.scalars(
-                    select(BankTransaction)
-                    .where(BankTransaction.tenant_id == tenant_id)
-                    .order_by(BankTransaction.id.asc())
-                ).all()
+        )
+
+        delta_txs = self._transactions(
+            tenant_id,
+            BankTransaction.id <= max_tx_id,
+            (BankTransaction.id > wm.max_transaction_id) | (BankTransaction.updated_at >= since),
+        )
+        changed_tx_ids = [tx.id for tx in delta_txs if tx.id <= wm.max_transaction_id]
+
+        rescore_ids = set(self.session.scalars(
+            select(Invoice.id).where(
+                Invoice.tenant_id == tenant_id,
+                Invoice.status == "open",
+                Invoice.id <= max_invoice_id,
+                (Invoice.id > wm.max_invoice_id) | (Invoice.updated_at >= since),
             )
+        ))
+        if changed_tx_ids:
+            rescore_ids.update(self.session.scalars(
+                select(Match.invoice_id).where(
+                    Match.tenant_id == tenant_id,
+                    Match.status == "proposed",
+                    Match.bank_transaction_id.in_(changed_tx_ids),
+                )
+            ))
 
-            created: list[Match] = []
-            seen_pairs: set[tuple[int, int]] = set()
+        if rescore_ids:
+            self.session.execute(
+                delete(Match).where(
+                    Match.tenant_id == tenant_id,
+                    Match.status == "proposed",
+                    Match.invoice_id.in_(rescore_ids),
+                )
+            )
+            txs = self._transactions(tenant_id, BankTransaction.id <= max_tx_id)
+            with self._ranker(txs) as ranker:
+                for chunk in self._invoice_chunks(tenant_id, Invoice.id.in_(rescore_ids)):
+                    self._insert_matches([
+                        self._match_values(tenant_id, cand)
+                        for _inv, cands in ranker.rank(chunk)
+                        for cand in cands
+                    ])
+                    self._progress(chunk)
 
-            for inv in invoices:
-                cands: list[Candidate] = []
-                for tx in txs:
-                    cand = score_match(inv, tx, window_days=window_days)
-                    if cand and cand.score > 0:
-                        cands.append(cand)
+        if not delta_txs:
+            return
 
-                cands.sort(key=lambda c: (-c.score, c.bank_transaction_id))
+        existing: dict[int, list[tuple[Candidate, int]]] = {}
+        for match_id, invoice_id, tx_id, score in self.session.execute(
+            select(Match.id, Match.invoice_id, Match.bank_transaction_id, Match.score)
+            .where(Match.tenant_id == tenant_id, Match.status == "proposed")
+        ):
+            existing.setdefault(invoice_id, []).append((Candidate(invoice_id, tx_id, float(score), []), match_id))
 
-                for cand in cands[:max_candidates_per_invoice]:
-                    pair = (cand.invoice_id, cand.bank_transaction_id)
-                    if pair in seen_pairs:
+        others = (Invoice.id <= wm.max_invoice_id, Invoice.id.not_in(rescore_ids))
+        with self._ranker(delta_txs) as ranker:
+            for chunk in self._invoice_chunks(tenant_id, *others):
+                displaced: list[int] = []
+                pending: list[dict] = []
+                for inv, cands in ranker.rank(chunk):
+                    if not cands:
                         continue
-                    seen_pairs.add(pair)
-
-                    m = Match(
-                        tenant_id=tenant_id,
-                        invoice_id=cand.invoice_id,
-                        bank_transaction_id=cand.bank_transaction_id,
-                        score=cand.score,
-                        status="proposed",
-                        reasons=json.dumps(cand.reasons),
-                    )
-                    self.session.add(m)
-                    created.append(m)
+                    pool = existing.get(inv.id, []) + [(c, None) for c in cands]
+                    pool.sort(key=lambda p: rank_key(p[0]))
 
-            self.session.commit()
+                    displaced += [match_id for _cand, match_id in pool[self._k:] if match_id is not None]
+                    pending += [self._match_values(tenant_id, c) for c, match_id in pool[:self._k] if match_id is None]
 
-            for m in created:
-                self.session.refresh(m)
+                if displaced:
+                    self.session.execute(delete(Match).where(Match.id.in_(displaced)))
+                self._insert_matches(pending)
+                self._progress(chunk)
 
-            return created
-        except Exception:
-            self.session.rollback()
-            raise
+    def _progress(self, chunk: list) -> None:
+        if self._on_chunk is not None:
+            self._on_chunk(len(chunk))
+
+    def _ranker(self, txs) -> Ranker | ParallelRanker:
+        args = (txs, self._window_days, self._k, self._candidate_mode, self._engine)
+        ranker = ParallelRanker(*args, workers=self._workers) if self._workers > 1 else Ranker(*args)
+        self._rankers.append(ranker)
+        return ranker
+
+    def _match_values(self, tenant_id: int, cand: Candidate) -> dict:
+        return {
+            "tenant_id": tenant_id,
+            "invoice_id": cand.invoice_id,
+            "bank_transaction_id": cand.bank_transaction_id,
+            "score": cand.score,
+            "status": "proposed",
+            "reasons": json.dumps(cand.reasons),
+            "job_id": self._job_id,
+        }
+
+    def _insert_matches(self, rows: list[dict]) -> list[Row]:
+        """Batched INSERT ... RETURNING instead of add() + refresh() per match.
+
+        Ids are assigned in VALUES order, so sorting the returned rows by id
+        restores input order without a sentinel column (which would make
+        SQLite fall back to one INSERT per row).
+        """
+        if not rows:
+            return []
+        returned = self.session.execute(insert(Match).returning(*MATCH_COLUMNS), rows)
+        return sorted(returned, key=lambda r: r.id)
+
+    def _max_ids(self, tenant_id: int) -> tuple[int, int]:
+        max_invoice_id = self.session.scalar(
+            select(func.coalesce(func.max(Invoice.id), 0)).where(Invoice.tenant_id == tenant_id)
+        )
+        max_tx_id = self.session.scalar(
+            select(func.coalesce(func.max(BankTransaction.id), 0)).where(BankTransaction.tenant_id == tenant_id)
+        )
+        return max_invoice_id, max_tx_id
+
+    def _invoice_chunks(self, tenant_id: int, *where) -> Iterator[list]:
+        """Open invoices in id order: one list of ORM objects, or, when
+        streaming, slim column rows in `chunk_size` keyset pages.
+
+        Pages are separate queries rather than `yield_per` partitions of one
+        cursor, so `on_chunk` may commit between them.
+        """
+        where = (Invoice.tenant_id == tenant_id, Invoice.status == "open", *where)
+        if not self._stream:
+            yield list(self.session.scalars(select(Invoice).where(*where).order_by(Invoice.id.asc())).all())
+            return
+
+        stmt = (
+            select(Invoice.id, Invoice.amount, Invoice.currency, Invoice.invoice_date, Invoice.description)
+            .where(*where)
+            .order_by(Invoice.id.asc())
+            .limit(self._chunk_size)
+        )
+        last_id = 0
+        while True:
+            chunk = self.session.execute(stmt.where(Invoice.id > last_id)).all()
+            if not chunk:
+                return
+            yield chunk
+            last_id = chunk[-1].id
+
+    def _transactions(self, tenant_id: int, *where) -> list:
+        """ORM transactions, or compact `TxRow` tuples when streaming."""
+        where = (BankTransaction.tenant_id == tenant_id, *where)
+        if not self._stream:
+            return list(
+                self.session.scalars(
+                    select(BankTransaction).where(*where).order_by(BankTransaction.id.asc())
+                ).all()
+            )
+
+        stmt = (
+            select(
+                BankTransaction.id,
+                BankTransaction.amount,
+                BankTransaction.currency,
+                BankTransaction.posted_at,
+                BankTransaction.description,
+            )
+            .where(*where)
+            .order_by(BankTransaction.id.asc())
+            .execution_options(yield_per=self._chunk_size)
+        )
+        return [tx_row(r) for r in self.session.execute(stmt)]
+
+    def proposed(self, tenant_id: int) -> list[Row]:
+        return list(
+            self.session.execute(
+                select(*MATCH_COLUMNS)
+                .where(Match.tenant_id == tenant_id, Match.status == "proposed")
+                .order_by(Match.invoice_id.asc(), Match.score.desc(), Match.bank_transaction_id.asc())
+            ).all()
+        )
@@ -1,4 +1,5 @@
 from __future__ import annotations
+import datetime as dt
 from pydantic import BaseModel
 from pydantic import ConfigDict
 
@@ -15,7 +16,82 @@ class MatchOut(BaseModel):
 class ReconcileRequest(BaseModel):
     window_days: int = 3
     max_candidates_per_invoice: int = 3
+    candidate_mode: str = "blocked"  # blocked|exhaustive
+    engine: str = "python"  # python|numpy
+    mode: str = "full"  # full|incremental
+    workers: int | None = None  # defaults to RECONCILE_WORKERS
+    stream: bool = False
+    chunk_size: int | None = None  # defaults to RECONCILE_CHUNK_SIZE
+
+class ConfirmMatchesRequest(BaseModel):
+    # exactly one of the two
+    match_ids: list[int] | None = None
+    auto_confirm_above: float | None = None  # confirm unambiguous best proposals scoring above this
+
+class ReconcileJobOut(BaseModel):
+    id: int
+    tenant_id: int
+    status: str  # queued|running|succeeded|failed
+    params: ReconcileRequest
+    invoices_total: int | None = None
+    invoices_done: int
+    matches_created: int | None = None
+    error: str | None = None
+    created_at: dt.datetime
+    started_at: dt.datetime | None = None
+    finished_at: dt.datetime | None = None
+    duration_ms: int | None = None
+    matches: list[MatchOut] = []
+    matches_next_cursor: str | None = None  # pass as `cursor` for the next page of `matches`
 
 class ExplainOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     explanation: str
+
+class ExplainPair(BaseModel):
+    invoice_id: int
+    transaction_id: int
+
+class ExplainBatchRequest(BaseModel):
+    pairs: list[ExplainPair] = []
+    match_ids: list[int] = []
+    window_days: int = 3  # scoring window for pairs without a stored match
+
+class ExplainItemOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    invoice_id: int | None
+    transaction_id: int | None
+    match_id: int | None = None
+    explanation: str | None = None
+    source: str | None = None  # cache|ai|fallback
+    error: str | None = None
+
+class ExplainCacheStatsOut(BaseModel):
+    size: int
+    maxsize: int
+    hits: int
+    db_hits: int
+    misses: int
+    evictions: int
+    expired: int
+    hit_rate: float | None = None
+
+class CircuitBreakerOut(BaseModel):
+    state: str
+    consecutive_failures: int
+    failure_threshold: int
+    reset_after_s: float
+    opened: int
+    short_circuited: int
+
+class LatencyHistogramOut(BaseModel):
+    count: int
+    sum_ms: float
+    # cumulative counts keyed by upper bound in ms ("+Inf" last)
+    buckets: dict[str, int]
+
+class AIStatsOut(BaseModel):
+    client: str
+    breaker: CircuitBreakerOut
+    # by outcome: ok, error, timeout
+    latency_ms: dict[str, LatencyHistogramOut]
@@ -4,6 +4,7 @@ import datetime as dt
 from dataclasses import dataclass
 
 from app.db.models import Invoice, BankTransaction
+from app.modules.reconciliation.text_index import tokenize
 
 
 @dataclass(frozen=True)
@@ -25,8 +26,8 @@ def _text_score(a: str | None, b: str | None) -> tuple[float, list[str]]:
         reasons.append("text_contains")
         return 15.0, reasons
 
-    aset = {t for t in a.split() if len(t) > 3}
-    bset = {t for t in b.split() if len(t) > 3}
+    aset = tokenize(a)
+    bset = tokenize(b)
     if not aset or not bset:
         return 0.0, []
 
@@ -37,10 +38,12 @@ def _text_score(a: str | None, b: str | None) -> tuple[float, list[str]]:
     return 15.0 * overlap, reasons
 
 
-def score_match(invoice: Invoice, tx: BankTransaction, window_days: int = 3) -> Candidate | None:
-    if invoice.currency != tx.currency:
-        return None
+# Upper bound of the text component; `base_score(...) + TEXT_MAX` bounds `score_match`
+TEXT_MAX = 15.0
+
 
+def base_score(invoice: Invoice, tx: BankTransaction, window_days: int = 3) -> tuple[float, list[str]]:
+    """Amount and date components of `score_match` (no currency check, no text)."""
     score = 0.0
     reasons: list[str] = []
 
@@ -56,7 +59,26 @@ def score_match(invoice: Invoice, tx: BankTransaction, window_days: int = 3) ->
             score += bonus
             reasons.append(f"date_within_{diff_days}_days")
 
-    text_bonus, text_reasons = _text_score(invoice.description, tx.description)
+    return score, reasons
+
+
+def score_match(
+    invoice: Invoice,
+    tx: BankTransaction,
+    window_days: int = 3,
+    text: tuple[float, list[str]] | None = None,
+    base: tuple[float, list[str]] | None = None,
+) -> Candidate | None:
+    """`text` / `base` are precomputed `_text_score` / `base_score` results, if the caller has them."""
+    if invoice.currency != tx.currency:
+        return None
+
+    score, reasons = base if base is not None else base_score(invoice, tx, window_days)
+    reasons = list(reasons)
+
+    if text is None:
+        text = _text_score(invoice.description, tx.description)
+    text_bonus, text_reasons = text
     if text_bonus > 0:
         score += text_bonus
         reasons.extend(text_reasons)
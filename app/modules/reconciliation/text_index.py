@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from collections import defaultdict
+
+_GRAM = 3
+
+
+def tokenize(text: str) -> frozenset[str]:
+    """Tokens `_text_score` compares: whitespace-split, longer than 3 chars. Expects lowercased text."""
+    return frozenset(t for t in text.split() if len(t) > 3)
+
+
+def _grams(text: str) -> set[str]:
+    return {text[i:i + _GRAM] for i in range(len(text) - _GRAM + 1)}
+
+
+class TextIndex:
+    """Inverted index over transaction descriptions for `_text_score`.
+
+    Each description is lowercased and tokenized once. Token overlap counts
+    come from walking the token → transaction-id posting lists, and the
+    `a in b` / `b in a` substring checks from an exact-text map plus a
+    trigram index, instead of comparing every invoice with every
+    transaction.
+    """
+
+    def __init__(self, txs):
+        self._text: dict[int, str] = {}
+        self._ntok: dict[int, int] = {}
+        self._postings: dict[str, list[int]] = defaultdict(list)
+        self._by_text: dict[str, list[int]] = defaultdict(list)
+        self._grams: dict[str, list[int]] = defaultdict(list)
+
+        for tx in txs:
+            text = (tx.description or "").lower()
+            if not text:
+                continue
+            self._text[tx.id] = text
+            self._by_text[text].append(tx.id)
+            toks = tokenize(text)
+            self._ntok[tx.id] = len(toks)
+            for tok in toks:
+                self._postings[tok].append(tx.id)
+            for gram in _grams(text):
+                self._grams[gram].append(tx.id)
+
+        self._lengths = sorted({len(t) for t in self._by_text})
+
+    def __len__(self) -> int:
+        return len(self._text)
+
+    def text_scores(self, description: str | None) -> dict[int, tuple[float, list[str]]]:
+        """`_text_score(description, tx.description)` for every transaction where it is positive."""
+        a = (description or "").lower()
+        if not a:
+            return {}
+
+        out: dict[int, tuple[float, list[str]]] = {}
+        for tx_id in self.substring_hits(a):
+            out[tx_id] = (15.0, ["text_contains"])
+
+        aset = tokenize(a)
+        if not aset:
+            return out
+        for tx_id, shared in self.overlap_counts(aset).items():
+            if tx_id in out:
+                continue
+            overlap = shared / max(len(aset), self._ntok[tx_id])
+            out[tx_id] = (15.0 * overlap, ["text_overlap"])
+        return out
+
+    def overlap_counts(self, tokens) -> dict[int, int]:
+        counts: dict[int, int] = defaultdict(int)
+        for tok in tokens:
+            for tx_id in self._postings.get(tok, ()):
+                counts[tx_id] += 1
+        return counts
+
+    def substring_hits(self, text: str) -> set[int]:
+        """Ids whose description contains, or is contained in, `text` (lowercased)."""
+        if not text or not self._text:
+            return set()
+        return self._contained_in(text) | self._containing(text)
+
+    def _contained_in(self, text: str) -> set[int]:
+        out: set[int] = set()
+        for n in self._lengths:
+            if n > len(text):
+                break
+            for window in {text[i:i + n] for i in range(len(text) - n + 1)}:
+                out.update(self._by_text.get(window, ()))
+        return out
+
+    def _containing(self, text: str) -> set[int]:
+        if len(text) < _GRAM:
+            return {tx_id for tx_id, b in self._text.items() if text in b}
+
+        postings = sorted((self._grams.get(g, []) for g in _grams(text)), key=len)
+        if not postings[0]:
+            return set()
+        ids = set(postings[0])
+        for p in postings[1:]:
+            ids.intersection_update(p)
+            if not ids:
+                return ids
+        return {tx_id for tx_id in ids if text in self._text[tx_id]}
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Iterator
+
+from app.core.errors import BadRequestError
+from app.modules.reconciliation.candidates import amount_key
+from app.modules.reconciliation.scoring import Candidate
+from app.modules.reconciliation.text_index import TextIndex, tokenize
+
+try:
+    import numpy as np
+except ImportError:  # optional: pip install -e ".[numpy]"
+    np = None
+
+ENGINES = ("python", "numpy")
+
+INVOICE_BLOCK = 256
+TX_BLOCK = 4096
+
+# Component flags kept per positive pair so reasons are only built for survivors
+_AMOUNT = 1
+_DATE = 2
+_CONTAINS = 4
+_OVERLAP = 8
+
+
+class _TxColumns:
+    """Column arrays for one currency's transactions plus a token → position posting list."""
+
+    def __init__(self, txs: list, vocab: dict[str, int]):
+        n = len(txs)
+        self.ids = np.fromiter((tx.id for tx in txs), dtype=np.int64, count=n)
+        self.cents = np.fromiter((amount_key(tx.amount) for tx in txs), dtype=np.int64, count=n)
+        self.days = np.fromiter((tx.posted_at.toordinal() for tx in txs), dtype=np.int64, count=n)
+        self.pos_of = {tx.id: i for i, tx in enumerate(txs)}
+
+        ntok = np.zeros(n, dtype=np.int64)
+        tok_ids: list[int] = []
+        tok_pos: list[int] = []
+        for i, tx in enumerate(txs):
+            toks = tokenize((tx.description or "").lower())
+            ntok[i] = len(toks)
+            for t in toks:
+                tok_ids.append(vocab.setdefault(t, len(vocab)))
+                tok_pos.append(i)
+        self.ntok = ntok
+
+        tok_ids_a = np.asarray(tok_ids, dtype=np.int64)
+        order = np.argsort(tok_ids_a, kind="stable")
+        self.post_tok = tok_ids_a[order]
+        self.post_pos = np.asarray(tok_pos, dtype=np.int64)[order]
+
+
+class NumpyScorer:
+    """Batch equivalent of `score_match` over column arrays.
+
+    Amount and date components are computed as (invoice block × transaction
+    block) matrices with broadcasting; token overlap counts come from joining
+    invoice tokens against the transaction posting lists. Scores are built
+    with the same float operations in the same order as `score_match`, and
+    rounding/ranking happens in Python on the positive pairs only, so results
+    are identical to the Python engine.
+    """
+
+    def __init__(self, txs: list, window_days: int):
+        if np is None:
+            raise BadRequestError("engine 'numpy' requires numpy to be installed")
+        self.window_days = window_days
+        self._vocab: dict[str, int] = {}
+
+        by_currency: dict[str, list] = defaultdict(list)
+        for tx in txs:
+            by_currency[tx.currency].append(tx)
+        self._cols = {cur: _TxColumns(items, self._vocab) for cur, items in by_currency.items()}
+        self._text = {cur: TextIndex(items) for cur, items in by_currency.items()}
+
+    def rank(self, invoices: list, k: int) -> Iterator[tuple[object, list[Candidate]]]:
+        for start in range(0, len(invoices), INVOICE_BLOCK):
+            block = invoices[start:start + INVOICE_BLOCK]
+            ranked: dict[int, list[Candidate]] = {}
+
+            by_currency: dict[str, list] = defaultdict(list)
+            for inv in block:
+                by_currency[inv.currency].append(inv)
+            for cur, invs in by_currency.items():
+                cols = self._cols.get(cur)
+                if cols is None:
+                    continue
+                ranked.update(self._rank_block(cur, invs, cols, k))
+
+            for inv in block:
+                yield inv, ranked.get(inv.id, [])
+
+    def _rank_block(self, cur: str, invs: list, cols: _TxColumns, k: int) -> dict[int, list[Candidate]]:
+        w = self.window_days
+        r = len(invs)
+
+        inv_cents = np.fromiter((amount_key(i.amount) for i in invs), dtype=np.int64, count=r)
+        has_date = np.fromiter((i.invoice_date is not None for i in invs), dtype=bool, count=r)
+        inv_days = np.fromiter(
+            (i.invoice_date.toordinal() if i.invoice_date is not None else 0 for i in invs),
+            dtype=np.int64, count=r,
+        )
+
+        texts = [(i.description or "").lower() for i in invs]
+        inv_ntok = np.zeros(r, dtype=np.int64)
+        pair_row: list[int] = []
+        pair_tok: list[int] = []
+        contains: list[tuple[int, int]] = []
+        for row, text in enumerate(texts):
+            if not text:
+                continue
+            toks = tokenize(text)
+            inv_ntok[row] = len(toks)
+            for t in toks:
+                tid = self._vocab.get(t)
+                if tid is not None:
+                    pair_row.append(row)
+                    pair_tok.append(tid)
+            for tx_id in self._text[cur].substring_hits(text):
+                contains.append((row, cols.pos_of[tx_id]))
+
+        ov_row, ov_pos, ov_cnt = self._overlap_counts(cols, pair_row, pair_tok)
+        c_row = np.asarray([c[0] for c in contains], dtype=np.int64)
+        c_pos = np.asarray([c[1] for c in contains], dtype=np.int64)
+
+        positives: list[list[tuple[float, int, int, int]]] = [[] for _ in range(r)]
+        n = len(cols.ids)
+        for s in range(0, n, TX_BLOCK):
+            e = min(s + TX_BLOCK, n)
+
+            amt_hit = inv_cents[:, None] == cols.cents[None, s:e]
+            amt = np.where(amt_hit, 60.0, 0.0)
+
+            diff = np.abs(cols.days[None, s:e] - inv_days[:, None])
+            within = has_date[:, None] & (diff <= w)
+            bonus = np.where(within, 25.0 * (1.0 - (diff / max(w, 1))), 0.0)
+
+            overlap = np.zeros((r, e - s))
+            sel = (ov_pos >= s) & (ov_pos < e)
+            rows, pos = ov_row[sel], ov_pos[sel]
+            overlap[rows, pos - s] = ov_cnt[sel] / np.maximum(inv_ntok[rows], cols.ntok[pos])
+            text = 15.0 * overlap
+            has_contains = np.zeros((r, e - s), dtype=bool)
+            sel = (c_pos >= s) & (c_pos < e)
+            has_contains[c_row[sel], c_pos[sel] - s] = True
+            text[has_contains] = 15.0
+
+            raw = (amt + bonus) + text
+            rr, cc = np.nonzero(raw > 0)
+            if not len(rr):
+                continue
+            flags = (
+                np.where(amt_hit[rr, cc], _AMOUNT, 0)
+                | np.where(within[rr, cc], _DATE, 0)
+                | np.where(has_contains[rr, cc], _CONTAINS, 0)
+                | np.where(overlap[rr, cc] > 0, _OVERLAP, 0)
+            )
+            for row, col, score, flag, d in zip(
+                rr.tolist(), cc.tolist(), raw[rr, cc].tolist(), flags.tolist(), diff[rr, cc].tolist()
+            ):
+                positives[row].append((score, s + col, flag, d))
+
+        out: dict[int, list[Candidate]] = {}
+        for row, inv in enumerate(invs):
+            scored = [(round(score, 3), pos, flag, d) for score, pos, flag, d in positives[row]]
+            scored = [p for p in scored if p[0] > 0]
+            scored.sort(key=lambda p: (-p[0], int(cols.ids[p[1]])))
+            out[inv.id] = [
+                Candidate(
+                    invoice_id=inv.id,
+                    bank_transaction_id=int(cols.ids[pos]),
+                    score=score,
+                    reasons=_reasons(flag, d),
+                )
+                for score, pos, flag, d in scored[:k]
+            ]
+        return out
+
+    @staticmethod
+    def _overlap_counts(cols: _TxColumns, pair_row: list[int], pair_tok: list[int]):
+        """Shared-token counts per (invoice row, transaction position), via the posting lists."""
+        rows = np.asarray(pair_row, dtype=np.int64)
+        toks = np.asarray(pair_tok, dtype=np.int64)
+        lo = np.searchsorted(cols.post_tok, toks, side="left")
+        hi = np.searchsorted(cols.post_tok, toks, side="right")
+        lens = hi - lo
+        total = int(lens.sum())
+        if total == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+
+        offsets = np.repeat(lo - np.concatenate(([0], np.cumsum(lens)[:-1])), lens)
+        pos = cols.post_pos[offsets + np.arange(total)]
+        key = np.repeat(rows, lens) * len(cols.ids) + pos
+        uniq, counts = np.unique(key, return_counts=True)
+        return uniq // len(cols.ids), uniq % len(cols.ids), counts
+
+
+def _reasons(flag: int, diff_days: int) -> list[str]:
+    reasons: list[str] = []
+    if flag & _AMOUNT:
+        reasons.append("amount_exact")
+    if flag & _DATE:
+        reasons.append(f"date_within_{diff_days}_days")
+    if flag & _CONTAINS:
+        reasons.append("text_contains")
+    elif flag & _OVERLAP:
+        reasons.append("text_overlap")
+    return reasons
@@ -0,0 +1,111 @@
+"""Reconcile job workers.
+
+In-process: `submit` runs a job on a small thread pool inside the API
+process (`RECONCILE_JOB_THREADS`, 0 disables it). Standalone:
+
+    python -m app.modules.reconciliation.worker [--once] [--poll 1.0]
+
+polls `reconcile_jobs` for queued jobs against `DATABASE_URL`.
+
+Jobs are rows, so none are lost on restart: `recover` resubmits the queue
+when the API starts, and running jobs without a heartbeat for
+`RECONCILE_JOB_STALE_S` are requeued.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.models import ReconcileJob
+from app.modules.reconciliation.job_service import ReconcileJobService
+
+log = logging.getLogger(__name__)
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=settings.reconcile_job_threads,
+                thread_name_prefix="reconcile-job",
+            )
+        return _pool
+
+
+def run_job(session_factory: sessionmaker, job_id: int) -> None:
+    """Claim and run one job in its own session; no-op if another worker claimed it
+    or its tenant is busy, in which case the job running there picks it up next."""
+    with session_factory() as session:
+        jobs = ReconcileJobService(session)
+        if not jobs.claim(job_id):
+            return
+        jobs.run(job_id)
+        # jobs for this tenant submitted while it ran could not be claimed; run them now
+        tenant_id = session.get(ReconcileJob, job_id).tenant_id
+        while (next_id := jobs.claim_next(tenant_id)) is not None:
+            jobs.run(next_id)
+
+
+def submit(session_factory: sessionmaker, job_id: int) -> None:
+    """Run a freshly enqueued job in the background, unless in-process workers are disabled."""
+    if settings.reconcile_job_threads <= 0:
+        return
+    _executor().submit(run_job, session_factory, job_id)
+
+
+def recover(session_factory: sessionmaker) -> int:
+    """On startup: requeue jobs orphaned by a dead worker and resubmit the queue,
+    which in-process threads lost on restart; returns how many were resubmitted."""
+    with session_factory() as session:
+        job_ids = ReconcileJobService(session).recover(settings.reconcile_job_stale_s)
+    for job_id in job_ids:
+        submit(session_factory, job_id)
+    return len(job_ids)
+
+
+def run_pending(session_factory: sessionmaker) -> int:
+    """Run queued jobs until the queue is empty; returns how many ran."""
+    ran = 0
+    with session_factory() as session:
+        jobs = ReconcileJobService(session)
+        while (job_id := jobs.claim_next()) is not None:
+            jobs.run(job_id)
+            ran += 1
+    return ran
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run queued reconcile jobs")
+    parser.add_argument("--once", action="store_true", help="drain the queue and exit")
+    parser.add_argument("--poll", type=float, default=1.0, help="seconds between polls of an empty queue")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    from app.db.init_db import init_db
+    from app.db.session import SessionLocal
+
+    init_db()
+    while True:
+        # also picks up jobs orphaned by another worker that died
+        with SessionLocal() as session:
+            ReconcileJobService(session).recover(settings.reconcile_job_stale_s)
+        ran = run_pending(SessionLocal)
+        if ran:
+            log.info("ran %d reconcile job(s)", ran)
+        if args.once:
+            return
+        time.sleep(args.poll)
+
+
+if __name__ == "__main__":
+    main()
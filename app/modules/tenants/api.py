@@ -1,17 +1,16 @@
 from __future__ import annotations
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
 
-from app.db.session import get_session
+from app.db.session import Db, get_db
 from app.modules.tenants.schemas import TenantCreate, TenantOut
 from app.modules.tenants.service import TenantService
 
 router = APIRouter(tags=["tenants"])
 
 @router.post("/tenants", response_model=TenantOut)
-def create_tenant(payload: TenantCreate, session: Session = Depends(get_session)) -> TenantOut:
-    return TenantService(session).create(payload.name)
+async def create_tenant(payload: TenantCreate, db: Db = Depends(get_db)) -> TenantOut:
+    return await db.run(lambda s: TenantOut.model_validate(TenantService(s).create(payload.name)))
 
 @router.get("/tenants", response_model=list[TenantOut])
-def list_tenants(session: Session = Depends(get_session)) -> list[TenantOut]:
-    return TenantService(session).list()
+async def list_tenants(db: Db = Depends(get_db)) -> list[TenantOut]:
+    return await db.run(lambda s: [TenantOut.model_validate(t) for t in TenantService(s).list()])
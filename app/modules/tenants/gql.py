@@ -2,6 +2,7 @@ from __future__ import annotations
 import strawberry
 from sqlalchemy.orm import Session
 
+from app.db.session import Db
 from app.modules.tenants.service import TenantService
 
 @strawberry.type
@@ -16,15 +17,18 @@ class CreateTenantInput:
 @strawberry.type
 class TenantsQuery:
     @strawberry.field
-    def tenants(self, info) -> list[TenantType]:
-        session: Session = info.context["session"]
-        items = TenantService(session).list()
-        return [TenantType(id=t.id, name=t.name) for t in items]
+    async def tenants(self, info) -> list[TenantType]:
+        db: Db = info.context["db"]
+        return await db.run(lambda s: [TenantType(id=t.id, name=t.name) for t in TenantService(s).list()])
 
 @strawberry.type
 class TenantsMutation:
     @strawberry.mutation
-    def create_tenant(self, info, input: CreateTenantInput) -> TenantType:
-        session: Session = info.context["session"]
-        t = TenantService(session).create(input.name)
-        return TenantType(id=t.id, name=t.name)
+    async def create_tenant(self, info, input: CreateTenantInput) -> TenantType:
+        db: Db = info.context["db"]
+
+        def create(session: Session) -> TenantType:
+            t = TenantService(session).create(input.name)
+            return TenantType(id=t.id, name=t.name)
+
+        return await db.run(create)
@@ -1,21 +1,80 @@
 from __future__ import annotations
-from fastapi import APIRouter, Depends, Header, HTTPException
-from sqlalchemy.orm import Session
+import hashlib
+import tempfile
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
 
-from app.db.session import get_session
-from app.modules.transactions.schemas import BankTransactionIn, BankImportResult
+from app.db.session import Db, get_db
+from app.modules.transactions.schemas import BankTransactionIn, BankTransactionOut, BankImportResult
 from app.modules.transactions.service import BankTransactionService
+from app.modules.transactions.parsers import CONTENT_TYPES, FILE_FORMATS, parse_statement
+from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.errors import BadRequestError
+
+# request bodies above this are spooled to a temp file instead of memory
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
 
 router = APIRouter(tags=["bank-transactions"])
 
+@router.get("/tenants/{tenant_id}/bank-transactions", response_model=list[BankTransactionOut])
+async def list_bank_transactions(
+    tenant_id: int,
+    response: Response,
+    limit: int = 100,
+    cursor: str | None = None,
+    db: Db = Depends(get_db),
+) -> list[BankTransactionOut]:
+    def load(session):
+        page = BankTransactionService(session).list(tenant_id, limit=limit, cursor=cursor)
+        return [BankTransactionOut.model_validate(tx) for tx in page.items], page.next_cursor
+
+    items, next_cursor = await db.run(load)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return items
+
 @router.post("/tenants/{tenant_id}/bank-transactions/import", response_model=BankImportResult)
-def import_bank_transactions(
+async def import_bank_transactions(
     tenant_id: int,
     payload: list[BankTransactionIn],
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
-    session: Session = Depends(get_session),
+    db: Db = Depends(get_db),
+) -> BankImportResult:
+    if not idempotency_key:
+        raise HTTPException(status_code=400, detail="Idempotency-Key header is required")
+    items = [p.model_dump() for p in payload]
+    result = await db.offload(lambda s: BankTransactionService(s).import_bulk(tenant_id, idempotency_key, items))
+    return BankImportResult(**result)
+
+@router.post("/tenants/{tenant_id}/bank-transactions/import/file", response_model=BankImportResult)
+async def import_bank_statement(
+    tenant_id: int,
+    request: Request,
+    format: str | None = Query(default=None, description="csv | ndjson | camt053; defaults from Content-Type"),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    db: Db = Depends(get_db),
 ) -> BankImportResult:
+    """Streaming statement upload: the raw body is spooled (hashing it on the way)
+    and parsed incrementally, so memory does not grow with the file size."""
     if not idempotency_key:
         raise HTTPException(status_code=400, detail="Idempotency-Key header is required")
-    result = BankTransactionService(session).import_bulk(tenant_id, idempotency_key, [p.model_dump() for p in payload])
+    fmt = format or CONTENT_TYPES.get(request.headers.get("content-type", "").split(";")[0].strip())
+    if fmt not in FILE_FORMATS:
+        raise BadRequestError(f"format must be one of {', '.join(FILE_FORMATS)}")
+
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as spool:
+        digest = hashlib.sha256(f"file:{fmt}:".encode())
+        async for chunk in request.stream():
+            digest.update(chunk)
+            spool.write(chunk)
+
+        def open_rows():
+            spool.seek(0)
+            return parse_statement(fmt, spool)
+
+        result = await db.offload(
+            lambda s: BankTransactionService(s).import_file(
+                tenant_id, idempotency_key, digest.hexdigest(), open_rows, settings.import_chunk_size
+            )
+        )
     return BankImportResult(**result)
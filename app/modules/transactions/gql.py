@@ -3,6 +3,7 @@ import datetime as dt
 import strawberry
 from sqlalchemy.orm import Session
 
+from app.db.session import Db
 from app.modules.transactions.service import BankTransactionService
 
 @strawberry.type
@@ -15,6 +16,11 @@ class BankTransactionType:
     currency: str
     description: str
 
+@strawberry.type
+class BankTransactionPage:
+    items: list[BankTransactionType]
+    next_cursor: str | None
+
 @strawberry.input
 class BankTransactionInput:
     external_id: str | None = None
@@ -30,37 +36,55 @@ class BankImportResultType:
     duplicate_external_ids: int
     transaction_ids: list[int]
 
+def _transaction_type(tx) -> BankTransactionType:
+    return BankTransactionType(
+        id=tx.id,
+        tenant_id=tx.tenant_id,
+        external_id=tx.external_id,
+        posted_at=tx.posted_at.isoformat(),
+        amount=float(tx.amount),
+        currency=tx.currency,
+        description=tx.description,
+    )
+
 @strawberry.type
 class TransactionsQuery:
     @strawberry.field
-    def bank_transactions(
+    async def bank_transactions(
         self,
         info,
         tenant_id: int,
         limit: int = 100,
         offset: int = 0,
     ) -> list[BankTransactionType]:
-        session: Session = info.context["session"]
-        transactions = BankTransactionService(session).list(tenant_id, limit=limit, offset=offset)
-        return [
-            BankTransactionType(
-                id=tx.id,
-                tenant_id=tx.tenant_id,
-                external_id=tx.external_id,
-                posted_at=tx.posted_at.isoformat(),
-                amount=float(tx.amount),
-                currency=tx.currency,
-                description=tx.description,
-            )
-            for tx in transactions
-        ]
+        db: Db = info.context["db"]
+        # offset paging for existing clients; see bank_transactions_page
+        return await db.run(
+            lambda s: [_transaction_type(tx) for tx in BankTransactionService(s).list_offset(tenant_id, limit, offset)]
+        )
+
+    @strawberry.field
+    async def bank_transactions_page(
+        self,
+        info,
+        tenant_id: int,
+        limit: int = 100,
+        cursor: str | None = None,
+    ) -> BankTransactionPage:
+        db: Db = info.context["db"]
+
+        def load(session: Session) -> BankTransactionPage:
+            page = BankTransactionService(session).list(tenant_id, limit=limit, cursor=cursor)
+            return BankTransactionPage(items=[_transaction_type(tx) for tx in page.items], next_cursor=page.next_cursor)
+
+        return await db.run(load)
 
 
 @strawberry.type
 class TransactionsMutation:
     @strawberry.mutation
-    def import_bank_transactions(self, info, tenant_id: int, input: list[BankTransactionInput], idempotency_key: str) -> BankImportResultType:
-        session: Session = info.context["session"]
+    async def import_bank_transactions(self, info, tenant_id: int, input: list[BankTransactionInput], idempotency_key: str) -> BankImportResultType:
+        db: Db = info.context["db"]
         items = []
         for it in input:
             items.append({
@@ -70,7 +94,7 @@ class TransactionsMutation:
                 'currency': it.currency,
                 'description': it.description,
             })
-        result = BankTransactionService(session).import_bulk(tenant_id, idempotency_key, items)
+        result = await db.offload(lambda s: BankTransactionService(s).import_bulk(tenant_id, idempotency_key, items))
         return BankImportResultType(
             imported=result.get('imported', 0),
             deduped=result.get('deduped', 0),
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import json
+from typing import Callable, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.errors import ConflictError
+from app.db.expiry import TTLCache, aware, process_key, purge_before
+from app.db.models import IdempotencyKey, utcnow
+
+_ENCODER = json.JSONEncoder(sort_keys=True, separators=(",", ":"), default=str)
+
+
+def canonical_hash(items: Iterable) -> str:
+    """sha256 of `json.dumps(list(items), sort_keys=True, separators=(",", ":"), default=str)`.
+
+    Items are encoded and hashed one at a time, so the digest matches the
+    whole-payload dump without ever building that string.
+    """
+    digest = hashlib.sha256(b"[")
+    for i, item in enumerate(items):
+        if i:
+            digest.update(b",")
+        digest.update(_ENCODER.encode(item).encode("utf-8"))
+    digest.update(b"]")
+    return digest.hexdigest()
+
+
+def encode_ids(ids: list[int]) -> list[list[int]]:
+    """Run-length ranges `[first, count]` of consecutive ids; a bulk insert is usually one run."""
+    runs: list[list[int]] = []
+    for i in ids:
+        if runs and runs[-1][0] + runs[-1][1] == i:
+            runs[-1][1] += 1
+        else:
+            runs.append([i, 1])
+    return runs
+
+
+def decode_ids(runs: list[list[int]]) -> list[int]:
+    out: list[int] = []
+    for first, count in runs:
+        out.extend(range(first, first + count))
+    return out
+
+
+def pack_response(result: dict) -> str:
+    """Stored form of an import result: id lists (`*_ids`) as ranges (`*_id_ranges`)."""
+    stored = {}
+    for k, v in result.items():
+        if k.endswith("_ids") and isinstance(v, list):
+            stored[k[:-1] + "_ranges"] = encode_ids(v)
+        else:
+            stored[k] = v
+    return json.dumps(stored, separators=(",", ":"))
+
+
+def unpack_response(response_json: str) -> dict:
+    """Inverse of `pack_response`; rows stored before ranges were introduced pass through."""
+    result = {}
+    for k, v in json.loads(response_json).items():
+        if k.endswith("_id_ranges"):
+            result[k[:-len("_ranges")] + "s"] = decode_ids(v)
+        else:
+            result[k] = v
+    return result
+
+
+def ttl() -> dt.timedelta:
+    return dt.timedelta(hours=settings.idempotency_ttl_hours)
+
+
+def expires_at(created_at: dt.datetime) -> dt.datetime:
+    return aware(created_at) + ttl()
+
+
+# committed `(request_hash, response_json)` records; they never change once committed
+# and are only deleted after they expire, so a hit answers a replay (or a 409) without the DB
+replay_cache = TTLCache(settings.idempotency_cache_size)
+
+
+def replay(session: Session, tenant_id: int, key: str, req_hash: str) -> dict | None:
+    """Stored response for a replayed key, from the per-process cache or the DB.
+
+    Raises ConflictError if the key was used with a different payload. A
+    response with `partial` set is the progress of an unfinished chunked
+    request rather than a final answer.
+    """
+    cache_key = process_key(session, tenant_id, key)
+    hit = replay_cache.get(cache_key)
+    if hit is not None:
+        stored_hash, response_json = hit
+    else:
+        existing = session.scalars(
+            select(IdempotencyKey).where(IdempotencyKey.tenant_id == tenant_id, IdempotencyKey.key == key)
+        ).first()
+        if not existing:
+            return None
+        expires = expires_at(existing.created_at)
+        if expires <= utcnow():
+            # past retention but not purged yet: the key is free again
+            session.delete(existing)
+            session.flush()
+            return None
+        stored_hash, response_json = existing.request_hash, existing.response_json
+
+    if stored_hash != req_hash:
+        raise ConflictError("Idempotency-Key reused with different payload")
+    result = unpack_response(response_json)
+    # partial progress still changes, so only final responses are cached
+    if hit is None and not result.get("partial"):
+        replay_cache.put(cache_key, (stored_hash, response_json), expires)
+    return result
+
+
+def store(session: Session, tenant_id: int, key: str, req_hash: str, result: dict,
+          partial: bool = False, resumed: bool = False) -> Callable[[], None]:
+    """Add the idempotency record, or update it when an earlier `partial` one
+    exists (`resumed`). Call the returned function after commit to cache a
+    final response."""
+    response_json = pack_response({**result, "partial": True} if partial else result)
+    record = None
+    if resumed:
+        record = session.scalars(
+            select(IdempotencyKey).where(IdempotencyKey.tenant_id == tenant_id, IdempotencyKey.key == key)
+        ).one()
+    if record is None:
+        record = IdempotencyKey(tenant_id=tenant_id, key=key, request_hash=req_hash, created_at=utcnow())
+        session.add(record)
+    record.response_json = response_json
+    if partial:
+        return lambda: None
+    cache_key = process_key(session, tenant_id, key)
+    expires = expires_at(record.created_at)
+    return lambda: replay_cache.put(cache_key, (req_hash, response_json), expires)
+
+
+def purge_expired(session: Session, batch_size: int = 1000, now: dt.datetime | None = None) -> int:
+    """Delete expired idempotency records in batches of `batch_size`, committing each."""
+    return purge_before(session, IdempotencyKey.id, IdempotencyKey.created_at, (now or utcnow()) - ttl(), batch_size)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from typing import IO, Iterator
+
+from app.core.errors import BadRequestError
+
+FILE_FORMATS = ("csv", "ndjson", "camt053")
+
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/xml": "camt053",
+    "text/xml": "camt053",
+}
+
+
+def parse_statement(fmt: str, fp: IO[bytes]) -> Iterator[tuple[int, dict]]:
+    """Yield `(position, raw row)` from a bank statement file, one row at a time.
+
+    Rows use the JSON import field names; values are unvalidated strings.
+    `position` is the line (CSV/NDJSON) or entry number (CAMT) for error messages.
+    """
+    if fmt == "csv":
+        return _parse_csv(fp)
+    if fmt == "ndjson":
+        return parse_ndjson(fp)
+    if fmt == "camt053":
+        return _parse_camt053(fp)
+    raise BadRequestError(f"format must be one of {', '.join(FILE_FORMATS)}")
+
+
+@contextmanager
+def _text(fp: IO[bytes]) -> Iterator[io.TextIOWrapper]:
+    text = io.TextIOWrapper(fp, encoding="utf-8-sig", newline="")
+    try:
+        yield text
+    finally:
+        # a collected wrapper would close `fp`, which the caller reads again
+        text.detach()
+
+
+def _parse_csv(fp: IO[bytes]) -> Iterator[tuple[int, dict]]:
+    with _text(fp) as text:
+        reader = csv.DictReader(text)
+        missing = {"posted_at", "amount", "description"} - set(reader.fieldnames or ())
+        if missing:
+            raise BadRequestError(f"CSV header is missing: {', '.join(sorted(missing))}")
+        for row in reader:
+            # blank cells mean "not given" so field defaults apply
+            yield reader.line_num, {k: v for k, v in row.items() if k and v not in (None, "")}
+
+
+def parse_ndjson(fp: IO[bytes]) -> Iterator[tuple[int, dict]]:
+    """`(line number, object)` per non-blank line; not specific to statements."""
+    with _text(fp) as text:
+        for n, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise BadRequestError(f"line {n}: invalid JSON ({exc.msg})")
+            if not isinstance(row, dict):
+                raise BadRequestError(f"line {n}: expected a JSON object")
+            yield n, row
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _find(elem: ET.Element, *path: str) -> ET.Element | None:
+    """Namespace-agnostic child lookup by local names."""
+    for name in path:
+        elem = next((c for c in elem if _local(c.tag) == name), None)
+        if elem is None:
+            return None
+    return elem
+
+
+def _find_text(elem: ET.Element, *path: str) -> str | None:
+    found = _find(elem, *path)
+    return found.text.strip() if found is not None and found.text else None
+
+
+def _camt_entry(ntry: ET.Element) -> dict:
+    amt = _find(ntry, "Amt")
+    amount = amt.text.strip() if amt is not None and amt.text else None
+    if amount and _find_text(ntry, "CdtDbtInd") == "DBIT":
+        amount = f"-{amount}"
+
+    tx = _find(ntry, "NtryDtls", "TxDtls")
+    remittance = []
+    if tx is not None and (rmt := _find(tx, "RmtInf")) is not None:
+        remittance = [c.text.strip() for c in rmt if _local(c.tag) == "Ustrd" and c.text]
+
+    row = {
+        "external_id": (
+            _find_text(ntry, "AcctSvcrRef")
+            or _find_text(ntry, "NtryRef")
+            or (tx is not None and _find_text(tx, "Refs", "EndToEndId"))
+            or None
+        ),
+        "posted_at": (
+            _find_text(ntry, "BookgDt", "DtTm") or _find_text(ntry, "BookgDt", "Dt")
+            or _find_text(ntry, "ValDt", "DtTm") or _find_text(ntry, "ValDt", "Dt")
+        ),
+        "amount": amount,
+        "currency": amt.get("Ccy") if amt is not None else None,
+        "description": " ".join(remittance) or _find_text(ntry, "AddtlNtryInf"),
+    }
+    return {k: v for k, v in row.items() if v is not None}
+
+
+def _parse_camt053(fp: IO[bytes]) -> Iterator[tuple[int, dict]]:
+    """ISO 20022 camt.053 `Ntry` elements, any namespace version.
+
+    Each entry is detached from its parent once read, so memory stays flat
+    however many entries the statement has. Debits get a negative amount.
+    """
+    stack: list[ET.Element] = []
+    n = 0
+    try:
+        for event, elem in ET.iterparse(fp, events=("start", "end")):
+            if event == "start":
+                stack.append(elem)
+                continue
+            stack.pop()
+            if _local(elem.tag) != "Ntry":
+                continue
+            n += 1
+            yield n, _camt_entry(elem)
+            if stack:
+                stack[-1].remove(elem)
+    except ET.ParseError as exc:
+        raise BadRequestError(f"invalid CAMT.053 XML: {exc}")
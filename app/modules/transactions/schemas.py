@@ -10,6 +10,16 @@ class BankTransactionIn(BaseModel):
     currency: str = "USD"
     description: str = Field(min_length=1, max_length=500)
 
+class BankTransactionOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    tenant_id: int
+    external_id: str | None
+    posted_at: dt.datetime
+    amount: float
+    currency: str
+    description: str
+
 class BankImportResult(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
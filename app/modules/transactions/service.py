@@ -1,20 +1,59 @@
 from __future__ import annotations
-import json, hashlib
+import datetime as dt
+from contextlib import closing
+from typing import Callable, Iterator
+from pydantic import ValidationError as PydanticValidationError
 from sqlalchemy.orm import Session
-from sqlalchemy import select
-from app.db.models import BankTransaction, IdempotencyKey
-from app.core.errors import ConflictError, BadRequestError
+from sqlalchemy import select, insert, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from app.db.models import BankTransaction, EXTERNAL_ID_PRESENT
+from app.core.errors import BadRequestError
+from app.core.pagination import Page, check_limit, decode_cursor, encode_cursor
+from app.modules.transactions.schemas import BankTransactionIn
+from app.modules.transactions import idempotency
+from app.modules.transactions.idempotency import canonical_hash
 
-def _canonical_hash(payload) -> str:
-    data = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
-    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+# bound parameters per IN (...) lookup in the fallback import path
+IN_CHUNK = 500
+
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+def _result(transaction_ids: list[int], n_items: int) -> dict:
+    deduped = n_items - len(transaction_ids)
+    return {
+        "imported": len(transaction_ids),
+        "deduped": deduped,
+        "duplicate_external_ids": deduped,
+        "transaction_ids": transaction_ids,
+    }
 
 class BankTransactionService:
     def __init__(self, session: Session):
         self.session = session
 
-    def list(self, tenant_id: int, limit: int = 100, offset: int = 0) -> list[BankTransaction]:
-        """List bank transactions for a tenant with pagination"""
+    def list(self, tenant_id: int, limit: int = 100, cursor: str | None = None) -> Page[BankTransaction]:
+        """Bank transactions newest first, keyset-paginated on (posted_at, id).
+
+        `cursor` is the previous page's `next_cursor`; every page is an index
+        range scan on (tenant_id, posted_at, id), however deep.
+        """
+        check_limit(limit)
+        stmt = select(BankTransaction).where(BankTransaction.tenant_id == tenant_id)
+        if cursor:
+            posted_at, last_id = decode_cursor(cursor, dt.datetime, int)
+            stmt = stmt.where(tuple_(BankTransaction.posted_at, BankTransaction.id) < (posted_at, last_id))
+        stmt = stmt.order_by(BankTransaction.posted_at.desc(), BankTransaction.id.desc()).limit(limit + 1)
+
+        items = list(self.session.scalars(stmt).all())
+        if len(items) <= limit:
+            return Page(items, None)
+        items = items[:limit]
+        return Page(items, encode_cursor(items[-1].posted_at.isoformat(), items[-1].id))
+
+    def list_offset(self, tenant_id: int, limit: int = 100, offset: int = 0) -> list[BankTransaction]:
+        """LIMIT/OFFSET listing in the same order, for the legacy `bankTransactions`
+        GraphQL field; deep offsets get slower, prefer `list`. Takes any limit,
+        as that field always has; `MAX_PAGE_SIZE` only applies to cursor pages."""
         stmt = (
             select(BankTransaction)
             .where(BankTransaction.tenant_id == tenant_id)
@@ -23,75 +62,155 @@ class BankTransactionService:
             .offset(offset)
         )
         return list(self.session.scalars(stmt).all())
-    def import_bulk(self, tenant_id: int, idempotency_key: str, items: list[dict]) -> dict:
-        req_hash = _canonical_hash(items)
 
-        existing = self.session.scalars(
-            select(IdempotencyKey).where(IdempotencyKey.tenant_id == tenant_id, IdempotencyKey.key == idempotency_key)
-        ).first()
+    def import_bulk(self, tenant_id: int, idempotency_key: str, items: list[dict]) -> dict:
+        req_hash = canonical_hash(items)
 
-        if existing:
-            if existing.request_hash != req_hash:
-                raise ConflictError("Idempotency-Key reused with different payload")
-            return json.loads(existing.response_json)
+        replay = idempotency.replay(self.session, tenant_id, idempotency_key, req_hash)
+        if replay is not None:
+            return replay
 
         if not items:
             raise BadRequestError("Items list must not be empty")
 
-        imported = 0
-        duplicate_external_ids = 0
-        transaction_ids: list[int] = []
-
         required = ("posted_at", "amount", "description")
+        for it in items:
+            for k in required:
+                if k not in it or it[k] is None:
+                    raise BadRequestError(f"Missing required field: {k}")
 
         try:
-            for it in items:
-                for k in required:
-                    if k not in it or it[k] is None:
-                        raise BadRequestError(f"Missing required field: {k}")
-
-                ext_id = it.get("external_id")
-                if ext_id:
-                    dup = self.session.scalars(
-                        select(BankTransaction).where(
-                            BankTransaction.tenant_id == tenant_id,
-                            BankTransaction.external_id == ext_id,
-                        )
-                    ).first()
-                    if dup:
-                        duplicate_external_ids += 1
-                        continue
-
-                tx = BankTransaction(
-                    tenant_id=tenant_id,
-                    external_id=ext_id,
-                    posted_at=it["posted_at"],
-                    amount=it["amount"],
-                    currency=it.get("currency", "USD"),
-                    description=it["description"],
-                )
-                self.session.add(tx)
-                self.session.flush()
-                transaction_ids.append(tx.id)
-                imported += 1
-
-            result = {
-                "imported": imported,
-                "deduped": duplicate_external_ids,
-                "duplicate_external_ids": duplicate_external_ids,
-                "transaction_ids": transaction_ids,
-            }
-
-            idem = IdempotencyKey(
-                tenant_id=tenant_id,
-                key=idempotency_key,
-                request_hash=req_hash,
-                response_json=json.dumps(result),
-            )
-            self.session.add(idem)
+            transaction_ids = self._insert(tenant_id, self._rows(tenant_id, items))
+            result = _result(transaction_ids, len(items))
+            remember = idempotency.store(self.session, tenant_id, idempotency_key, req_hash, result)
+            self.session.commit()
+            remember()
+            return result
+        except Exception:
+            self.session.rollback()
+            raise
 
+    def import_file(
+        self,
+        tenant_id: int,
+        idempotency_key: str,
+        req_hash: str,
+        open_rows: Callable[[], Iterator[tuple[int, dict]]],
+        chunk_size: int,
+    ) -> dict:
+        """Import a statement file row by row, committing every `chunk_size` rows.
+
+        `req_hash` covers the whole file. `open_rows()` re-reads the parsed
+        rows from the start: the first pass validates everything so a bad
+        row rejects the file before anything is written, the second inserts.
+        Each chunk commits together with the key's progress (`rows_done`); a
+        retry after a failure skips the rows already committed and resumes
+        behind them, and one after success replays the stored result.
+        """
+        progress = idempotency.replay(self.session, tenant_id, idempotency_key, req_hash)
+        if progress is not None and not progress.get("partial"):
+            return progress
+
+        total = sum(1 for _ in self._validated(open_rows()))
+        if not total:
+            raise BadRequestError("Statement contains no transactions")
+
+        transaction_ids: list[int] = list(progress["transaction_ids"]) if progress else []
+        skip = progress["rows_done"] if progress else 0
+        resumed = progress is not None
+        try:
+            chunk: list[dict] = []
+            for n, item in enumerate(self._validated(open_rows())):
+                if n < skip:
+                    continue  # committed by an earlier attempt
+                chunk.append(item)
+                if len(chunk) == chunk_size:
+                    transaction_ids += self._insert(tenant_id, self._rows(tenant_id, chunk))
+                    chunk = []
+                    if n + 1 < total:
+                        done = {**_result(transaction_ids, n + 1), "rows_done": n + 1}
+                        idempotency.store(self.session, tenant_id, idempotency_key, req_hash, done,
+                                          partial=True, resumed=resumed)
+                        resumed = True
+                    self.session.commit()
+            transaction_ids += self._insert(tenant_id, self._rows(tenant_id, chunk))
+
+            result = _result(transaction_ids, total)
+            remember = idempotency.store(self.session, tenant_id, idempotency_key, req_hash, result,
+                                         resumed=resumed)
             self.session.commit()
+            remember()
             return result
         except Exception:
             self.session.rollback()
             raise
+
+    @staticmethod
+    def _validated(rows: Iterator[tuple[int, dict]]) -> Iterator[dict]:
+        # closing() releases the parser while the caller's file is still open
+        with closing(rows):
+            for pos, raw in rows:
+                try:
+                    yield BankTransactionIn.model_validate(raw).model_dump()
+                except PydanticValidationError as exc:
+                    err = exc.errors()[0]
+                    field = ".".join(str(p) for p in err["loc"])
+                    raise BadRequestError(f"row {pos}: {field}: {err['msg']}")
+
+    @staticmethod
+    def _rows(tenant_id: int, items: list[dict]) -> list[dict]:
+        rows: list[dict] = []
+        seen: set[str] = set()
+        for it in items:
+            ext_id = it.get("external_id")
+            if ext_id:
+                # repeated earlier in this batch; stored duplicates are skipped by the insert
+                if ext_id in seen:
+                    continue
+                seen.add(ext_id)
+            rows.append({
+                "tenant_id": tenant_id,
+                "external_id": ext_id,
+                "posted_at": it["posted_at"],
+                "amount": it["amount"],
+                "currency": it.get("currency", "USD"),
+                "description": it["description"],
+            })
+        return rows
+
+    def _insert(self, tenant_id: int, rows: list[dict]) -> list[int]:
+        """Batched INSERT ... ON CONFLICT DO NOTHING RETURNING id.
+
+        The partial unique index on (tenant_id, external_id) makes the
+        database skip rows whose external id is already stored, including
+        ones committed by a concurrent import. Only inserted rows come back;
+        ids are assigned in VALUES order, so sorting them gives payload order.
+        """
+        if not rows:
+            return []
+        dialect = self.session.get_bind().dialect.name
+        if dialect not in _UPSERT_INSERTS:
+            return self._insert_checked(tenant_id, rows)
+
+        stmt = (
+            _UPSERT_INSERTS[dialect](BankTransaction)
+            .on_conflict_do_nothing(index_elements=["tenant_id", "external_id"], index_where=EXTERNAL_ID_PRESENT)
+            .returning(BankTransaction.id)
+        )
+        return sorted(self.session.scalars(stmt, rows))
+
+    def _insert_checked(self, tenant_id: int, rows: list[dict]) -> list[int]:
+        """Fallback for dialects without ON CONFLICT: drop stored external ids first (chunked IN queries)."""
+        ids = sorted({r["external_id"] for r in rows if r["external_id"]})
+        found: set[str] = set()
+        for i in range(0, len(ids), IN_CHUNK):
+            found.update(self.session.scalars(
+                select(BankTransaction.external_id).where(
+                    BankTransaction.tenant_id == tenant_id,
+                    BankTransaction.external_id.in_(ids[i:i + IN_CHUNK]),
+                )
+            ))
+        rows = [r for r in rows if not r["external_id"] or r["external_id"] not in found]
+        if not rows:
+            return []
+        return sorted(self.session.scalars(insert(BankTransaction).returning(BankTransaction.id), rows))
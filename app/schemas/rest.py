@@ -2,6 +2,6 @@ from __future__ import annotations
 
 # Backwards-compatible re-exports.
 from app.modules.tenants.schemas import TenantCreate, TenantOut
-from app.modules.invoices.schemas import InvoiceCreate, InvoiceOut
-from app.modules.transactions.schemas import BankTransactionIn, BankImportResult
+from app.modules.invoices.schemas import InvoiceCreate, InvoiceOut, InvoiceBulkResult
+from app.modules.transactions.schemas import BankTransactionIn, BankTransactionOut, BankImportResult
 from app.modules.reconciliation.schemas import ReconcileRequest, MatchOut, ExplainOut
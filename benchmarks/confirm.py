@@ -0,0 +1,112 @@
+"""Per-confirm latency under contention.
+
+    python -m benchmarks.confirm --invoices 2000 --threads 8
+
+Reconciles a synthetic tenant, then has every thread walk all proposals in
+its own random order calling `MatchService.confirm`, so most calls race
+for an invoice or transaction that another thread already took. Reports
+latency percentiles for accepted and rejected confirms, statements per
+confirm, and checks that no invoice or transaction ended up confirmed twice.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.errors import BadRequestError, ConflictError
+from app.db.models import Base, Match
+from app.modules.reconciliation.match_service import MatchService
+from app.modules.reconciliation.reconcile_service import ReconciliationService
+from benchmarks.datagen import generate_tenant
+from benchmarks.metrics import StatementCounter
+
+
+def _pct(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))], 3)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--invoices", type=int, default=2000)
+    p.add_argument("--threads", type=int, default=8)
+    args = p.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        engine = create_engine(f"sqlite:///{path}", future=True, connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(bind=engine, autoflush=False, future=True)
+        with factory() as session:
+            tid = generate_tenant(session, "bench", args.invoices, args.invoices * 2)
+            match_ids = [m.id for m in ReconciliationService(session).reconcile(tid)]
+
+        accepted: list[float] = []
+        rejected: list[float] = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(args.threads)
+
+        def run(seed: int) -> None:
+            ids = match_ids[:]
+            random.Random(seed).shuffle(ids)
+            with factory() as session:
+                service = MatchService(session)
+                barrier.wait()
+                for match_id in ids:
+                    started = time.perf_counter()
+                    try:
+                        service.confirm(tid, match_id)
+                        bucket = accepted
+                    except (ConflictError, BadRequestError):
+                        bucket = rejected
+                    with lock:
+                        bucket.append((time.perf_counter() - started) * 1000)
+
+        threads = [threading.Thread(target=run, args=(n,)) for n in range(args.threads)]
+        started = time.perf_counter()
+        with StatementCounter(engine) as statements:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        wall = time.perf_counter() - started
+
+        with factory() as session:
+            confirmed = select(Match).where(Match.tenant_id == tid, Match.status == "confirmed").subquery()
+            n_confirmed = session.scalar(select(func.count()).select_from(confirmed))
+            n_invoices = session.scalar(select(func.count(func.distinct(confirmed.c.invoice_id))))
+            n_txs = session.scalar(select(func.count(func.distinct(confirmed.c.bank_transaction_id))))
+
+        calls = len(accepted) + len(rejected)
+        print(json.dumps({
+            "proposals": len(match_ids),
+            "threads": args.threads,
+            "calls": calls,
+            "accepted": len(accepted),
+            "rejected": len(rejected),
+            "wall_s": round(wall, 3),
+            "accepted_ms": {"p50": _pct(accepted, 0.5), "p95": _pct(accepted, 0.95),
+                            "mean": round(statistics.fmean(accepted), 3) if accepted else None},
+            "rejected_ms": {"p50": _pct(rejected, 0.5), "p95": _pct(rejected, 0.95)},
+            "statements_per_call": round(statements.count / calls, 2) if calls else None,
+            "one_per_invoice_and_transaction": n_confirmed == n_invoices == n_txs == len(accepted),
+        }, indent=2))
+        engine.dispose()
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
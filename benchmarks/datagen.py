@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import datetime as dt
+import random
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.db.models import Tenant, Invoice, BankTransaction
+
+VENDORS = [f"{name}{n}" for name in ("acme", "globex", "initech", "umbrella", "stark", "wayne", "wonka", "hooli")
+           for n in range(125)]
+WORDS = [
+    "payment", "invoice", "transfer", "services", "consulting", "license", "hosting", "rent", "order", "support",
+    "maintenance", "subscription", "freight", "catering", "equipment", "insurance", "training", "marketing",
+    "utilities", "travel", "q1", "q2", "q3", "q4", "fee", "ref", "sepa", "ach", "wire", "card",
+]
+CURRENCIES = ["USD", "USD", "USD", "EUR", "GBP"]
+
+
+def generate_tenant(
+    session: Session,
+    name: str,
+    n_invoices: int,
+    n_transactions: int,
+    *,
+    exact_rate: float = 0.7,
+    date_jitter_days: int = 3,
+    text_overlap_rate: float = 0.5,
+    seed: int = 0,
+    batch_size: int = 10_000,
+) -> int:
+    """Insert a synthetic tenant straight into the DB and return its id.
+
+    Up to `n_invoices` transactions are paired with an invoice: same
+    currency, the exact amount with probability `exact_rate`, posted within
+    ±`date_jitter_days` and reusing the invoice description's words with
+    probability `text_overlap_rate`. Remaining transactions are decoys with
+    random amount, date and description.
+    """
+    rnd = random.Random(seed)
+    tenant = Tenant(name=name)
+    session.add(tenant)
+    session.flush()
+    tid = tenant.id
+
+    base = dt.date(2025, 1, 1)
+    now = dt.datetime.now(dt.UTC)
+    n_paired = min(n_invoices, n_transactions)
+    ext = 0
+
+    for start in range(0, max(n_invoices, n_transactions), batch_size):
+        invoices = []
+        txs = []
+        for i in range(start, min(start + batch_size, max(n_invoices, n_transactions))):
+            currency = rnd.choice(CURRENCIES)
+            amount = round(rnd.uniform(10, 5000), 2)
+            date = base + dt.timedelta(days=rnd.randint(0, 364))
+            words = [rnd.choice(VENDORS), rnd.choice(WORDS)]
+
+            if i < n_invoices:
+                invoices.append({
+                    "tenant_id": tid, "amount": amount, "currency": currency, "invoice_date": date,
+                    "description": " ".join(words), "status": "open", "created_at": now, "updated_at": now,
+                })
+            if i >= n_transactions:
+                continue
+
+            if i < n_paired:
+                tx_amount = amount if rnd.random() < exact_rate else round(amount * rnd.uniform(0.9, 1.1), 2)
+                posted = date + dt.timedelta(days=rnd.randint(-date_jitter_days, date_jitter_days))
+                if rnd.random() < text_overlap_rate:
+                    desc = " ".join(["ref", *words, str(i)])
+                else:
+                    desc = f"{rnd.choice(WORDS)} {i}"
+            else:
+                currency = rnd.choice(CURRENCIES)
+                tx_amount = round(rnd.uniform(10, 5000), 2)
+                posted = base + dt.timedelta(days=rnd.randint(0, 364))
+                desc = f"{rnd.choice(VENDORS)} {rnd.choice(WORDS)} {i}"
+
+            ext += 1
+            txs.append({
+                "tenant_id": tid, "external_id": f"gen-{ext}", "amount": tx_amount, "currency": currency,
+                "posted_at": dt.datetime.combine(posted, dt.time(rnd.randint(0, 23), rnd.randint(0, 59))),
+                "description": desc, "created_at": now, "updated_at": now,
+            })
+
+        if invoices:
+            session.execute(insert(Invoice), invoices)
+        if txs:
+            session.execute(insert(BankTransaction), txs)
+
+    session.commit()
+    return tid
+
+
+def transaction_payload(n: int, *, seed: int = 0, prefix: str = "imp") -> list[dict]:
+    """Rows for the bank-transaction import endpoint, shaped like generated decoys."""
+    rnd = random.Random(seed)
+    base = dt.datetime(2025, 1, 1)
+    return [
+        {
+            "external_id": f"{prefix}-{i}",
+            "posted_at": (base + dt.timedelta(minutes=rnd.randint(0, 365 * 24 * 60))).isoformat(),
+            "amount": round(rnd.uniform(10, 5000), 2),
+            "currency": rnd.choice(CURRENCIES),
+            "description": f"{rnd.choice(VENDORS)} {rnd.choice(WORDS)} {i}",
+        }
+        for i in range(n)
+    ]
@@ -0,0 +1,185 @@
+"""Throughput of the sync and async database paths under concurrent load.
+
+    python -m benchmarks.load --invoices 2000 --concurrency 64 --requests 3000
+
+Generates a synthetic tenant in a fresh SQLite file, then for each mode
+(`DB_ASYNC=0` and `DB_ASYNC=1`) starts the API under uvicorn and fires
+`--requests` requests at it, `--concurrency` at a time, over a mix of
+invoice pages, bank-transaction pages and explanations of stored matches.
+Reports requests per second, latency percentiles, errors and the peak
+number of OS threads in the server process.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base, Match
+from app.modules.reconciliation.reconcile_service import ReconciliationService
+from benchmarks.datagen import generate_tenant
+
+MODES = ("sync", "async")
+
+
+def _pct(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))], 2)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _threads(pid: int) -> int | None:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("Threads:"))
+    except (OSError, StopIteration):
+        return None
+
+
+def _requests(tenant_id: int, pairs: list[tuple[int, int]], n: int, seed: int = 0) -> list[str]:
+    rnd = random.Random(seed)
+    paths = []
+    for _ in range(n):
+        kind = rnd.random()
+        if kind < 0.4:
+            paths.append(f"/tenants/{tenant_id}/invoices?limit=50")
+        elif kind < 0.7:
+            paths.append(f"/tenants/{tenant_id}/bank-transactions?limit=50")
+        else:
+            inv, tx = rnd.choice(pairs)
+            paths.append(f"/tenants/{tenant_id}/reconcile/explain?invoice_id={inv}&transaction_id={tx}")
+    return paths
+
+
+async def _fire(base_url: str, paths: list[str], concurrency: int, pid: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    peak_threads = 0
+    queue = list(reversed(paths))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker() -> None:
+            nonlocal errors
+            while queue:
+                path = queue.pop()
+                started = time.perf_counter()
+                try:
+                    r = await client.get(path)
+                    ok = r.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append((time.perf_counter() - started) * 1000)
+                errors += not ok
+
+        async def sample_threads() -> None:
+            nonlocal peak_threads
+            while True:
+                peak_threads = max(peak_threads, _threads(pid) or 0)
+                await asyncio.sleep(0.05)
+
+        sampler = asyncio.create_task(sample_threads())
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+        sampler.cancel()
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "req_per_s": round(len(latencies) / wall, 1) if wall else None,
+        "latency_ms": {"p50": _pct(latencies, 0.5), "p95": _pct(latencies, 0.95), "p99": _pct(latencies, 0.99)},
+        "peak_threads": peak_threads,
+    }
+
+
+def run_mode(mode: str, db_url: str, paths: list[str], concurrency: int) -> dict:
+    port = _free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": db_url,
+        "DB_ASYNC": "1" if mode == "async" else "0",
+        "RECONCILE_JOB_THREADS": "0",
+        "IDEMPOTENCY_PURGE_INTERVAL_S": "0",
+        "EXPLAIN_CACHE_PURGE_INTERVAL_S": "0",
+        # measure the database path, not the explanation cache
+        "EXPLAIN_CACHE_SIZE": "0",
+        "EXPLAIN_CACHE_PERSIST": "0",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                httpx.get(f"{base_url}/tenants", timeout=1).raise_for_status()
+                break
+            except httpx.HTTPError:
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError(f"{mode} server did not start")
+                time.sleep(0.2)
+        # warm up connections and caches, then measure
+        asyncio.run(_fire(base_url, paths[: concurrency * 2], concurrency, server.pid))
+        return {"mode": mode, **asyncio.run(_fire(base_url, paths, concurrency, server.pid))}
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--invoices", type=int, default=2000)
+    p.add_argument("--concurrency", type=int, default=64)
+    p.add_argument("--requests", type=int, default=3000)
+    p.add_argument("--modes", default=",".join(MODES))
+    args = p.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    db_url = f"sqlite:///{path}"
+    try:
+        engine = create_engine(db_url, future=True)
+        Base.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine, autoflush=False, future=True)() as session:
+            tid = generate_tenant(session, "load", args.invoices, args.invoices * 2)
+            ReconciliationService(session).reconcile(tid)
+            pairs = [tuple(r) for r in session.execute(
+                select(Match.invoice_id, Match.bank_transaction_id).where(Match.tenant_id == tid)
+            )]
+        engine.dispose()
+
+        paths = _requests(tid, pairs, args.requests)
+        results = [run_mode(mode, db_url, paths, args.concurrency) for mode in args.modes.split(",")]
+        print(json.dumps({
+            "invoices": args.invoices,
+            "concurrency": args.concurrency,
+            "results": results,
+        }, indent=2))
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
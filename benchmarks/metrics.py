@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import resource
+import sys
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+def peak_rss_mb() -> float:
+    # kilobytes on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+class StatementCounter:
+    """Counts statements sent to the database; `executemany` batches count once."""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args) -> None:
+        self.count += 1
+
+    def __enter__(self) -> StatementCounter:
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
@@ -0,0 +1,145 @@
+"""Page latency by depth: LIMIT/OFFSET vs keyset cursors.
+
+    python -m benchmarks.pagination --transactions 200000 --invoices 100000 --limit 100
+
+Reads one page of bank transactions, and of invoices filtered by status
+(half of them are marked `matched`), at increasing depths both ways and
+reports the median latency per page, plus SQLite's query plan for both
+cursor queries. Cursor pages should cost the same at any depth.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, select, text, update
+from sqlalchemy.orm import sessionmaker
+
+from app.core.pagination import encode_cursor
+from app.db.models import Base, BankTransaction, Invoice
+from app.modules.invoices.service import InvoiceService
+from app.modules.transactions.service import BankTransactionService
+from benchmarks.datagen import generate_tenant
+
+DEPTHS = (0.0, 0.1, 0.5, 0.9, 0.99)
+
+
+def _median_ms(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(times), 3)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--transactions", type=int, default=200_000)
+    p.add_argument("--invoices", type=int, default=100_000)
+    p.add_argument("--limit", type=int, default=100)
+    p.add_argument("--repeat", type=int, default=5)
+    args = p.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        engine = create_engine(f"sqlite:///{path}", future=True)
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine, future=True)()
+        tid = generate_tenant(session, "bench", args.invoices, args.transactions)
+        session.execute(update(Invoice).where(Invoice.tenant_id == tid, Invoice.id % 2 == 0).values(status="matched"))
+        session.commit()
+        service = BankTransactionService(session)
+        order = (BankTransaction.posted_at.desc(), BankTransaction.id.desc())
+        base = select(BankTransaction).where(BankTransaction.tenant_id == tid).order_by(*order)
+
+        results = []
+        for depth in DEPTHS:
+            offset = int(args.transactions * depth)
+
+            def by_offset():
+                session.scalars(base.limit(args.limit).offset(offset)).all()
+                session.expunge_all()
+
+            # cursor of the row just before `offset`, as a client paging from the start would hold
+            cursor = None
+            if offset:
+                prev = session.execute(
+                    select(BankTransaction.posted_at, BankTransaction.id)
+                    .where(BankTransaction.tenant_id == tid).order_by(*order).limit(1).offset(offset - 1)
+                ).one()
+                cursor = encode_cursor(prev.posted_at.isoformat(), prev.id)
+
+            def by_cursor():
+                service.list(tid, limit=args.limit, cursor=cursor)
+                session.expunge_all()
+
+            results.append({
+                "depth": depth,
+                "offset": offset,
+                "offset_ms": _median_ms(by_offset, args.repeat),
+                "cursor_ms": _median_ms(by_cursor, args.repeat),
+            })
+
+        invoice_service = InvoiceService(session)
+        open_invoices = select(Invoice).where(Invoice.tenant_id == tid, Invoice.status == "open").order_by(Invoice.id)
+        n_open = args.invoices - args.invoices // 2
+        invoice_results = []
+        for depth in DEPTHS:
+            offset = int(n_open * depth)
+
+            def invoices_by_offset():
+                session.scalars(open_invoices.limit(args.limit).offset(offset)).all()
+                session.expunge_all()
+
+            cursor = None
+            if offset:
+                prev_id = session.scalar(
+                    select(Invoice.id).where(Invoice.tenant_id == tid, Invoice.status == "open")
+                    .order_by(Invoice.id).limit(1).offset(offset - 1)
+                )
+                cursor = encode_cursor(prev_id)
+
+            def invoices_by_cursor():
+                invoice_service.list(tid, status="open", limit=args.limit, cursor=cursor)
+                session.expunge_all()
+
+            invoice_results.append({
+                "depth": depth,
+                "offset": offset,
+                "offset_ms": _median_ms(invoices_by_offset, args.repeat),
+                "cursor_ms": _median_ms(invoices_by_cursor, args.repeat),
+            })
+
+        def plan(sql: str, params: dict) -> list[str]:
+            return [row[-1] for row in session.execute(text("EXPLAIN QUERY PLAN " + sql), params)]
+
+        print(json.dumps({
+            "transactions": args.transactions,
+            "invoices": args.invoices,
+            "limit": args.limit,
+            "results": results,
+            "cursor_query_plan": plan(
+                "SELECT * FROM bank_transactions WHERE tenant_id = :t AND (posted_at, id) < (:p, :i) "
+                "ORDER BY posted_at DESC, id DESC LIMIT :n",
+                {"t": tid, "p": "2025-06-01 00:00:00", "i": 1, "n": args.limit},
+            ),
+            "invoices_by_status": invoice_results,
+            "invoice_cursor_query_plan": plan(
+                "SELECT * FROM invoices WHERE tenant_id = :t AND status = :s AND id > :i ORDER BY id LIMIT :n",
+                {"t": tid, "s": "open", "i": 1, "n": args.limit},
+            ),
+        }, indent=2))
+        session.close()
+        engine.dispose()
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Peak RSS of an in-memory vs a streaming reconcile run.
+
+    python -m benchmarks.reconcile_memory --invoices 5000 --transactions 50000
+
+Each mode runs in a fresh subprocess so `ru_maxrss` is not shared between them.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base
+from benchmarks.datagen import generate_tenant
+from benchmarks.metrics import peak_rss_mb
+
+MODES = ("in_memory", "stream")
+
+
+def _run_child(db_url: str, tenant_id: int, mode: str, chunk_size: int) -> dict:
+    from app.modules.reconciliation.reconcile_service import ReconciliationService
+
+    engine = create_engine(db_url, future=True)
+    session = sessionmaker(bind=engine, autoflush=False, future=True)()
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    matches = ReconciliationService(session).reconcile(
+        tenant_id, stream=mode == "stream", chunk_size=chunk_size
+    )
+    return {
+        "mode": mode,
+        "chunk_size": chunk_size if mode == "stream" else None,
+        "matches": len(matches),
+        "wall_s": round(time.perf_counter() - started, 3),
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--invoices", type=int, default=5_000)
+    p.add_argument("--transactions", type=int, default=50_000)
+    p.add_argument("--chunk-size", type=int, default=1000)
+    p.add_argument("--child", nargs=3, metavar=("DB_URL", "TENANT_ID", "MODE"), help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    if args.child:
+        db_url, tenant_id, mode = args.child
+        print(json.dumps(_run_child(db_url, int(tenant_id), mode, args.chunk_size)))
+        return
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    db_url = f"sqlite:///{path}"
+    try:
+        engine = create_engine(db_url, future=True)
+        Base.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine, future=True)() as session:
+            tid = generate_tenant(session, "bench", args.invoices, args.transactions)
+        engine.dispose()
+
+        results = []
+        for mode in MODES:
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.reconcile_memory", "--chunk-size", str(args.chunk_size),
+                 "--child", db_url, str(tid), mode],
+                check=True, capture_output=True, text=True,
+            )
+            results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+        print(json.dumps({"invoices": args.invoices, "transactions": args.transactions, "results": results}, indent=2))
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
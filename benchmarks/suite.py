@@ -0,0 +1,193 @@
+"""Reconciliation benchmark suite.
+
+    python -m benchmarks.suite --scales 10k,100k --out results.json
+    python -m benchmarks.suite --scales 10k --baseline results.json
+
+For each scale a synthetic tenant is generated straight into a fresh SQLite
+file, then every scenario runs in its own subprocess (so peak RSS is per
+scenario) and reports wall time, pairs scored per second, peak RSS and the
+number of SQL statements executed. With `--baseline`, scenarios whose wall
+time or statement count grew by more than `--tolerance` are reported and
+the exit status is 1.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base
+from benchmarks.datagen import generate_tenant, transaction_payload
+from benchmarks.metrics import StatementCounter, peak_rss_mb
+
+# scale name -> (invoices, bank transactions)
+SCALES = {
+    "10k": (1_000, 10_000),
+    "100k": (10_000, 100_000),
+    "1m": (100_000, 1_000_000),
+}
+SCENARIOS = ("reconcile", "reconcile_stream", "import", "list_invoices", "export_transactions")
+IMPORT_BATCH = 1000
+
+
+def _scenario(name: str, tenant_id: int, n_invoices: int, n_transactions: int) -> dict:
+    # DATABASE_URL is set by the parent, so the app's engine points at the benchmark DB
+    from fastapi.testclient import TestClient
+
+    from app.db.session import SessionLocal, engine
+    from app.main import create_app
+    from app.modules.reconciliation.reconcile_service import ReconciliationService
+
+    out: dict = {"scenario": name}
+    client = TestClient(create_app())
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+
+    with StatementCounter(engine) as statements:
+        if name in ("reconcile", "reconcile_stream"):
+            with SessionLocal() as session:
+                service = ReconciliationService(session)
+                out["matches"] = len(service.reconcile(tenant_id, stream=name == "reconcile_stream"))
+                out["pairs_scored"] = service.stats.pairs_scored
+        elif name == "import":
+            rows = transaction_payload(max(n_transactions // 10, 1), seed=1)
+            # fresh tenant so the import is not deduped against generated rows
+            tid = client.post("/tenants", json={"name": f"import-{time.time_ns()}"}).json()["id"]
+            for i in range(0, len(rows), IMPORT_BATCH):
+                r = client.post(
+                    f"/tenants/{tid}/bank-transactions/import",
+                    json=rows[i:i + IMPORT_BATCH],
+                    headers={"Idempotency-Key": f"bench-{i}"},
+                )
+                r.raise_for_status()
+            out["rows"] = len(rows)
+        elif name == "list_invoices":
+            rows, cursor = 0, None
+            while True:
+                params = {"limit": 1000, **({"cursor": cursor} if cursor else {})}
+                r = client.get(f"/tenants/{tenant_id}/invoices", params=params)
+                r.raise_for_status()
+                rows += len(r.json())
+                cursor = r.headers.get("X-Next-Cursor")
+                if not cursor:
+                    break
+            out["rows"] = rows
+        elif name == "export_transactions":
+            with client.stream("GET", f"/tenants/{tenant_id}/exports/bank-transactions") as r:
+                r.raise_for_status()
+                rows = sum(1 for _ in r.iter_lines())
+            out["rows"] = rows
+        else:
+            raise ValueError(f"unknown scenario {name!r}")
+
+    wall = time.perf_counter() - started
+    out["wall_s"] = round(wall, 3)
+    if "pairs_scored" in out:
+        out["pairs_per_s"] = round(out["pairs_scored"] / wall) if wall else None
+    if "rows" in out:
+        out["rows_per_s"] = round(out["rows"] / wall) if wall else None
+    out["statements"] = statements.count
+    out["baseline_rss_mb"] = round(baseline, 1)
+    out["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    return out
+
+
+def run_scale(scale: str, scenarios: list[str]) -> dict:
+    n_invoices, n_transactions = SCALES[scale]
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    db_url = f"sqlite:///{path}"
+    try:
+        engine = create_engine(db_url, future=True)
+        Base.metadata.create_all(bind=engine)
+        started = time.perf_counter()
+        with sessionmaker(bind=engine, future=True)() as session:
+            tid = generate_tenant(session, "bench", n_invoices, n_transactions)
+        generate_s = round(time.perf_counter() - started, 3)
+        engine.dispose()
+
+        results = []
+        for name in scenarios:
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.suite", "--child", name, str(tid), str(n_invoices),
+                 str(n_transactions)],
+                check=True, capture_output=True, text=True,
+                env={**os.environ, "DATABASE_URL": db_url, "RECONCILE_JOB_THREADS": "0"},
+            )
+            results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+        return {
+            "scale": scale,
+            "invoices": n_invoices,
+            "transactions": n_transactions,
+            "generate_s": generate_s,
+            "results": results,
+        }
+    finally:
+        os.remove(path)
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions of `current` against `baseline` beyond `tolerance` (a fraction)."""
+    before = {
+        (run["scale"], r["scenario"]): r for run in baseline["runs"] for r in run["results"]
+    }
+    problems = []
+    for run in current["runs"]:
+        for r in run["results"]:
+            old = before.get((run["scale"], r["scenario"]))
+            if old is None:
+                continue
+            for metric in ("wall_s", "statements"):
+                if old[metric] and r[metric] > old[metric] * (1 + tolerance):
+                    problems.append(f"{run['scale']}/{r['scenario']}: {metric} {old[metric]} -> {r[metric]}")
+    return problems
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--scales", default="10k,100k", help=f"comma-separated, from {', '.join(SCALES)}")
+    p.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of scenarios")
+    p.add_argument("--out", help="write results JSON here as well as to stdout")
+    p.add_argument("--baseline", help="results JSON from a previous run to compare against")
+    p.add_argument("--tolerance", type=float, default=0.2)
+    p.add_argument("--child", nargs=4, metavar=("SCENARIO", "TENANT_ID", "INVOICES", "TRANSACTIONS"),
+                   help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    if args.child:
+        name, tid, n_invoices, n_transactions = args.child
+        print(json.dumps(_scenario(name, int(tid), int(n_invoices), int(n_transactions))))
+        return
+
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in scales if s not in SCALES] + [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        p.error(f"unknown scale/scenario: {', '.join(unknown)}")
+
+    report = {"python": sys.version.split()[0], "runs": [run_scale(s, scenarios) for s in scales]}
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(report, json.load(f), args.tolerance)
+        for line in problems:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
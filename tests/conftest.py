@@ -1,16 +1,22 @@
 import os
 import tempfile
+import threading
+from contextlib import contextmanager
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 
 from app.main import create_app
 from app.db.models import Base
 from app.db.session import get_session
+from app.modules.transactions.idempotency import replay_cache
+from app.modules.reconciliation.explain_cache import explanation_cache
 
 @pytest.fixture()
-def client():
+def session_factory():
     # isolated sqlite file per test
     fd, path = tempfile.mkstemp(suffix=".db")
     os.close(fd)
@@ -21,10 +27,22 @@ def client():
 
     Base.metadata.create_all(bind=engine)
 
+    yield TestingSessionLocal
+
+    engine.dispose()
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+@pytest.fixture()
+def client(session_factory):
     app = create_app()
+    replay_cache.clear()
+    explanation_cache.clear()
 
     def override_get_session():
-        db = TestingSessionLocal()
+        db = session_factory()
         try:
             yield db
         finally:
@@ -35,7 +53,34 @@ def client():
     with TestClient(app) as c:
         yield c
 
-    try:
-        os.remove(path)
-    except OSError:
-        pass
+@pytest.fixture()
+def session(session_factory):
+    """A session on the `client` database, for reading or changing what requests stored."""
+    with session_factory() as db:
+        yield db
+
+class StatementLog(list):
+    """SQL statements run inside `record_sql()`, and the threads that ran them."""
+
+    def __init__(self):
+        super().__init__()
+        self.threads: set[int] = set()
+
+@pytest.fixture()
+def record_sql():
+    """`with record_sql() as statements:` collects every statement any engine runs in the block."""
+    @contextmanager
+    def recording():
+        statements = StatementLog()
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+            statements.threads.add(threading.get_ident())
+
+        event.listen(Engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(Engine, "before_cursor_execute", record)
+
+    return recording
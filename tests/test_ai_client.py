@@ -0,0 +1,197 @@
+import asyncio
+import datetime as dt
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app.core.resilience import CircuitBreaker, LatencyHistogram
+from app.modules.reconciliation import ai
+from app.modules.reconciliation.ai import AIExplainService, ExplainContext, HttpAIClient
+
+CTX = ExplainContext(
+    invoice_amount=10.0,
+    invoice_date=dt.date(2025, 1, 1),
+    invoice_description="Acme",
+    tx_amount=10.0,
+    tx_posted_at=dt.datetime(2025, 1, 1),
+    tx_description="Acme",
+    score=90.0,
+    reasons=["amount_exact"],
+)
+
+
+class FakeProvider:
+    """Answers with `script` statuses in turn (then 200); "slow" sleeps past any deadline."""
+
+    def __init__(self):
+        self.script: list = []
+        self.calls = 0
+        self.ports: set[int] = set()
+        self.lock = threading.Lock()
+
+    def handler(self):
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so pooled connections are reused
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                ctx = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["context"]
+                with provider.lock:
+                    provider.calls += 1
+                    provider.ports.add(self.client_address[1])
+                    step = provider.script.pop(0) if provider.script else 200
+                if step == "slow":
+                    time.sleep(1.0)
+                    step = 200
+                body = json.dumps({"explanation": f"AI: {ctx['tx_description']}"}).encode() if step == 200 else b""
+                self.send_response(step)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+@pytest.fixture()
+def provider():
+    fake = FakeProvider()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), fake.handler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    fake.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield fake
+    server.shutdown()
+    server.server_close()
+
+
+def test_pooled_client_retries_transient_errors_within_deadline(provider):
+    async def run():
+        client = HttpAIClient(provider.url, "k", timeout_s=2, retries=2, backoff_s=0.01)
+        try:
+            texts = [await client.explain(CTX) for _ in range(5)]
+            provider.script = [503, 429]
+            retried = await client.explain(CTX)
+            provider.script = [400]
+            with pytest.raises(ai.AIUnavailableError):
+                await client.explain(CTX)
+            provider.script = ["slow"]
+            slow = HttpAIClient(provider.url, "k", timeout_s=0.2, retries=2)
+            started = time.perf_counter()
+            with pytest.raises(ai.AITimeoutError):
+                await slow.explain(CTX)
+            assert time.perf_counter() - started < 0.6
+            await slow.aclose()
+        finally:
+            await client.aclose()
+        return texts, retried
+
+    texts, retried = asyncio.run(run())
+    assert texts == ["AI: Acme"] * 5 and retried == "AI: Acme"
+    assert provider.calls == 5 + 3 + 1 + 1  # the 400 was not retried
+    # one keep-alive connection for the pooled client, one for the slow one
+    assert len(provider.ports) <= 2
+
+
+def test_pooled_client_uses_its_own_timeout_and_closes_the_client_of_a_previous_loop(provider):
+    other = asyncio.new_event_loop()
+    thread = threading.Thread(target=other.run_forever, daemon=True)
+    thread.start()
+    client = HttpAIClient(provider.url, "k", timeout_s=12)
+    try:
+        assert asyncio.run_coroutine_threadsafe(client.explain(CTX), other).result(5) == "AI: Acme"
+        first = client._client
+        assert first.timeout == httpx.Timeout(12)
+
+        async def run():
+            try:
+                return await client.explain(CTX)
+            finally:
+                await client.aclose()
+
+        assert asyncio.run(run()) == "AI: Acme"
+        assert client._client is None and first is not None
+        deadline = time.monotonic() + 5
+        while not first.is_closed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert first.is_closed
+    finally:
+        other.call_soon_threadsafe(other.stop)
+        thread.join(5)
+        other.close()
+
+
+def test_breaker_opens_serves_fallback_and_recovers_via_half_open_probe(client, provider, monkeypatch):
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=3, reset_after_s=30, clock=lambda: now[0])
+    explainer = AIExplainService(HttpAIClient(provider.url, "k", timeout_s=2), breaker=breaker)
+    monkeypatch.setattr(ai, "_default", explainer)
+
+    tid = client.post("/tenants", json={"name": "breaker"}).json()["id"]
+    inv = client.post(f"/tenants/{tid}/invoices", json={"amount": 10.0, "invoice_date": "2025-01-01"}).json()["id"]
+    tx = client.post(f"/tenants/{tid}/bank-transactions/import", json=[
+        {"posted_at": "2025-01-01T00:00:00", "amount": 10.0, "description": "Acme"}
+    ], headers={"Idempotency-Key": "k"}).json()["transaction_ids"][0]
+
+    def explain():
+        r = client.get(f"/tenants/{tid}/reconcile/explain", params={"invoice_id": inv, "transaction_id": tx})
+        assert r.status_code == 200, r.text
+        return r.json()["explanation"]
+
+    provider.script = [500] * 3
+    for _ in range(3):
+        assert "Deterministic score" in explain()
+    assert breaker.state == CircuitBreaker.OPEN
+    # open: the provider is not called at all
+    assert "Deterministic score" in explain()
+    assert provider.calls == 3
+
+    now[0] += 31
+    provider.script = [500]
+    assert "Deterministic score" in explain()  # failed probe re-opens
+    assert breaker.state == CircuitBreaker.OPEN and provider.calls == 4
+
+    now[0] += 31
+    assert explain() == "AI: Acme"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    stats = client.get("/reconcile/explain/ai-stats").json()
+    assert stats["client"] == "HttpAIClient"
+    assert stats["breaker"]["opened"] == 2 and stats["breaker"]["short_circuited"] == 1
+    assert stats["latency_ms"]["error"]["count"] == 4
+    assert stats["latency_ms"]["ok"]["count"] == 1
+    assert stats["latency_ms"]["ok"]["buckets"]["+Inf"] == 1
+
+
+def test_half_open_lets_one_probe_through():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_after_s=5, clock=lambda: now[0])
+    breaker.record_failure()
+    assert not breaker.allow()
+    now[0] = 5
+    assert breaker.allow()
+    assert not breaker.allow()  # probe still pending
+    breaker.record_success()
+    assert breaker.allow() and breaker.stats()["short_circuited"] == 2
+
+
+def test_slow_blocking_client_times_out_into_histogram():
+    class SlowClient(ai.AIClient):
+        def explain(self, ctx):
+            time.sleep(0.5)
+            return "late"
+
+    explainer = AIExplainService(SlowClient(), timeout_s=0.05)
+    assert asyncio.run(explainer.explain_or_fallback(CTX)).startswith("Amount is an exact match.")
+    assert explainer.latency["timeout"].stats()["count"] == 1
+
+    h = LatencyHistogram(buckets_ms=(10, 100))
+    for seconds in (0.005, 0.05, 0.05, 3):
+        h.observe(seconds)
+    assert h.stats()["buckets"] == {"10": 1, "100": 3, "+Inf": 4}
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.db.models import Base
+from app.db.session import AsyncDb, SessionLocal, ThreadedDb, async_url, get_db, get_session
+from app.main import create_app
+from app.modules.transactions.idempotency import replay_cache
+from app.modules.reconciliation.explain_cache import explanation_cache
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture()
+def async_client():
+    """Like `client`, but route handlers get an AsyncSession over aiosqlite."""
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    db_url = f"sqlite:///{path}"
+    engine = create_engine(db_url, future=True, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    sync_factory = sessionmaker(bind=engine, autoflush=False, future=True)
+    # no pooling: connections must not outlive the test client's event loop
+    async_factory = async_sessionmaker(
+        bind=create_async_engine(async_url(db_url), poolclass=NullPool), autoflush=False, expire_on_commit=False
+    )
+
+    app = create_app()
+    replay_cache.clear()
+    explanation_cache.clear()
+
+    async def override_get_db():
+        async with async_factory() as session:
+            yield AsyncDb(session, sync_factory)
+
+    def override_get_session():
+        with sync_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session] = override_get_session
+    with TestClient(app) as c:
+        yield c
+    os.remove(path)
+
+
+def _scenario(c) -> list:
+    out = []
+    tid = c.post("/tenants", json={"name": "async"}).json()["id"]
+    for n in range(5):
+        c.post(f"/tenants/{tid}/invoices", json={
+            "amount": 10.0 + n, "invoice_date": "2025-01-0%d" % (n + 1), "description": f"INV-{n}"
+        })
+    imported = c.post(f"/tenants/{tid}/bank-transactions/import", json=[
+        {"posted_at": "2025-01-0%dT00:00:00" % (n + 1), "amount": 10.0 + n, "description": f"INV-{n}"}
+        for n in range(5)
+    ], headers={"Idempotency-Key": "k"})
+    out.append(imported.json())
+    page = c.get(f"/tenants/{tid}/invoices", params={"limit": 2})
+    out.append([page.json(), c.get(f"/tenants/{tid}/invoices",
+                                    params={"limit": 2, "cursor": page.headers["X-Next-Cursor"]}).json()])
+    out.append(c.get(f"/tenants/{tid}/bank-transactions").json())
+    matches = c.post(f"/tenants/{tid}/reconcile", json={}).json()
+    out.append(matches)
+    out.append(c.post(f"/tenants/{tid}/matches/{matches[0]['id']}/confirm").json())
+    out.append(c.post(f"/tenants/{tid}/matches/confirm", json={"auto_confirm_above": 50}).json())
+    out.append(c.get(f"/tenants/{tid}/reconcile/explain",
+                     params={"invoice_id": 1, "transaction_id": 1}).json())
+    out.append(c.delete(f"/tenants/{tid}/invoices/5").json())
+    out.append(c.get(f"/tenants/{tid}/invoices/999").status_code)
+    out.append(c.post("/tenants", json={"name": "async"}).status_code)
+    gql = c.post("/graphql", json={"query": "{ tenants { id name } }"}).json()
+    out.append(gql)
+    return out
+
+
+def _without_timestamps(value):
+    if isinstance(value, dict):
+        return {k: _without_timestamps(v) for k, v in value.items() if k not in ("created_at", "updated_at")}
+    if isinstance(value, list):
+        return [_without_timestamps(v) for v in value]
+    return value
+
+
+def test_async_path_matches_sync_path(client, async_client):
+    assert _without_timestamps(_scenario(async_client)) == _without_timestamps(_scenario(client))
+
+
+def _statement_threads(c, path: str, record_sql) -> tuple[set[int], int]:
+    with record_sql() as statements:
+        assert c.get(path).status_code == 200
+    return statements.threads, c.portal.call(threading.get_ident)
+
+
+def test_async_handlers_wait_on_the_database_without_a_worker_thread(client, async_client, record_sql):
+    for c in (client, async_client):
+        c.post("/tenants", json={"name": "t"})
+    threads, loop_thread = _statement_threads(async_client, "/tenants/1/invoices", record_sql)
+    assert threads == {loop_thread}
+    threads, loop_thread = _statement_threads(client, "/tenants/1/invoices", record_sql)
+    assert loop_thread not in threads
+
+
+def test_async_url():
+    assert async_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+    assert async_url("postgresql://u:p@db/recon") == "postgresql+asyncpg://u:p@db/recon"
+    with pytest.raises(ValueError):
+        async_url("mysql://db")
+
+
+def test_db_run_serializes_calls_on_the_request_session():
+    active, overlaps = [0], []
+
+    def work(session, n):
+        active[0] += 1
+        overlaps.append(active[0])
+        time.sleep(0.02)
+        active[0] -= 1
+        return n
+
+    async def siblings():
+        db = ThreadedDb(sessionmaker(bind=create_engine("sqlite://"))())
+        return await asyncio.gather(*(db.run(work, n) for n in range(5)))
+
+    assert asyncio.run(siblings()) == list(range(5))
+    assert max(overlaps) == 1
+
+
+def test_graphql_sibling_fields_share_the_request_db(client, async_client):
+    query = """{ a: tenants { id } b: invoices(tenantId: 1) { id }
+                 c: bankTransactions(tenantId: 1) { id } d: tenants { name } }"""
+    for c in (client, async_client):
+        tid = c.post("/tenants", json={"name": "siblings"}).json()["id"]
+        for n in range(3):
+            c.post(f"/tenants/{tid}/invoices", json={"amount": 1.0 + n})
+        body = c.post("/graphql", json={"query": query}).json()
+        assert "errors" not in body, body
+        assert len(body["data"]["b"]) == 3
+        assert body["data"]["d"] == [{"name": "siblings"}]
+
+
+def test_threaded_db_reuses_the_app_session_factory():
+    with SessionLocal() as session:
+        assert ThreadedDb(session).sync_factory is SessionLocal
@@ -0,0 +1,123 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.core import config
+from app.modules.reconciliation import ai
+from app.modules.reconciliation.ai import AIExplainService, HttpAIClient
+
+
+class StubProvider:
+    """Local AI provider: slow for descriptions containing "slow", 500 for "fail"."""
+
+    def __init__(self, delay: float = 0.1):
+        self.delay = delay
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def handler(self):
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                ctx = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["context"]
+                with provider.lock:
+                    provider.calls += 1
+                    provider.in_flight += 1
+                    provider.max_in_flight = max(provider.max_in_flight, provider.in_flight)
+                try:
+                    time.sleep(2.0 if "slow" in ctx["tx_description"] else provider.delay)
+                    if "fail" in ctx["tx_description"]:
+                        self.send_response(500)
+                        self.end_headers()
+                        return
+                    body = json.dumps({"explanation": f"AI: {ctx['tx_description']}"}).encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with provider.lock:
+                        provider.in_flight -= 1
+
+        return Handler
+
+
+@pytest.fixture()
+def provider(monkeypatch):
+    stub = StubProvider()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), stub.handler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(ai, "_default", AIExplainService(HttpAIClient(url, "test-key", timeout_s=5)))
+    monkeypatch.setattr(
+        "app.modules.reconciliation.explain_service.settings",
+        config.Settings(explain_concurrency=2, explain_timeout_s=0.5),
+    )
+    yield stub
+    server.shutdown()
+    server.server_close()
+
+
+def _setup(client, descriptions):
+    tid = client.post("/tenants", json={"name": "batch-explain"}).json()["id"]
+    inv = client.post(f"/tenants/{tid}/invoices", json={"amount": 50.0, "invoice_date": "2025-01-01"}).json()["id"]
+    txs = [{"posted_at": "2025-01-01T00:00:00", "amount": 50.0, "description": d} for d in descriptions]
+    tx_ids = client.post(f"/tenants/{tid}/bank-transactions/import", json=txs,
+                         headers={"Idempotency-Key": "b"}).json()["transaction_ids"]
+    return tid, inv, tx_ids
+
+
+def test_batch_explain_is_concurrent_bounded_and_falls_back_per_item(client, provider, record_sql):
+    tid, inv, tx_ids = _setup(client, ["ok 1", "ok 2", "ok 3", "ok 4", "slow", "fail"])
+    pairs = [{"invoice_id": inv, "transaction_id": t} for t in tx_ids]
+    pairs.append({"invoice_id": inv, "transaction_id": 999999})
+
+    with record_sql() as statements:
+        r = client.post(f"/tenants/{tid}/reconcile/explain/batch", json={"pairs": pairs, "match_ids": [424242]})
+    assert r.status_code == 200, r.text
+    items = r.json()
+
+    assert [it["transaction_id"] for it in items[:7]] == tx_ids + [999999]
+    assert [it["source"] for it in items[:4]] == ["ai"] * 4
+    assert items[0]["explanation"] == "AI: ok 1"
+    # the slow call hit the per-item timeout, the failing one errored
+    assert items[4]["source"] == items[5]["source"] == "fallback"
+    assert "Deterministic score" in items[4]["explanation"]
+    assert items[6]["error"] and items[6]["explanation"] is None
+    assert items[7]["match_id"] == 424242 and items[7]["error"] == "Match not found"
+
+    assert provider.max_in_flight == 2
+    selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    assert sum("FROM invoices" in s for s in selects) == 1
+    assert sum("FROM bank_transactions" in s for s in selects) == 1
+
+    calls = provider.calls
+    again = client.post(f"/tenants/{tid}/reconcile/explain/batch", json={"pairs": pairs[:4]}).json()
+    assert [it["source"] for it in again] == ["cache"] * 4
+    assert provider.calls == calls
+
+
+def test_batch_explain_by_match_ids_and_duplicates_share_one_call(client, provider):
+    tid, inv, tx_ids = _setup(client, ["ok a", "ok b"])
+    matches = client.post(f"/tenants/{tid}/reconcile", json={}).json()
+    match_ids = [m["id"] for m in matches]
+    assert match_ids
+
+    r = client.post(f"/tenants/{tid}/reconcile/explain/batch", json={"match_ids": match_ids + match_ids[:1]})
+    items = r.json()
+    assert [it["match_id"] for it in items] == match_ids + match_ids[:1]
+    assert all(it["source"] == "ai" for it in items)
+    assert items[-1]["explanation"] == items[0]["explanation"]
+    assert provider.calls == len(match_ids)
+
+    assert client.post(f"/tenants/{tid}/reconcile/explain/batch", json={}).status_code == 400
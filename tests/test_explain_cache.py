@@ -0,0 +1,114 @@
+import datetime as dt
+
+import pytest
+
+from app.modules.reconciliation import ai
+from app.modules.reconciliation.ai import AIClient, AIExplainService, AIUnavailableError
+
+
+class CountingClient(AIClient):
+    def __init__(self, fail: bool = False):
+        self.calls = 0
+        self.fail = fail
+
+    def explain(self, ctx):
+        self.calls += 1
+        if self.fail:
+            raise AIUnavailableError("down")
+        return f"AI says {ctx.invoice_amount} ~ {ctx.tx_amount}"
+
+
+@pytest.fixture()
+def pair(client):
+    tid = client.post("/tenants", json={"name": "explain-cache"}).json()["id"]
+    inv = client.post(f"/tenants/{tid}/invoices", json={
+        "amount": 100.0, "invoice_date": "2025-01-01", "description": "Acme"
+    }).json()["id"]
+    tx = client.post(f"/tenants/{tid}/bank-transactions/import", json=[
+        {"posted_at": "2025-01-02T00:00:00", "amount": 100.0, "description": "Acme"}
+    ], headers={"Idempotency-Key": "x"}).json()["transaction_ids"][0]
+    return tid, inv, tx
+
+
+def _explain(client, tid, inv, tx):
+    r = client.get(f"/tenants/{tid}/reconcile/explain", params={"invoice_id": inv, "transaction_id": tx})
+    assert r.status_code == 200, r.text
+    return r.json()["explanation"]
+
+
+def test_repeated_explains_hit_cache_until_inputs_change(client, pair, monkeypatch, session):
+    from sqlalchemy import update
+
+    from app.db.models import Invoice
+    from app.modules.reconciliation.explain_cache import explanation_cache
+
+    fake = CountingClient()
+    monkeypatch.setattr(ai, "_default", AIExplainService(fake))
+    tid, inv, tx = pair
+
+    first = _explain(client, tid, inv, tx)
+    assert first == "AI says 100.0 ~ 100.0"
+    assert _explain(client, tid, inv, tx) == first
+    assert fake.calls == 1
+
+    # a restarted process finds it in the table
+    explanation_cache.clear()
+    assert _explain(client, tid, inv, tx) == first
+    assert fake.calls == 1
+
+    session.execute(update(Invoice).where(Invoice.id == inv).values(amount=99.0))
+    session.commit()
+    assert _explain(client, tid, inv, tx) == "AI says 99.0 ~ 100.0"
+    assert fake.calls == 2
+
+    stats = client.get("/reconcile/explain/cache-stats").json()
+    assert (stats["hits"], stats["db_hits"], stats["misses"]) == (0, 1, 1)
+    assert stats["size"] == 2
+
+
+def test_fallback_explanations_are_not_cached(client, pair, monkeypatch):
+    fake = CountingClient(fail=True)
+    monkeypatch.setattr(ai, "_default", AIExplainService(fake))
+    tid, inv, tx = pair
+
+    text = _explain(client, tid, inv, tx)
+    assert "Deterministic score" in text
+    _explain(client, tid, inv, tx)
+    assert fake.calls == 2
+
+    fake.fail = False
+    assert _explain(client, tid, inv, tx).startswith("AI says")
+    stats = client.get("/reconcile/explain/cache-stats").json()
+    assert stats["misses"] == 3 and stats["size"] == 1
+
+
+def test_lru_is_bounded_and_entries_expire():
+    from app.db.models import utcnow
+    from app.modules.reconciliation.explain_cache import ExplanationCache
+
+    cache = ExplanationCache(maxsize=2)
+    later = utcnow() + dt.timedelta(hours=1)
+    cache.put(("a",), "A", later)
+    cache.put(("b",), "B", later)
+    assert cache.get(("a",)) == "A"  # a is now most recent
+    cache.put(("c",), "C", later)
+    assert cache.get(("b",)) is None
+    cache.put(("d",), "D", utcnow() - dt.timedelta(seconds=1))
+    assert cache.get(("d",)) is None
+    stats = cache.stats()
+    assert (stats["evictions"], stats["expired"], stats["size"]) == (2, 1, 1)
+
+
+def test_expired_persisted_explanations_are_purged(client, pair, monkeypatch, session):
+    from sqlalchemy import func, select
+
+    from app.db.models import ExplanationCacheEntry, utcnow
+    from app.modules.reconciliation.explain_cache import purge_expired
+
+    monkeypatch.setattr(ai, "_default", AIExplainService(CountingClient()))
+    tid, inv, tx = pair
+    _explain(client, tid, inv, tx)
+
+    assert purge_expired(session) == 0
+    assert purge_expired(session, now=utcnow() + dt.timedelta(days=2)) == 1
+    assert session.scalar(select(func.count()).select_from(ExplanationCacheEntry)) == 0
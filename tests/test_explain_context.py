@@ -0,0 +1,59 @@
+from app.modules.reconciliation import ai
+from app.modules.reconciliation.ai import AIClient, AIExplainService
+
+
+class EchoClient(AIClient):
+    """Explains with the score and reasons it was given."""
+
+    def explain(self, ctx):
+        return f"{ctx.score:.1f}|{','.join(ctx.reasons)}"
+
+
+def _setup(client):
+    tid = client.post("/tenants", json={"name": "explain-context"}).json()["id"]
+    inv = client.post(f"/tenants/{tid}/invoices", json={
+        "amount": 100.0, "invoice_date": "2025-01-01", "description": "Acme"
+    }).json()["id"]
+    tx_ids = client.post(f"/tenants/{tid}/bank-transactions/import", json=[
+        {"posted_at": "2025-01-08T00:00:00", "amount": 100.0, "description": "Acme"},
+        {"posted_at": "2025-01-08T00:00:00", "amount": 55.0, "description": "Other"},
+    ], headers={"Idempotency-Key": "c"}).json()["transaction_ids"]
+    return tid, inv, tx_ids
+
+
+def _explain(client, tid, inv, tx, **params):
+    return client.get(f"/tenants/{tid}/reconcile/explain",
+                      params={"invoice_id": inv, "transaction_id": tx, **params})
+
+
+def test_stored_match_is_explained_from_its_score_in_one_query(client, monkeypatch, record_sql):
+    monkeypatch.setattr(ai, "_default", AIExplainService(EchoClient()))
+    tid, inv, (tx, _) = _setup(client)
+    # a window wider than explain's default: the date reason only exists on the match
+    matches = client.post(f"/tenants/{tid}/reconcile", json={"window_days": 10}).json()
+    match = next(m for m in matches if m["bank_transaction_id"] == tx)
+    assert "date_within_7_days" in match["reasons"]
+
+    with record_sql() as statements:
+        r = _explain(client, tid, inv, tx)
+    assert r.status_code == 200, r.text
+    assert r.json()["explanation"] == f"{match['score']:.1f}|{','.join(match['reasons'])}"
+    lookups = [s for s in statements if "FROM invoices" in s or "FROM bank_transactions" in s]
+    assert len(lookups) == 1 and "JOIN matches" in lookups[0]
+
+    batch = client.post(f"/tenants/{tid}/reconcile/explain/batch", json={"match_ids": [match["id"]]}).json()
+    assert batch[0]["explanation"] == r.json()["explanation"]
+
+
+def test_ad_hoc_pairs_are_scored_with_window_days(client, monkeypatch):
+    monkeypatch.setattr(ai, "_default", AIExplainService(EchoClient()))
+    tid, inv, (tx, _) = _setup(client)
+
+    narrow = _explain(client, tid, inv, tx).json()["explanation"]
+    wide = _explain(client, tid, inv, tx, window_days=10).json()["explanation"]
+    assert "date_within" not in narrow
+    assert "date_within_7_days" in wide
+
+    assert _explain(client, tid, inv, tx, window_days=0).status_code == 400
+    assert _explain(client, tid, 999999, tx).json()["detail"] == "Invoice not found"
+    assert _explain(client, tid, inv, 999999).json()["detail"] == "Bank transaction not found"
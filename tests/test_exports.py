@@ -0,0 +1,97 @@
+import csv
+import gzip
+import io
+import json
+import zlib
+
+from app.modules.exports.formats import buffered, gzipped
+
+
+def _ndjson(r):
+    assert r.status_code == 200, r.text
+    return [json.loads(line) for line in r.text.splitlines()]
+
+
+def _setup(client):
+    tid = client.post("/tenants", json={"name": "export"}).json()["id"]
+    for i, (amount, day) in enumerate([(100, 1), (250, 5), (75.5, 20)]):
+        client.post(f"/tenants/{tid}/invoices", json={
+            "amount": amount, "invoice_date": f"2025-01-{day:02d}", "description": f"Invoice {i} ACME",
+        })
+    txs = [
+        {"external_id": "t1", "posted_at": "2025-01-02T10:00:00", "amount": 100, "description": "ACME payment"},
+        {"external_id": "t2", "posted_at": "2025-01-31T23:30:00", "amount": 75.5, "description": "ACME"},
+    ]
+    client.post(f"/tenants/{tid}/bank-transactions/import", json=txs, headers={"Idempotency-Key": "e"})
+    return tid
+
+
+def test_export_invoices_ndjson_csv_and_filters(client):
+    tid = _setup(client)
+    url = f"/tenants/{tid}/exports/invoices"
+
+    r = client.get(url)
+    assert r.headers["content-type"] == "application/x-ndjson"
+    rows = _ndjson(r)
+    assert [row["amount"] for row in rows] == [100.0, 250.0, 75.5]
+    assert rows[0]["invoice_date"] == "2025-01-01" and rows[0]["status"] == "open"
+
+    rows = _ndjson(client.get(url, params={"date_from": "2025-01-02", "date_to": "2025-01-20", "amount_max": 200}))
+    assert [row["amount"] for row in rows] == [75.5]
+    assert _ndjson(client.get(url, params={"status": "matched"})) == []
+
+    r = client.get(url, params={"format": "csv"})
+    assert r.headers["content-type"].startswith("text/csv")
+    assert 'filename="invoices-' in r.headers["content-disposition"]
+    parsed = list(csv.DictReader(io.StringIO(r.text)))
+    assert [p["amount"] for p in parsed] == ["100.0", "250.0", "75.5"]
+    assert parsed[2]["description"] == "Invoice 2 ACME"
+
+    assert client.get(url, params={"format": "xml"}).status_code == 400
+    assert client.get(url, params={"date_from": "2025-02-01", "date_to": "2025-01-01"}).status_code == 400
+
+
+def test_export_transactions_gzip_and_date_range_is_inclusive(client):
+    tid = _setup(client)
+    url = f"/tenants/{tid}/exports/bank-transactions"
+
+    r = client.get(url, params={"gzip": True, "date_to": "2025-01-31"})
+    assert r.headers["content-encoding"] == "gzip"
+    # the client decodes Content-Encoding transparently
+    assert [row["external_id"] for row in _ndjson(r)] == ["t1", "t2"]
+
+    rows = _ndjson(client.get(url, params={"date_from": "2025-01-03", "amount_min": 50}))
+    assert [row["external_id"] for row in rows] == ["t2"]
+
+
+def test_export_matches_joins_both_sides(client):
+    tid = _setup(client)
+    client.post(f"/tenants/{tid}/reconcile", json={})
+    url = f"/tenants/{tid}/exports/matches"
+
+    rows = _ndjson(client.get(url))
+    assert rows
+    assert {"invoice_amount", "transaction_amount", "posted_at", "reasons"} <= rows[0].keys()
+    assert isinstance(rows[0]["reasons"], list)
+    assert _ndjson(client.get(url, params={"status": "confirmed"})) == []
+
+    r = client.get(url, params={"format": "csv"})
+    parsed = list(csv.DictReader(io.StringIO(r.text)))
+    assert len(parsed) == len(rows)
+    assert json.loads(parsed[0]["reasons"]) == rows[0]["reasons"]
+
+
+def test_stream_chunks_are_incremental_and_gzip_decodable_as_they_arrive():
+    lines = [f"{i}\n" for i in range(5000)]
+    chunks = list(buffered(iter(lines), flush_bytes=1024))
+    # first line alone, then ~flush_bytes chunks
+    assert chunks[0] == b"0\n"
+    assert all(len(c) < 1100 for c in chunks)
+    assert b"".join(chunks).decode() == "".join(lines)
+
+    d = zlib.decompressobj(31)
+    out = b""
+    for chunk in gzipped(iter(chunks)):
+        out += d.decompress(chunk)
+    assert out == b"".join(chunks)
+    assert gzip.decompress(b"".join(gzipped(iter(chunks)))) == b"".join(chunks)
@@ -0,0 +1,72 @@
+from sqlalchemy import select
+
+from app.db.models import BankTransaction
+
+
+def _row(ext, amount=10.0):
+    return {"external_id": ext, "posted_at": "2025-01-03T10:00:00", "amount": amount, "description": f"row {ext}"}
+
+
+def test_bulk_import_dedups_against_db_and_payload_in_order(client, session):
+    tid = client.post("/tenants", json={"name": "bulk"}).json()["id"]
+    url = f"/tenants/{tid}/bank-transactions/import"
+
+    first = client.post(url, json=[_row("a"), _row("b")], headers={"Idempotency-Key": "b1"}).json()
+    assert first["imported"] == 2
+
+    payload = [_row("c"), _row("a"), _row(None), _row("d"), _row("c"), _row(""), _row("b")]
+    r = client.post(url, json=payload, headers={"Idempotency-Key": "b2"}).json()
+
+    assert r["imported"] == 4
+    assert r["deduped"] == r["duplicate_external_ids"] == 3
+    assert r["transaction_ids"][0] > max(first["transaction_ids"])
+
+    ext = dict(session.execute(
+        select(BankTransaction.id, BankTransaction.external_id).where(BankTransaction.tenant_id == tid)
+    ).all())
+    assert [ext[i] for i in r["transaction_ids"]] == ["c", None, "d", ""]
+
+
+def test_bulk_import_uses_set_based_statements(client, record_sql):
+    tid = client.post("/tenants", json={"name": "bulk-size"}).json()["id"]
+    rows = [_row(f"x{i}", amount=i + 1) for i in range(1200)] + [_row(None) for _ in range(50)]
+
+    with record_sql() as statements:
+        r = client.post(f"/tenants/{tid}/bank-transactions/import", json=rows, headers={"Idempotency-Key": "big"})
+
+    assert r.json()["imported"] == 1250
+    assert r.json()["transaction_ids"] == sorted(r.json()["transaction_ids"])
+    # idempotency lookup, INSERT ... ON CONFLICT DO NOTHING RETURNING batches (rows with an
+    # external id, then rows without one), idempotency key insert; the database dedups, no SELECT
+    assert len(statements) < 12
+    assert not [s for s in statements if s.startswith("SELECT") and "bank_transactions" in s]
+
+
+def test_concurrent_imports_of_same_external_ids_insert_each_once(client, session_factory):
+    import datetime as dt
+    import threading
+
+    from app.modules.transactions.service import BankTransactionService
+
+    tid = client.post("/tenants", json={"name": "bulk-race"}).json()["id"]
+    rows = [
+        {"external_id": f"r{i}", "posted_at": dt.datetime(2025, 1, 3, 10), "amount": 1.0, "description": "race"}
+        for i in range(200)
+    ]
+    results = []
+    barrier = threading.Barrier(4)
+
+    def run(n):
+        with session_factory() as session:
+            barrier.wait()
+            results.append(BankTransactionService(session).import_bulk(tid, f"race-{n}", rows))
+
+    threads = [threading.Thread(target=run, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(results) == 4
+    assert sum(r["imported"] for r in results) == 200
+    assert all(r["imported"] + r["deduped"] == 200 for r in results)
@@ -0,0 +1,136 @@
+import io
+
+import pytest
+
+from app.modules.transactions.service import BankTransactionService
+
+CSV = b"""external_id,posted_at,amount,currency,description
+f-1,2025-01-03T10:00:00,100.00,USD,Payment ACME
+f-2,2025-01-04T10:00:00,250.50,,Globex rent
+f-1,2025-01-05T10:00:00,1.00,USD,Repeated id
+,2025-01-06T10:00:00,42.00,EUR,No reference
+"""
+
+NDJSON = b"""{"external_id": "n-1", "posted_at": "2025-01-03T10:00:00", "amount": 10, "description": "one"}
+
+{"external_id": "f-2", "posted_at": "2025-01-04T10:00:00", "amount": 20, "description": "already imported"}
+{"posted_at": "2025-01-05T10:00:00", "amount": 30, "currency": "EUR", "description": "three"}
+"""
+
+CAMT = b"""<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.02">
+  <BkToCstmrStmt>
+    <Stmt>
+      <Id>STMT-1</Id>
+      <Ntry>
+        <NtryRef>c-1</NtryRef>
+        <Amt Ccy="EUR">1200.00</Amt>
+        <CdtDbtInd>CRDT</CdtDbtInd>
+        <BookgDt><Dt>2025-01-07</Dt></BookgDt>
+        <NtryDtls><TxDtls><RmtInf><Ustrd>Initech</Ustrd><Ustrd>INV 42</Ustrd></RmtInf></TxDtls></NtryDtls>
+      </Ntry>
+      <Ntry>
+        <AcctSvcrRef>c-2</AcctSvcrRef>
+        <Amt Ccy="USD">15.00</Amt>
+        <CdtDbtInd>DBIT</CdtDbtInd>
+        <BookgDt><DtTm>2025-01-08T09:30:00</DtTm></BookgDt>
+        <AddtlNtryInf>Bank fee</AddtlNtryInf>
+      </Ntry>
+    </Stmt>
+  </BkToCstmrStmt>
+</Document>
+"""
+
+
+def _upload(client, tid, body, key, content_type=None, fmt=None):
+    url = f"/tenants/{tid}/bank-transactions/import/file"
+    headers = {"Idempotency-Key": key}
+    if content_type:
+        headers["Content-Type"] = content_type
+    return client.post(url, content=body, headers=headers, params={"format": fmt} if fmt else None)
+
+
+def test_file_import_csv_ndjson_camt(client, monkeypatch, session):
+    from app.core import config
+
+    # several commits per file
+    monkeypatch.setattr(config, "settings", config.Settings(import_chunk_size=2))
+    monkeypatch.setattr("app.modules.transactions.api.settings", config.settings)
+    tid = client.post("/tenants", json={"name": "files"}).json()["id"]
+
+    csv = _upload(client, tid, CSV, "csv-1", content_type="text/csv")
+    assert csv.status_code == 200, csv.text
+    assert csv.json()["imported"] == 3
+    assert csv.json()["deduped"] == 1
+
+    nd = _upload(client, tid, NDJSON, "nd-1", fmt="ndjson").json()
+    assert nd["imported"] == 2
+    assert nd["deduped"] == 1
+
+    camt = _upload(client, tid, CAMT, "camt-1", content_type="application/xml").json()
+    assert camt["imported"] == 2
+
+    txs = BankTransactionService(session).list(tid).items
+    by_ext = {t.external_id: t for t in txs}
+    assert len(txs) == 7
+    assert by_ext["f-2"].currency == "USD"
+    c1 = by_ext["c-1"]
+    assert (float(c1.amount), c1.currency, c1.description) == (1200.0, "EUR", "Initech INV 42")
+    assert float(by_ext["c-2"].amount) == -15.0
+    assert by_ext["c-2"].posted_at.isoformat() == "2025-01-08T09:30:00"
+
+    # replay returns the stored result; the same key with another file conflicts
+    assert _upload(client, tid, CSV, "csv-1", content_type="text/csv").json() == csv.json()
+    assert _upload(client, tid, NDJSON, "csv-1", fmt="ndjson").status_code == 409
+
+
+def test_file_import_rejects_bad_rows_before_writing(client):
+    tid = client.post("/tenants", json={"name": "files-bad"}).json()["id"]
+    body = CSV + b"f-9,not-a-date,5.00,USD,Broken\n"
+
+    r = _upload(client, tid, body, "bad", content_type="text/csv")
+    assert r.status_code == 400
+    assert "row 6" in r.text
+
+    assert _upload(client, tid, b"x,y\n1,2\n", "hdr", fmt="csv").status_code == 400
+    assert _upload(client, tid, CSV, "fmt").status_code == 400
+    # nothing from the rejected file was committed
+    assert _upload(client, tid, CSV, "good", content_type="text/csv").json()["imported"] == 3
+
+
+def test_interrupted_file_import_resumes_after_committed_chunks(client, session):
+    from sqlalchemy import func, select
+
+    from app.db.models import BankTransaction
+    from app.modules.transactions.parsers import parse_statement
+
+    tid = client.post("/tenants", json={"name": "files-resume"}).json()["id"]
+    # no external ids: only the stored progress keeps a retry from importing rows twice
+    body = b"external_id,posted_at,amount,currency,description\n" + b"".join(
+        b",2025-01-%02dT10:00:00,%d.00,USD,Row %d\n" % (n + 1, n + 1, n) for n in range(5)
+    )
+    opened = []
+
+    def rows():
+        return parse_statement("csv", io.BytesIO(body))
+
+    def failing_rows():
+        opened.append(1)
+        for pos, raw in rows():
+            # the insert pass dies after two chunks of two were committed
+            if len(opened) == 2 and pos == 6:
+                raise RuntimeError("connection lost")
+            yield pos, raw
+
+    count = select(func.count()).select_from(BankTransaction).where(BankTransaction.tenant_id == tid)
+    with pytest.raises(RuntimeError):
+        BankTransactionService(session).import_file(tid, "stmt", "h", failing_rows, chunk_size=2)
+    assert session.scalar(count) == 4
+
+    result = BankTransactionService(session).import_file(tid, "stmt", "h", rows, chunk_size=2)
+    assert (result["imported"], result["deduped"]) == (5, 0)
+    assert session.scalar(count) == 5
+    ids = list(session.scalars(select(BankTransaction.id).where(BankTransaction.tenant_id == tid)
+                               .order_by(BankTransaction.id)))
+    assert result["transaction_ids"] == ids
+    assert BankTransactionService(session).import_file(tid, "stmt", "h", rows, chunk_size=2) == result
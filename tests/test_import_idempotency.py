@@ -44,3 +44,83 @@ def test_import_idempotency_conflict(client):
 
     r = client.post(f"/tenants/{tid}/bank-transactions/import", json=payload2, headers=headers)
     assert r.status_code == 409
+
+def test_canonical_hash_matches_whole_payload_dump():
+    import hashlib
+    import json
+
+    from app.modules.transactions.idempotency import canonical_hash
+
+    items = [
+        {"external_id": "a", "posted_at": dt.datetime(2025, 1, 3, 10), "amount": 1.5, "description": "x é"},
+        {"posted_at": dt.datetime(2025, 1, 4), "amount": 2, "description": "y", "currency": "EUR"},
+    ]
+    for payload in (items, items[:1], []):
+        whole = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        assert canonical_hash(payload) == hashlib.sha256(whole.encode("utf-8")).hexdigest()
+
+def test_stored_response_is_compact_and_replays_identically(client, session):
+    from sqlalchemy import select
+
+    from app.db.models import IdempotencyKey
+    from app.modules.transactions.idempotency import decode_ids, encode_ids, unpack_response
+
+    assert encode_ids([5, 6, 7, 9, 10, 3]) == [[5, 3], [9, 2], [3, 1]]
+    assert decode_ids(encode_ids([5, 6, 7, 9, 10, 3])) == [5, 6, 7, 9, 10, 3]
+    # rows stored before range encoding still replay
+    assert unpack_response('{"imported":1,"transaction_ids":[4]}') == {"imported": 1, "transaction_ids": [4]}
+
+    tid = client.post("/tenants", json={"name": "t-compact"}).json()["id"]
+    payload = [
+        {"external_id": f"c{i}", "posted_at": "2025-01-03T10:00:00", "amount": i + 1, "description": "row"}
+        for i in range(2000)
+    ]
+    url = f"/tenants/{tid}/bank-transactions/import"
+    first = client.post(url, json=payload, headers={"Idempotency-Key": "big"}).json()
+    replay = client.post(url, json=payload, headers={"Idempotency-Key": "big"}).json()
+    assert replay == first
+    assert len(first["transaction_ids"]) == 2000
+
+    stored = session.scalar(select(IdempotencyKey.response_json).where(IdempotencyKey.key == "big"))
+    assert len(stored) < 200
+
+def test_replay_is_served_from_cache_without_db_lookup(client, record_sql):
+    tid = client.post("/tenants", json={"name": "t-cache"}).json()["id"]
+    payload = [{"external_id": "e1", "posted_at": "2025-01-03T10:00:00", "amount": 5.0, "description": "x"}]
+    url = f"/tenants/{tid}/bank-transactions/import"
+    first = client.post(url, json=payload, headers={"Idempotency-Key": "storm"}).json()
+
+    with record_sql() as statements:
+        for _ in range(5):
+            assert client.post(url, json=payload, headers={"Idempotency-Key": "storm"}).json() == first
+        changed = [{**payload[0], "amount": 6.0}]
+        conflict = client.post(url, json=changed, headers={"Idempotency-Key": "storm"})
+
+    assert conflict.status_code == 409
+    assert not [s for s in statements if "idempotency_keys" in s]
+
+def test_expired_keys_are_purged_in_batches_and_reusable(client, session):
+    from sqlalchemy import func, select, update
+
+    from app.db.models import IdempotencyKey
+    from app.modules.transactions.idempotency import purge_expired, replay_cache
+
+    tid = client.post("/tenants", json={"name": "t-ttl"}).json()["id"]
+    url = f"/tenants/{tid}/bank-transactions/import"
+    for i in range(5):
+        row = {"external_id": f"t{i}", "posted_at": "2025-01-03T10:00:00", "amount": 1.0, "description": "x"}
+        client.post(url, json=[row], headers={"Idempotency-Key": f"k{i}"})
+
+    old = dt.datetime.now(dt.UTC) - dt.timedelta(days=365)
+    session.execute(update(IdempotencyKey).where(IdempotencyKey.key.in_(["k0", "k1", "k2"])).values(created_at=old))
+    session.commit()
+    replay_cache.clear()
+
+    # an expired key no longer replays or conflicts: the new payload is imported
+    other = [{"external_id": "new", "posted_at": "2025-01-03T10:00:00", "amount": 2.0, "description": "y"}]
+    assert client.post(url, json=other, headers={"Idempotency-Key": "k0"}).json()["imported"] == 1
+
+    assert purge_expired(session, batch_size=1) == 2
+    keys = set(session.scalars(select(IdempotencyKey.key)))
+    assert keys == {"k0", "k3", "k4"}
+    assert session.scalar(select(func.count(IdempotencyKey.id))) == 3
@@ -0,0 +1,157 @@
+import datetime as dt
+
+import pytest
+from sqlalchemy import MetaData, Table, create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.errors import ConflictError
+from app.db.init_db import ADDED_COLUMNS, upgrade
+from app.db.models import Base
+from app.modules.reconciliation.match_service import MatchService
+from app.modules.transactions.service import BankTransactionService
+
+
+def _old_schema() -> MetaData:
+    """The current tables without ADDED_COLUMNS or secondary indexes, as a database created before them has."""
+    old = MetaData()
+    for table in Base.metadata.sorted_tables:
+        missing = {column for name, column, _ in ADDED_COLUMNS if name == table.name}
+        columns = []
+        for c in table.columns:
+            if c.name not in missing:
+                columns.append(c._copy())
+                columns[-1].index = None
+        Table(table.name, old, *columns)
+    return old
+
+
+@pytest.fixture()
+def old_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    _old_schema().create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO tenants (id, name, created_at) VALUES (1, 't', '2024-01-01 00:00:00')"))
+    yield engine
+    engine.dispose()
+
+
+def test_upgrade_adds_and_backfills_columns_missing_from_an_older_database(old_engine):
+    with old_engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO invoices (tenant_id, amount, currency, status, created_at)"
+            " VALUES (1, 10, 'USD', 'open', '2024-05-06 07:08:09')"
+        ))
+
+    added = upgrade(old_engine)
+    assert added[:len(ADDED_COLUMNS)] == [f"{table}.{column}" for table, column, _ in ADDED_COLUMNS]
+    assert upgrade(old_engine) == []
+
+    insp = inspect(old_engine)
+    assert "ix_matches_job_id" in {i["name"] for i in insp.get_indexes("matches")}
+    updated = next(c for c in insp.get_columns("invoices") if c["name"] == "updated_at")
+    assert not updated["nullable"]
+    with old_engine.connect() as conn:
+        assert conn.execute(text("SELECT updated_at FROM invoices")).scalar() == "2024-05-06 07:08:09"
+
+
+def test_upgrade_creates_the_external_id_index_imports_rely_on(old_engine):
+    assert "uq_tx_tenant_external_id" in upgrade(old_engine)
+    assert "uq_tx_tenant_external_id" in {i["name"] for i in inspect(old_engine).get_indexes("bank_transactions")}
+
+    with sessionmaker(bind=old_engine)() as session:
+        rows = [{"external_id": "a", "posted_at": dt.datetime(2025, 1, 1), "amount": 1, "description": "x"}] * 2
+        result = BankTransactionService(session).import_bulk(1, "k", rows)
+    assert (result["imported"], result["deduped"]) == (1, 1)
+
+
+def test_upgrade_refuses_a_unique_index_over_duplicate_rows(old_engine):
+    with old_engine.begin() as conn:
+        for _ in range(2):
+            conn.execute(text(
+                "INSERT INTO bank_transactions (tenant_id, external_id, posted_at, amount, currency, description,"
+                " created_at) VALUES (1, 'dup', '2025-01-01', 1, 'USD', 'x', '2025-01-01')"
+            ))
+
+    with pytest.raises(RuntimeError, match="uq_tx_tenant_external_id: 1 .*tenant_id, external_id"):
+        upgrade(old_engine)
+    # the other indexes were still built
+    assert "ix_tx_tenant_posted_id" in {i["name"] for i in inspect(old_engine).get_indexes("bank_transactions")}
+
+
+def _schema(engine) -> dict:
+    insp = inspect(engine)
+    return {
+        table: (
+            sorted(c["name"] for c in insp.get_columns(table)),
+            sorted((i["name"], tuple(i["column_names"]), bool(i["unique"])) for i in insp.get_indexes(table)),
+        )
+        for table in insp.get_table_names()
+    }
+
+
+def test_upgraded_database_has_the_same_schema_as_a_fresh_one(old_engine, tmp_path):
+    fresh = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    Base.metadata.create_all(bind=fresh)
+
+    upgrade(old_engine)
+    assert _schema(old_engine) == _schema(fresh)
+    fresh.dispose()
+
+
+def _two_matches_for_one_invoice(engine, status: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO invoices (id, tenant_id, amount, currency, status, created_at)"
+            " VALUES (1, 1, 10, 'USD', 'open', '2025-01-01')"
+        ))
+        for n in (1, 2):
+            conn.execute(text(
+                "INSERT INTO bank_transactions (id, tenant_id, posted_at, amount, currency, description, created_at)"
+                f" VALUES ({n}, 1, '2025-01-01', 10, 'USD', 'x', '2025-01-01')"
+            ))
+            conn.execute(text(
+                "INSERT INTO matches (id, tenant_id, invoice_id, bank_transaction_id, score, status, reasons,"
+                f" created_at) VALUES ({n}, 1, 1, {n}, 90, '{status}', '[]', '2025-01-01')"
+            ))
+
+
+def test_upgrade_restores_the_one_confirmed_match_per_invoice_guard(old_engine):
+    _two_matches_for_one_invoice(old_engine, "proposed")
+    added = upgrade(old_engine)
+    assert {"uq_match_confirmed_invoice", "uq_match_confirmed_tx"} <= set(added)
+
+    with sessionmaker(bind=old_engine)() as session:
+        MatchService(session).confirm(1, 1)
+        # the same statement a concurrent confirm of the invoice's other proposal runs
+        with pytest.raises(ConflictError):
+            MatchService(session).confirm(1, 2)
+
+
+def test_upgrade_refuses_existing_double_confirmations(old_engine):
+    _two_matches_for_one_invoice(old_engine, "confirmed")
+    with pytest.raises(RuntimeError, match="uq_match_confirmed_invoice"):
+        upgrade(old_engine)
+
+
+def test_keyset_pages_use_their_indexes_after_upgrade(old_engine):
+    upgrade(old_engine)
+    with old_engine.connect() as conn:
+        def plan(sql):
+            return " ".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+        assert "ix_invoice_tenant_status_id" in plan(
+            "SELECT id FROM invoices WHERE tenant_id = 1 AND status = 'open' AND id > 10 ORDER BY id LIMIT 100"
+        )
+        assert "ix_tx_tenant_posted_id" in plan(
+            "SELECT id FROM bank_transactions WHERE tenant_id = 1 AND (posted_at, id) < ('2025-01-01', 5)"
+            " ORDER BY posted_at DESC, id DESC LIMIT 100"
+        )
+
+
+def test_idempotency_purge_uses_the_created_at_index_after_upgrade(old_engine):
+    assert "ix_idempotency_keys_created_at" in upgrade(old_engine)
+    with old_engine.connect() as conn:
+        plan = " ".join(row[-1] for row in conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM idempotency_keys WHERE created_at < '2025-01-01' LIMIT 1000"
+        )))
+    assert "ix_idempotency_keys_created_at" in plan
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+
+def _items(n, start=1):
+    return [{"amount": start + i, "invoice_date": "2025-01-10", "description": f"bulk {i}"} for i in range(n)]
+
+
+def test_bulk_create_returns_ids_in_order_and_replays(client):
+    tid = client.post("/tenants", json={"name": "bulk-inv"}).json()["id"]
+    url = f"/tenants/{tid}/invoices/bulk"
+    payload = _items(7)
+
+    r = client.post(url, json=payload, headers={"Idempotency-Key": "erp-1"})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["created"] == 7
+
+    listed = client.get(f"/tenants/{tid}/invoices").json()
+    assert [i["id"] for i in listed] == body["invoice_ids"]
+    assert [i["amount"] for i in listed] == [p["amount"] for p in payload]
+    assert {i["status"] for i in listed} == {"open"}
+
+    assert client.post(url, json=payload, headers={"Idempotency-Key": "erp-1"}).json() == body
+    assert len(client.get(f"/tenants/{tid}/invoices").json()) == 7
+    assert client.post(url, json=_items(2), headers={"Idempotency-Key": "erp-1"}).status_code == 409
+
+    # the same key string on the transaction import is a different key
+    tx = [{"posted_at": "2025-01-10T00:00:00", "amount": 1.0, "description": "x"}]
+    assert client.post(f"/tenants/{tid}/bank-transactions/import", json=tx,
+                       headers={"Idempotency-Key": "erp-1"}).status_code == 200
+
+
+def test_bulk_create_validates_everything_first(client):
+    tid = client.post("/tenants", json={"name": "bulk-bad"}).json()["id"]
+    url = f"/tenants/{tid}/invoices/bulk"
+    payload = _items(5)
+    payload[3]["amount"] = -1
+
+    r = client.post(url, json=payload)
+    assert r.status_code == 400
+    assert "item 4" in r.json()["detail"]
+    assert client.post(url, json=[{"currency": "EUR"}]).status_code == 400
+    assert client.post(url, json={"amount": 1}).status_code == 400
+    assert client.post(url, json=[]).status_code == 400
+    assert client.get(f"/tenants/{tid}/invoices").json() == []
+
+
+def test_bulk_create_from_ndjson(client):
+    tid = client.post("/tenants", json={"name": "bulk-ndjson"}).json()["id"]
+    body = "\n".join(json.dumps(it) for it in _items(3)) + "\n"
+    headers = {"Content-Type": "application/x-ndjson", "Idempotency-Key": "nd"}
+
+    r = client.post(f"/tenants/{tid}/invoices/bulk", content=body, headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.json()["created"] == 3
+    assert client.post(f"/tenants/{tid}/invoices/bulk", content=body, headers=headers).json() == r.json()
+
+    bad = body + "{not json\n"
+    r = client.post(f"/tenants/{tid}/invoices/bulk", content=bad, headers={"Content-Type": "application/x-ndjson"})
+    assert r.status_code == 400
+    assert "line 4" in r.json()["detail"]
+
+
+def test_interrupted_bulk_create_resumes_after_committed_chunks(client, session):
+    from sqlalchemy import func, select
+
+    from app.db.models import Invoice
+    from app.modules.invoices.service import InvoiceService, numbered
+
+    tid = client.post("/tenants", json={"name": "bulk-resume"}).json()["id"]
+    items = _items(5)
+    opened = []
+
+    def failing_items():
+        opened.append(1)
+        for pos, item in numbered(items):
+            # the insert pass dies after two chunks of two were committed
+            if len(opened) == 2 and pos == 5:
+                raise RuntimeError("connection lost")
+            yield pos, item
+
+    with pytest.raises(RuntimeError):
+        InvoiceService(session).create_bulk(tid, "resume", "h", failing_items, chunk_size=2)
+    assert session.scalar(select(func.count()).select_from(Invoice).where(Invoice.tenant_id == tid)) == 4
+
+    result = InvoiceService(session).create_bulk(tid, "resume", "h", lambda: numbered(items), chunk_size=2)
+    assert result["created"] == 5
+    ids = list(session.scalars(select(Invoice.id).where(Invoice.tenant_id == tid).order_by(Invoice.id)))
+    assert result["invoice_ids"] == ids
+    assert InvoiceService(session).create_bulk(tid, "resume", "h", lambda: numbered(items), chunk_size=2) == result
@@ -0,0 +1,153 @@
+def _setup(client, name):
+    tid = client.post("/tenants", json={"name": name}).json()["id"]
+    invoices = [
+        (100.0, "Acme January"),    # one clear best transaction
+        (200.0, "Globex"),          # same transaction is best for the next invoice too
+        (200.0, "Globex"),
+        (300.0, "Initech"),         # two equally good transactions
+        (400.0, "Umbrella"),        # only a weak candidate
+    ]
+    inv_ids = [
+        client.post(f"/tenants/{tid}/invoices", json={
+            "amount": amount, "invoice_date": "2025-01-01", "description": desc,
+        }).json()["id"]
+        for amount, desc in invoices
+    ]
+    txs = [
+        {"external_id": "a", "posted_at": "2025-01-01T10:00:00", "amount": 100.0, "description": "Acme January"},
+        {"external_id": "g", "posted_at": "2025-01-01T10:00:00", "amount": 200.0, "description": "Globex"},
+        {"external_id": "i1", "posted_at": "2025-01-02T10:00:00", "amount": 300.0, "description": "Initech"},
+        {"external_id": "i2", "posted_at": "2025-01-02T10:00:00", "amount": 300.0, "description": "Initech"},
+        {"external_id": "u", "posted_at": "2025-01-03T10:00:00", "amount": 390.0, "description": "misc"},
+    ]
+    tx_ids = client.post(f"/tenants/{tid}/bank-transactions/import", json=txs,
+                         headers={"Idempotency-Key": "k"}).json()["transaction_ids"]
+    matches = client.post(f"/tenants/{tid}/reconcile", json={"max_candidates_per_invoice": 3}).json()
+    return tid, inv_ids, tx_ids, matches
+
+
+def test_auto_confirm_only_takes_unambiguous_best_proposals(client):
+    tid, inv_ids, tx_ids, matches = _setup(client, "auto")
+    best = max((m for m in matches if m["invoice_id"] == inv_ids[0]), key=lambda m: m["score"])
+    weak = max(m["score"] for m in matches if m["invoice_id"] == inv_ids[4])
+    assert weak < best["score"]
+
+    r = client.post(f"/tenants/{tid}/matches/confirm", json={"auto_confirm_above": weak})
+    assert r.status_code == 200, r.text
+    confirmed = r.json()
+    assert [(m["invoice_id"], m["bank_transaction_id"]) for m in confirmed] == [(inv_ids[0], tx_ids[0])]
+    assert confirmed[0]["status"] == "confirmed"
+
+    statuses = {i["id"]: i["status"] for i in client.get(f"/tenants/{tid}/invoices").json()}
+    assert statuses == {inv_ids[0]: "matched", **{i: "open" for i in inv_ids[1:]}}
+
+    # nothing left that qualifies
+    assert client.post(f"/tenants/{tid}/matches/confirm", json={"auto_confirm_above": weak}).json() == []
+
+
+def test_bulk_confirm_is_all_or_nothing_and_one_per_invoice_and_transaction(client):
+    tid, inv_ids, tx_ids, matches = _setup(client, "bulk")
+    url = f"/tenants/{tid}/matches/confirm"
+    by_pair = {(m["invoice_id"], m["bank_transaction_id"]): m["id"] for m in matches}
+    acme = by_pair[(inv_ids[0], tx_ids[0])]
+    globex_2, globex_3 = by_pair[(inv_ids[1], tx_ids[1])], by_pair[(inv_ids[2], tx_ids[1])]
+    initech = by_pair[(inv_ids[3], tx_ids[2])]
+
+    # same transaction twice in one request
+    assert client.post(url, json={"match_ids": [acme, globex_2, globex_3]}).status_code == 409
+    assert client.post(url, json={"match_ids": [acme, 999999]}).status_code == 404
+    assert client.post(url, json={}).status_code == 400
+    assert client.post(url, json={"match_ids": [acme], "auto_confirm_above": 0.5}).status_code == 400
+    assert {i["status"] for i in client.get(f"/tenants/{tid}/invoices").json()} == {"open"}
+
+    r = client.post(url, json={"match_ids": [acme, globex_2, initech]})
+    assert r.status_code == 200, r.text
+    assert [m["id"] for m in r.json()] == sorted([acme, globex_2, initech])
+    matched = {i["id"] for i in client.get(f"/tenants/{tid}/invoices", params={"status": "matched"}).json()}
+    assert matched == {inv_ids[0], inv_ids[1], inv_ids[3]}
+
+    # the transaction is taken now, from another invoice's side too
+    assert client.post(url, json={"match_ids": [globex_3]}).status_code == 409
+    assert client.post(f"/tenants/{tid}/matches/{globex_3}/confirm").status_code == 409
+    assert client.post(url, json={"match_ids": [acme]}).status_code == 400
+
+
+def test_bulk_confirm_runs_in_a_few_statements(client, record_sql):
+    tid, inv_ids, tx_ids, matches = _setup(client, "stmts")
+    best = {}
+    for m in matches:
+        best.setdefault(m["invoice_id"], m)
+    picks, used = [], set()
+    for m in best.values():
+        if m["bank_transaction_id"] not in used:
+            used.add(m["bank_transaction_id"])
+            picks.append(m["id"])
+
+    with record_sql() as statements:
+        r = client.post(f"/tenants/{tid}/matches/confirm", json={"match_ids": picks})
+    assert r.status_code == 200, r.text
+    assert len(r.json()) == len(picks) >= 3
+    assert len(statements) == 3  # load, UPDATE matches ... RETURNING, UPDATE invoices
+
+
+def test_concurrent_confirms_leave_one_per_invoice_and_transaction(client, session_factory):
+    import datetime as dt
+    import random
+    import threading
+
+    from sqlalchemy import func, insert, select
+
+    from app.core.errors import BadRequestError, ConflictError
+    from app.db.models import Invoice, Match
+    from app.modules.reconciliation.match_service import MatchService
+
+    tid = client.post("/tenants", json={"name": "confirm-race"}).json()["id"]
+    inv_ids = [client.post(f"/tenants/{tid}/invoices", json={"amount": 10 + i}).json()["id"] for i in range(5)]
+    txs = [{"posted_at": "2025-01-01T00:00:00", "amount": 10.0, "description": f"t{i}"} for i in range(8)]
+    tx_ids = client.post(f"/tenants/{tid}/bank-transactions/import", json=txs,
+                         headers={"Idempotency-Key": "race"}).json()["transaction_ids"]
+
+    with session_factory() as session:
+        # every invoice x transaction pair is a proposal, so all of them contend
+        match_ids = list(session.scalars(insert(Match).returning(Match.id), [
+            {"tenant_id": tid, "invoice_id": i, "bank_transaction_id": t, "score": 0.5, "status": "proposed",
+             "created_at": dt.datetime(2025, 1, 1)}
+            for i in inv_ids for t in tx_ids
+        ]))
+        session.commit()
+
+    outcomes = []
+    barrier = threading.Barrier(8)
+
+    def run(seed):
+        ids = match_ids[:]
+        random.Random(seed).shuffle(ids)
+        with session_factory() as session:
+            service = MatchService(session)
+            barrier.wait()
+            for match_id in ids:
+                try:
+                    service.confirm(tid, match_id)
+                    outcomes.append("confirmed")
+                except (ConflictError, BadRequestError):
+                    outcomes.append("rejected")
+
+    threads = [threading.Thread(target=run, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(outcomes) == 8 * len(match_ids)
+    assert outcomes.count("confirmed") == len(inv_ids)
+
+    with session_factory() as session:
+        confirmed = session.execute(
+            select(Match.invoice_id, Match.bank_transaction_id).where(Match.status == "confirmed")
+        ).all()
+        matched = set(session.scalars(select(Invoice.id).where(Invoice.status == "matched")))
+        assert session.scalar(select(func.count()).select_from(Match).where(Match.status == "proposed")) \
+            == len(match_ids) - len(inv_ids)
+    assert sorted(r.invoice_id for r in confirmed) == inv_ids
+    assert len({r.bank_transaction_id for r in confirmed}) == len(inv_ids)
+    assert matched == set(inv_ids)
@@ -0,0 +1,97 @@
+import datetime as dt
+
+from app.core.pagination import encode_cursor
+
+
+def _pages(client, url, **params):
+    out, cursor = [], None
+    while True:
+        r = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert r.status_code == 200, r.text
+        out.append(r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            return out
+
+
+def test_invoice_cursor_pages_cover_filtered_list_once(client):
+    tid = client.post("/tenants", json={"name": "pages-inv"}).json()["id"]
+    ids = [client.post(f"/tenants/{tid}/invoices", json={"amount": 10 + i}).json()["id"] for i in range(11)]
+
+    pages = _pages(client, f"/tenants/{tid}/invoices", limit=4)
+    assert [len(p) for p in pages] == [4, 4, 3]
+    assert [i["id"] for p in pages for i in p] == ids
+
+    filtered = _pages(client, f"/tenants/{tid}/invoices", limit=2, status="open", amount_min=15)
+    assert [i["id"] for p in filtered for i in p] == ids[5:]
+
+    assert client.get(f"/tenants/{tid}/invoices", params={"cursor": "garbage"}).status_code == 400
+    assert client.get(f"/tenants/{tid}/invoices", params={"limit": 0}).status_code == 400
+
+
+def test_bank_transaction_cursor_pages_newest_first_with_ties(client):
+    tid = client.post("/tenants", json={"name": "pages-tx"}).json()["id"]
+    base = dt.datetime(2025, 1, 1, 9)
+    payload = [
+        # several rows share a posted_at, so the id tiebreak matters
+        {"external_id": f"p{i}", "posted_at": (base + dt.timedelta(hours=i // 3)).isoformat(), "amount": 1.0,
+         "description": f"row {i}"}
+        for i in range(10)
+    ]
+    client.post(f"/tenants/{tid}/bank-transactions/import", json=payload, headers={"Idempotency-Key": "p"})
+
+    pages = _pages(client, f"/tenants/{tid}/bank-transactions", limit=3)
+    rows = [t for p in pages for t in p]
+    assert len(rows) == 10 and len(pages) == 4
+    keys = [(t["posted_at"], t["id"]) for t in rows]
+    assert keys == sorted(keys, reverse=True)
+
+
+
+def test_graphql_keeps_list_fields_next_to_page_fields(client):
+    tid = client.post("/tenants", json={"name": "pages-gql"}).json()["id"]
+    payload = [{"posted_at": f"2025-01-0{i + 1}T00:00:00", "amount": 1.0, "description": f"r{i}"} for i in range(5)]
+    client.post(f"/tenants/{tid}/bank-transactions/import", json=payload, headers={"Idempotency-Key": "g"})
+
+    def gql(query):
+        r = client.post("/graphql", json={"query": query, "variables": {"t": tid}})
+        assert "errors" not in r.json(), r.text
+        return r.json()["data"]
+
+    legacy = gql("query($t:Int!){ bankTransactions(tenantId:$t, limit:2, offset:1) { description } }")
+    assert [tx["description"] for tx in legacy["bankTransactions"]] == ["r3", "r2"]
+    # the legacy field never had a page-size cap
+    unbounded = gql("query($t:Int!){ bankTransactions(tenantId:$t, limit:5000) { description } }")
+    assert len(unbounded["bankTransactions"]) == 5
+
+    first = gql("query($t:Int!){ bankTransactionsPage(tenantId:$t, limit:3) { items { description } nextCursor } }")
+    page = first["bankTransactionsPage"]
+    assert [tx["description"] for tx in page["items"]] == ["r4", "r3", "r2"]
+    rest = gql('query($t:Int!){ bankTransactionsPage(tenantId:$t, limit:3, cursor:"%s") { items { description } '
+               'nextCursor } }' % page["nextCursor"])["bankTransactionsPage"]
+    assert [tx["description"] for tx in rest["items"]] == ["r1", "r0"] and rest["nextCursor"] is None
+
+
+def test_invoice_list_without_limit_or_cursor_is_complete(client):
+    tid = client.post("/tenants", json={"name": "pages-all"}).json()["id"]
+    for i in range(105):
+        client.post(f"/tenants/{tid}/invoices", json={"amount": 1 + i})
+
+    r = client.get(f"/tenants/{tid}/invoices")
+    assert r.status_code == 200
+    assert len(r.json()) == 105
+    assert "X-Next-Cursor" not in r.headers
+
+    first = client.get(f"/tenants/{tid}/invoices", params={"limit": 100})
+    rest = client.get(f"/tenants/{tid}/invoices", params={"cursor": first.headers["X-Next-Cursor"]})
+    assert len(first.json()) + len(rest.json()) == 105
+
+
+def test_cursor_with_wrong_element_types_is_rejected(client):
+    tid = client.post("/tenants", json={"name": "pages-bad"}).json()["id"]
+    for key in (["1 OR 1=1"], [1.5], [True], [None], [[1]], [1, 2]):
+        cursor = encode_cursor(*key)
+        assert client.get(f"/tenants/{tid}/invoices", params={"cursor": cursor}).status_code == 400, key
+    for key in (["yesterday", 3], [5, 3], ["2024-01-01T00:00:00", "3"]):
+        cursor = encode_cursor(*key)
+        assert client.get(f"/tenants/{tid}/bank-transactions", params={"cursor": cursor}).status_code == 400, key
@@ -42,3 +42,27 @@ def test_reconcile_ranking_and_confirm(client, monkeypatch):
         f"/tenants/{tid}/reconcile/explain?invoice_id={invoice_id}&transaction_id={top['bank_transaction_id']}"
     ).json()
     assert ex["explanation"]  # non-empty fallback or AI explanation
+
+
+def test_reconcile_persists_matches_without_per_row_round_trips(client, record_sql):
+    t = client.post("/tenants", json={"name": "t-bulk"}).json()
+    tid = t["id"]
+
+    for i in range(20):
+        client.post(f"/tenants/{tid}/invoices", json={
+            "amount": 100.0 + i, "currency": "USD", "invoice_date": "2025-01-01", "description": f"Acme {i}",
+        })
+    payload = [
+        {"external_id": f"x{i}", "posted_at": "2025-01-02T10:00:00Z", "amount": 100.0 + i, "description": f"Acme {i}"}
+        for i in range(20)
+    ]
+    client.post(f"/tenants/{tid}/bank-transactions/import", json=payload, headers={"Idempotency-Key": "bulk"})
+
+    with record_sql() as statements:
+        matches = client.post(f"/tenants/{tid}/reconcile", json={"max_candidates_per_invoice": 3}).json()
+
+    assert len(matches) == 60
+    assert len({m["id"] for m in matches}) == 60
+    assert all(m["status"] == "proposed" and m["tenant_id"] == tid for m in matches)
+    assert matches[0]["reasons"] == ["amount_exact", "date_within_1_days", "text_contains"]
+    assert len(statements) < 15
@@ -0,0 +1,96 @@
+import datetime as dt
+
+
+def _ranked(matches):
+    return [(m["invoice_id"], m["bank_transaction_id"], m["score"], m["reasons"]) for m in matches]
+
+
+def _import(client, tid, key, rows):
+    return client.post(f"/tenants/{tid}/bank-transactions/import", json=rows, headers={"Idempotency-Key": key}).json()
+
+
+def test_incremental_reconcile_matches_full_rescore(client):
+    tid = client.post("/tenants", json={"name": "inc"}).json()["id"]
+    body = {"window_days": 3, "max_candidates_per_invoice": 2}
+
+    inv1 = client.post(f"/tenants/{tid}/invoices", json={
+        "amount": 100.0, "currency": "USD", "invoice_date": "2025-01-01", "description": "Acme January",
+    }).json()
+    inv2 = client.post(f"/tenants/{tid}/invoices", json={
+        "amount": 250.0, "currency": "USD", "invoice_date": "2025-01-05", "description": "Globex rent",
+    }).json()
+    _import(client, tid, "b1", [
+        {"external_id": "a", "posted_at": "2025-01-03T10:00:00", "amount": 100.0, "description": "Random"},
+        {"external_id": "b", "posted_at": "2025-01-06T10:00:00", "amount": 90.0, "description": "Globex"},
+        {"external_id": "c", "posted_at": "2025-01-04T10:00:00", "amount": 250.0, "description": "Payment"},
+    ])
+
+    # first incremental run has no watermark and falls back to a full run
+    first = client.post(f"/tenants/{tid}/reconcile", json={**body, "mode": "incremental"}).json()
+    assert _ranked(first) == _ranked(client.post(f"/tenants/{tid}/reconcile", json=body).json())
+
+    # new transactions that beat existing proposals, a new invoice, and a confirmed invoice
+    _import(client, tid, "b2", [
+        {"external_id": "d", "posted_at": "2025-01-01T09:00:00", "amount": 100.0, "description": "Acme January"},
+        {"external_id": "e", "posted_at": "2025-01-05T09:00:00", "amount": 250.0, "description": "Globex rent"},
+        {"external_id": "f", "posted_at": "2025-02-01T09:00:00", "amount": 40.0, "description": "Initech"},
+    ])
+    client.post(f"/tenants/{tid}/invoices", json={
+        "amount": 40.0, "currency": "USD", "invoice_date": "2025-02-02", "description": "Initech"
+    })
+    inv2_match = next(m for m in first if m["invoice_id"] == inv2["id"])
+    client.post(f"/tenants/{tid}/matches/{inv2_match['id']}/confirm")
+
+    incremental = client.post(f"/tenants/{tid}/reconcile", json={**body, "mode": "incremental"}).json()
+    full = client.post(f"/tenants/{tid}/reconcile", json=body).json()
+
+    assert _ranked(incremental) == _ranked(full)
+    assert all(m["invoice_id"] != inv2["id"] for m in incremental)
+    assert [m["invoice_id"] for m in incremental].count(inv1["id"]) == 2
+
+
+def test_incremental_with_changed_parameters_runs_full(client):
+    tid = client.post("/tenants", json={"name": "inc-params"}).json()["id"]
+    client.post(f"/tenants/{tid}/invoices", json={"amount": 10.0, "invoice_date": "2025-01-01"})
+    _import(client, tid, "p1", [
+        {"external_id": "a", "posted_at": "2025-01-02T10:00:00", "amount": 10.0, "description": "x"},
+        {"external_id": "b", "posted_at": "2025-01-04T10:00:00", "amount": 11.0, "description": "y"},
+    ])
+
+    client.post(f"/tenants/{tid}/reconcile", json={"window_days": 1, "mode": "incremental"})
+    wider = client.post(f"/tenants/{tid}/reconcile", json={"window_days": 5, "mode": "incremental"}).json()
+    full = client.post(f"/tenants/{tid}/reconcile", json={"window_days": 5}).json()
+
+    assert len(wider) == 2
+    assert _ranked(wider) == _ranked(full)
+
+
+def test_incremental_sees_edits_stamped_just_before_the_previous_run(client, session):
+    from sqlalchemy import update
+
+    from app.db.models import BankTransaction, utcnow
+
+    tid = client.post("/tenants", json={"name": "inc-late"}).json()["id"]
+    body = {"window_days": 3, "max_candidates_per_invoice": 1, "mode": "incremental"}
+    client.post(f"/tenants/{tid}/invoices", json={"amount": 100.0, "invoice_date": "2025-01-01"})
+    _import(client, tid, "l1", [
+        {"external_id": "a", "posted_at": "2025-01-02T10:00:00", "amount": 100.0, "description": "x"},
+        {"external_id": "b", "posted_at": "2025-01-02T10:00:00", "amount": 55.0, "description": "y"},
+    ])
+    # an edit committed after the run, but by a writer whose clock runs behind (or that started
+    # its transaction earlier), is stamped before the run started
+    stamped = utcnow() - dt.timedelta(seconds=1)
+    first = client.post(f"/tenants/{tid}/reconcile", json=body).json()
+    assert [m["bank_transaction_id"] for m in first] == [1]
+
+    session.execute(
+        update(BankTransaction)
+        .where(BankTransaction.tenant_id == tid, BankTransaction.external_id == "b")
+        .values(amount=100.0, posted_at=dt.datetime(2025, 1, 1, 10), updated_at=stamped)
+    )
+    session.commit()
+
+    incremental = client.post(f"/tenants/{tid}/reconcile", json=body).json()
+    full = client.post(f"/tenants/{tid}/reconcile", json={**body, "mode": "full"}).json()
+    assert [m["bank_transaction_id"] for m in incremental] == [2]
+    assert _ranked(incremental) == _ranked(full)
@@ -0,0 +1,170 @@
+import datetime as dt
+import time
+from dataclasses import replace
+
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.db.models import ReconcileJob, utcnow
+from app.modules.reconciliation import reconcile_service, worker
+from app.modules.reconciliation.job_service import ReconcileJobService
+from tests.test_reconcile_parity import _ranked, _seed_tenant
+
+
+def _wait(client, tid, job_id, timeout=20.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/tenants/{tid}/reconcile/jobs/{job_id}").json()
+        if job["status"] in ("succeeded", "failed") or time.monotonic() > deadline:
+            return job
+        time.sleep(0.05)
+
+
+def _job_matches(client, tid, job_id, **params):
+    out, cursor = [], None
+    while True:
+        page = {**params, **({"cursor": cursor} if cursor else {})}
+        r = client.get(f"/tenants/{tid}/reconcile/jobs/{job_id}", params=page)
+        assert r.status_code == 200, r.text
+        out += r.json()["matches"]
+        cursor = r.json()["matches_next_cursor"]
+        if not cursor:
+            return out
+
+
+def test_reconcile_job_runs_in_background_and_matches_sync_result(client):
+    tid = _seed_tenant(client, "jobs")
+    body = {"window_days": 3, "max_candidates_per_invoice": 3, "chunk_size": 7}
+
+    r = client.post(f"/tenants/{tid}/reconcile/jobs", json=body)
+    assert r.status_code == 202
+    assert r.json()["status"] in ("queued", "running", "succeeded")
+
+    job = _wait(client, tid, r.json()["id"])
+    assert job["status"] == "succeeded", job
+    assert job["invoices_done"] == job["invoices_total"] == 40
+    assert job["duration_ms"] is not None
+    matches = _job_matches(client, tid, job["id"], limit=50)
+    assert job["matches_created"] == len(matches) > 50
+
+    sync = client.post(f"/tenants/{tid}/reconcile", json=body).json()
+    assert _ranked(matches) == _ranked(sync)
+
+    other = client.post("/tenants", json={"name": "jobs-other"}).json()["id"]
+    assert client.get(f"/tenants/{other}/reconcile/jobs/{job['id']}").status_code == 404
+    assert client.post(f"/tenants/{tid}/reconcile/jobs", json={"engine": "gpu"}).status_code == 400
+
+
+def test_standalone_worker_drains_queue(client, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(worker, "submit", lambda factory, job_id: submitted.append((factory, job_id)))
+    tid = _seed_tenant(client, "worker", n_invoices=10, n_txs=30)
+
+    job_id = client.post(f"/tenants/{tid}/reconcile/jobs", json={"chunk_size": 4}).json()["id"]
+    assert client.get(f"/tenants/{tid}/reconcile/jobs/{job_id}").json()["status"] == "queued"
+
+    factory, _ = submitted[0]
+    assert worker.run_pending(factory) == 1
+    assert worker.run_pending(factory) == 0
+
+    job = client.get(f"/tenants/{tid}/reconcile/jobs/{job_id}").json()
+    assert job["status"] == "succeeded"
+    assert job["invoices_done"] == 10
+
+
+def test_incremental_job_lists_only_its_own_proposals(client, session_factory, monkeypatch):
+    monkeypatch.setattr(worker, "submit", lambda factory, job_id: None)
+    # no margin: rows seeded just before the first run would otherwise all be rescored by the second
+    monkeypatch.setattr(reconcile_service, "settings", replace(settings, reconcile_watermark_margin_s=0))
+    tid = _seed_tenant(client, "job-own", n_invoices=10, n_txs=30)
+    body = {"mode": "incremental", "chunk_size": 4}
+
+    first = client.post(f"/tenants/{tid}/reconcile/jobs", json=body).json()["id"]
+    worker.run_pending(session_factory)
+    created = client.get(f"/tenants/{tid}/reconcile/jobs/{first}").json()["matches_created"]
+    assert len(_job_matches(client, tid, first)) == created > 0
+
+    new_invoice = {"amount": 100.0, "currency": "USD", "invoice_date": "2025-01-10"}
+    inv = client.post(f"/tenants/{tid}/invoices", json=new_invoice).json()["id"]
+    second = client.post(f"/tenants/{tid}/reconcile/jobs", json=body).json()["id"]
+    worker.run_pending(session_factory)
+    job = client.get(f"/tenants/{tid}/reconcile/jobs/{second}").json()
+    assert job["status"] == "succeeded"
+    assert {m["invoice_id"] for m in job["matches"]} == {inv}
+    assert job["matches_created"] == len(job["matches"])
+
+
+def test_restart_resubmits_queued_and_requeues_stale_running_jobs(client, session, session_factory, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(worker, "submit", lambda factory, job_id: submitted.append(job_id))
+    tid = _seed_tenant(client, "recover", n_invoices=10, n_txs=30)
+
+    queued, stale = (client.post(f"/tenants/{tid}/reconcile/jobs", json={}).json()["id"] for _ in range(2))
+    # one running job per tenant, so the healthy one belongs to another tenant
+    other = client.post("/tenants", json={"name": "recover-other"}).json()["id"]
+    live = client.post(f"/tenants/{other}/reconcile/jobs", json={}).json()["id"]
+    now = utcnow()
+    session.execute(update(ReconcileJob).where(ReconcileJob.id == stale).values(
+        status="running", started_at=now - dt.timedelta(hours=2), heartbeat_at=now - dt.timedelta(hours=1),
+        invoices_done=4,
+    ))
+    session.execute(update(ReconcileJob).where(ReconcileJob.id == live).values(
+        status="running", started_at=now - dt.timedelta(hours=2), heartbeat_at=now,
+    ))
+    session.commit()
+
+    submitted.clear()
+    assert worker.recover(session_factory) == 2
+    assert submitted == [queued, stale]
+    job = client.get(f"/tenants/{tid}/reconcile/jobs/{stale}").json()
+    assert (job["status"], job["invoices_done"], job["started_at"]) == ("queued", 0, None)
+    assert client.get(f"/tenants/{other}/reconcile/jobs/{live}").json()["status"] == "running"
+
+    assert worker.run_pending(session_factory) == 2
+    assert client.get(f"/tenants/{tid}/reconcile/jobs/{stale}").json()["status"] == "succeeded"
+
+
+def test_one_job_at_a_time_per_tenant(client, session_factory, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(worker, "submit", lambda factory, job_id: submitted.append(job_id))
+    tid = _seed_tenant(client, "serial", n_invoices=10, n_txs=30)
+    other = _seed_tenant(client, "serial-other", n_invoices=5, n_txs=10)
+
+    url = f"/tenants/{tid}/reconcile/jobs"
+    first, second = (client.post(url, json={"chunk_size": 4}).json()["id"] for _ in range(2))
+    elsewhere = client.post(f"/tenants/{other}/reconcile/jobs", json={}).json()["id"]
+
+    with session_factory() as session:
+        jobs = ReconcileJobService(session)
+        assert jobs.claim(first)
+        # the tenant is busy: neither a direct claim nor the queue hands out its second job
+        assert not jobs.claim(second)
+        assert jobs.claim_next() == elsewhere
+        assert jobs.claim_next() is None
+
+    r = client.post(f"/tenants/{tid}/reconcile", json={})
+    assert r.status_code == 409
+    assert client.post(f"/tenants/{other}/reconcile", json={}).status_code == 409
+
+    with session_factory() as session:
+        jobs = ReconcileJobService(session)
+        jobs.run(first)
+        jobs.run(elsewhere)
+        assert jobs.claim_next() == second
+        jobs.run(second)
+
+    for job_id in (first, second):
+        assert client.get(f"/tenants/{tid}/reconcile/jobs/{job_id}").json()["status"] == "succeeded"
+    assert client.post(f"/tenants/{tid}/reconcile", json={}).status_code == 200
+
+
+def test_in_process_worker_runs_jobs_queued_behind_a_busy_tenant(client, session_factory, monkeypatch):
+    monkeypatch.setattr(worker, "submit", lambda factory, job_id: None)
+    tid = _seed_tenant(client, "serial-thread", n_invoices=10, n_txs=30)
+    first, second = (client.post(f"/tenants/{tid}/reconcile/jobs", json={}).json()["id"] for _ in range(2))
+
+    # `second` stays queued, as if its own claim had failed while `first` ran
+    worker.run_job(session_factory, first)
+    assert [client.get(f"/tenants/{tid}/reconcile/jobs/{j}").json()["status"] for j in (first, second)] == [
+        "succeeded", "succeeded",
+    ]
@@ -0,0 +1,174 @@
+import datetime as dt
+import random
+from dataclasses import replace
+
+import pytest
+
+from app.core.config import settings
+from app.modules.reconciliation import reconcile_service
+
+
+WORDS = ["acme", "globex", "initech", "january", "payment", "invoice", "ref", "ac", "inv 42", "umbrella corp"]
+
+
+def _seed_tenant(client, name: str, n_invoices: int = 40, n_txs: int = 150) -> int:
+    rnd = random.Random(7)
+    tid = client.post("/tenants", json={"name": name}).json()["id"]
+    base = dt.date(2025, 1, 1)
+    amounts = [100.0, 250.5, 99.99, 1200.0, 75.25]
+
+    for _ in range(n_invoices):
+        client.post(f"/tenants/{tid}/invoices", json={
+            "amount": rnd.choice(amounts),
+            "currency": rnd.choice(["USD", "USD", "EUR"]),
+            "invoice_date": (base + dt.timedelta(days=rnd.randint(0, 30))).isoformat() if rnd.random() > 0.2 else None,
+            "description": " ".join(rnd.sample(WORDS, rnd.randint(1, 3))) if rnd.random() > 0.1 else None,
+        })
+
+    payload = [
+        {
+            "external_id": f"x{i}",
+            "posted_at": f"{base + dt.timedelta(days=rnd.randint(-5, 40))}T{rnd.randint(0, 23):02d}:15:00",
+            "amount": rnd.choice(amounts + [10.0, 42.0]),
+            "currency": rnd.choice(["USD", "USD", "EUR", "GBP"]),
+            "description": " ".join(rnd.sample(WORDS, rnd.randint(1, 3))),
+        }
+        for i in range(n_txs)
+    ]
+    client.post(f"/tenants/{tid}/bank-transactions/import", json=payload, headers={"Idempotency-Key": f"seed-{name}"})
+    return tid
+
+
+def _ranked(matches):
+    return [(m["invoice_id"], m["bank_transaction_id"], m["score"], m["reasons"]) for m in matches]
+
+
+def test_blocked_candidates_match_exhaustive_scan(client):
+    tid = _seed_tenant(client, "blocked")
+
+    for window_days, k in [(3, 3), (1, 5), (10, 2)]:
+        exhaustive = client.post(f"/tenants/{tid}/reconcile", json={
+            "window_days": window_days, "max_candidates_per_invoice": k, "candidate_mode": "exhaustive",
+        }).json()
+        blocked = client.post(f"/tenants/{tid}/reconcile", json={
+            "window_days": window_days, "max_candidates_per_invoice": k, "candidate_mode": "blocked",
+        }).json()
+
+        assert exhaustive
+        assert _ranked(blocked) == _ranked(exhaustive)
+
+
+def test_numpy_engine_parity_with_python_engine(client, monkeypatch):
+    pytest.importorskip("numpy")
+    from app.modules.reconciliation import vectorized
+
+    # small blocks so the test crosses invoice and transaction block boundaries
+    monkeypatch.setattr(vectorized, "INVOICE_BLOCK", 16)
+    monkeypatch.setattr(vectorized, "TX_BLOCK", 64)
+    tid = _seed_tenant(client, "numpy", n_invoices=60, n_txs=300)
+
+    for window_days, k in [(3, 3), (2, 50), (15, 4)]:
+        body = {"window_days": window_days, "max_candidates_per_invoice": k}
+        python = client.post(f"/tenants/{tid}/reconcile", json={**body, "engine": "python"}).json()
+        numpy = client.post(f"/tenants/{tid}/reconcile", json={**body, "engine": "numpy"}).json()
+
+        assert python
+        assert {r for m in python for r in m["reasons"]} >= {"amount_exact", "text_contains", "text_overlap"}
+        assert _ranked(numpy) == _ranked(python)
+
+
+def test_parallel_workers_match_serial_ranking(client, monkeypatch):
+    from app.modules.reconciliation import parallel
+
+    monkeypatch.setattr(parallel, "SHARDS_PER_WORKER", 3)
+    monkeypatch.setattr(reconcile_service, "settings", replace(settings, reconcile_max_workers=2))
+    tid = _seed_tenant(client, "parallel")
+
+    body = {"window_days": 3, "max_candidates_per_invoice": 3}
+    serial = client.post(f"/tenants/{tid}/reconcile", json={**body, "workers": 1}).json()
+    sharded = client.post(f"/tenants/{tid}/reconcile", json={**body, "workers": 2}).json()
+
+    assert serial
+    assert _ranked(sharded) == _ranked(serial)
+
+
+def test_workers_above_the_configured_maximum_are_rejected(client, monkeypatch):
+    monkeypatch.setattr(reconcile_service, "settings", replace(settings, reconcile_max_workers=4))
+    tid = client.post("/tenants", json={"name": "too-many"}).json()["id"]
+
+    r = client.post(f"/tenants/{tid}/reconcile", json={"workers": 5})
+    assert r.status_code == 400
+    assert "workers must be <= 4" in r.text
+    assert client.post(f"/tenants/{tid}/reconcile/jobs", json={"workers": 1000}).status_code == 400
+    assert client.post(f"/tenants/{tid}/reconcile", json={"workers": 4}).status_code == 200
+
+
+def test_streaming_chunks_match_in_memory_ranking(client):
+    tid = _seed_tenant(client, "streaming")
+
+    body = {"window_days": 3, "max_candidates_per_invoice": 3}
+    in_memory = client.post(f"/tenants/{tid}/reconcile", json=body).json()
+    streamed = client.post(f"/tenants/{tid}/reconcile", json={**body, "stream": True, "chunk_size": 7}).json()
+
+    assert in_memory
+    assert _ranked(streamed) == _ranked(in_memory)
+
+
+def test_pruned_top_k_matches_full_scoring_and_skips_pairs():
+    from types import SimpleNamespace
+
+    from app.modules.reconciliation.ranking import Ranker
+
+    rnd = random.Random(3)
+    base = dt.datetime(2025, 1, 10)
+    txs = [
+        SimpleNamespace(
+            id=i, amount=rnd.choice([100.0, 250.5, 42.0]), currency="USD",
+            posted_at=base + dt.timedelta(days=rnd.randint(-4, 4)),
+            description=" ".join(rnd.sample(WORDS, rnd.randint(1, 3))),
+        )
+        for i in range(1, 400)
+    ]
+    invoices = [
+        SimpleNamespace(
+            id=i, amount=rnd.choice([100.0, 250.5]), currency="USD",
+            invoice_date=(base + dt.timedelta(days=rnd.randint(-2, 2))).date(),
+            description=" ".join(rnd.sample(WORDS, 2)),
+        )
+        for i in range(1, 30)
+    ]
+
+    pruned = Ranker(txs, 3, 3, "blocked")
+    full = Ranker(txs, 3, 3, "exhaustive")
+    assert list(pruned.rank(invoices)) == list(full.rank(invoices))
+    assert pruned.stats.pairs_pruned > 0
+    assert pruned.stats.pairs_scored < full.stats.pairs_scored
+
+
+def test_text_index_matches_pairwise_text_score():
+    from types import SimpleNamespace
+
+    from app.modules.reconciliation.scoring import _text_score
+    from app.modules.reconciliation.text_index import TextIndex
+
+    rnd = random.Random(3)
+    texts = [" ".join(rnd.sample(WORDS, rnd.randint(1, 4))) for _ in range(200)] + ["AC", "a", " ", "Acme January"]
+    txs = [SimpleNamespace(id=i, description=t) for i, t in enumerate(texts)]
+    index = TextIndex(txs)
+
+    for query in texts[:60] + ["acme", "cme jan", "x", "", None, "invoice acme payment extra"]:
+        expected = {tx.id: _text_score(query, tx.description) for tx in txs}
+        expected = {k: v for k, v in expected.items() if v[0] > 0}
+        assert index.text_scores(query) == expected
+
+
+def test_unknown_candidate_mode_rejected(client):
+    tid = client.post("/tenants", json={"name": "bad-mode"}).json()["id"]
+    r = client.post(f"/tenants/{tid}/reconcile", json={"candidate_mode": "fuzzy"})
+    assert r.status_code == 400
+
+
+def test_unknown_engine_rejected(client):
+    tid = client.post("/tenants", json={"name": "bad-engine"}).json()["id"]
+    r = client.post(f"/tenants/{tid}/reconcile", json={"engine": "gpu"})
+    assert r.status_code == 400
@@ -0,0 +1,21 @@
+import threading
+
+from app.core.scheduler import start_periodic
+
+
+def test_periodic_task_keeps_running_after_a_failure():
+    calls = []
+    done = threading.Event()
+
+    def task():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("database locked")
+        done.set()
+
+    stop = start_periodic("test-task", 0.01, task)
+    try:
+        assert done.wait(5)
+    finally:
+        stop.set()
+    assert len(calls) >= 2